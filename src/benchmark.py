@@ -0,0 +1,322 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+import timeit
+import tracemalloc
+import numpy as np
+import cauchy_function
+import fused_rhs
+import instrumentation
+import rk_sol
+import sweep
+import trajectory_store
+
+CONSTANTS = {
+    'current': 0.,
+    'capacitance': 1.,
+    'g_Na': 120.,
+    'g_K': 36.,
+    'g_L': 0.3,
+    'E_Na': 115.,
+    'E_K':  -12.0,
+    'E_L':  10.613
+}
+
+Y_0 = np.array([
+        0., # V
+        0.05,  # m
+        0.6,  # h
+        0.06  # n
+    ])
+
+# baseline of this machine, saved with --save and read by --compare when no path is given
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+
+# whether a larger value of each section of the results is an improvement
+HIGHER_IS_BETTER = {
+    'rhs': True,
+    'steps': True,
+    'sweep': True,
+    'memory': False,
+    'step_memory': False,
+    'accuracy': False,
+}
+
+
+def _best_time(function, n_calls: int, repeat: int = 5) -> float:
+    """Best time, in seconds, of one call of function among repeat runs of n_calls calls"""
+    return min(timeit.repeat(function, number=n_calls, repeat=repeat))/n_calls
+
+
+def benchmark_rhs(n_calls: int = 20000, n_neurons: int = 10000) -> dict:
+    """Measures the evaluations per second of the right-hand side f(t, y) with the dictionary
+    path (cauchy_function.cauchy_function) and with the fused kernel (fused_rhs), for a single
+    neuron and for a population of n_neurons.
+
+    Args:
+        n_calls (int): number of calls timed for the single neuron
+        n_neurons (int): size of the population
+
+    Returns:
+        dict: evaluations per second of each path, {'cauchy_function': ..., 'fused': ...,
+        'cauchy_function_batch': ..., 'fused_batch': ...} (the batch ones count neuron evaluations)
+    """
+
+    parameters = fused_rhs.pack_constants(CONSTANTS)
+    out = np.empty(4)
+
+    batch_y = np.tile(Y_0, (n_neurons, 1))
+    batch_y[:, 0] = np.linspace(-10., 100., n_neurons)
+    batch_out = np.empty_like(batch_y)
+    n_batch_calls = max(1, n_calls//1000)
+
+    return {
+        'cauchy_function': 1./_best_time(lambda: cauchy_function.cauchy_function(0., Y_0, CONSTANTS), n_calls),
+        'fused': 1./_best_time(lambda: fused_rhs.fused_cauchy_function(0., Y_0, parameters, out), n_calls),
+        'cauchy_function_batch': n_neurons/_best_time(
+            lambda: cauchy_function.cauchy_function(0., batch_y, CONSTANTS), n_batch_calls),
+        'fused_batch': n_neurons/_best_time(
+            lambda: fused_rhs.fused_cauchy_function(0., batch_y, parameters, batch_out), n_batch_calls),
+    }
+
+
+def benchmark_steps(n_steps: int = 2000, methods: list = None) -> dict:
+    """Measures the steps per second of each fixed step solver of sweep.METHODS over [0, 30] ms,
+    storing only the final state so that the storage does not count in the time
+
+    Args:
+        n_steps (int): number of steps of each timed run
+        methods (list): names of the methods (all of sweep.METHODS when None)
+
+    Returns:
+        dict: steps per second of each method
+    """
+
+    return {method: n_steps/_best_time(lambda: sweep.METHODS[method]((0., 30.), n_steps, Y_0, CONSTANTS, stride=n_steps),
+                                       1, repeat=3)
+            for method in methods or sweep.METHODS}
+
+
+def benchmark_sweep(n_values: list = (1000, 2000, 5000), methods: list = ('implicit_euler', 'rk'),
+                    n_workers: int = None) -> dict:
+    """Measures the end to end run of main.py at a smaller scale: a sweep of the methods over
+    n_values on a process pool (see sweep.run_sweep), saving every solution as a trajectory store
+    in a temporary directory, without a cache
+
+    Args:
+        n_values (list): numbers of steps over [0, 30] ms
+        methods (list): names of the methods (keys of sweep.METHODS)
+        n_workers (int): number of worker processes (the number of CPUs when None)
+
+    Returns:
+        dict: steps per second of the whole sweep, including the pool and the writes, {'main': ...}
+    """
+
+    jobs = sweep.grid(methods, n_values, CONSTANTS, Y_0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        def save(index, job, solution):
+            trajectory_store.save_trajectory(os.path.join(directory, f'{job.method}_{job.n_steps}'), solution,
+                                             method=job.method, n_steps=job.n_steps)
+
+        start = time.perf_counter()
+        _, failures = sweep.run_sweep(jobs, n_workers, on_result=save, progress=None)
+        elapsed = time.perf_counter() - start
+
+    if failures:
+        raise RuntimeError(f'the sweep failed: {failures}')
+
+    return {'main': sum(job.n_steps for job in jobs)/elapsed}
+
+
+def benchmark_memory(lengths: list = (1000, 10000, 100000), method: str = 'euler') -> dict:
+    """Measures the peak memory allocated by a solver storing whole trajectories of each length
+
+    Args:
+        lengths (list): numbers of steps (rows of the trajectory)
+        method (str): name of the method (key of sweep.METHODS)
+
+    Returns:
+        dict: peak memory in bytes, keyed by the length
+    """
+
+    peaks = {}
+    for n_steps in lengths:
+        tracemalloc.start()
+        sweep.METHODS[method]((0., 30.), n_steps, Y_0, CONSTANTS)
+        peaks[str(n_steps)] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return peaks
+
+
+def benchmark_step_memory(n_neurons: int = 10000, n_steps: int = 20, methods: list = ('rk', 'fused_rk')) -> dict:
+    """Measures the memory allocated by the steps of a population of n_neurons: the peak of the
+    allocations after the first step, above what was allocated when it ended (the buffers of the
+    run), which are the temporaries of a step. The fused path writes into buffers allocated
+    before the first step, so its steps should allocate (next to) nothing.
+
+    Args:
+        n_neurons (int): size of the population
+        n_steps (int): number of steps of each run, of 0.01 ms
+        methods (list): names of the methods (keys of sweep.METHODS)
+
+    Returns:
+        dict: bytes allocated by the steps of each method
+    """
+
+    batch_y = np.tile(Y_0, (n_neurons, 1))
+    peaks = {}
+    for method in methods:
+        baseline = {}
+
+        def hook(event, stats, k=None, **data):
+            if event == 'step' and k == 1:
+                tracemalloc.reset_peak()
+                baseline['current'] = tracemalloc.get_traced_memory()[0]
+
+        tracemalloc.start()
+        sweep.METHODS[method]((0., 0.01*n_steps), n_steps, batch_y, CONSTANTS, stride=n_steps,
+                              stats=instrumentation.SolverStats([hook]))
+        peaks[method] = tracemalloc.get_traced_memory()[1] - baseline['current']
+        tracemalloc.stop()
+
+    return peaks
+
+
+def benchmark_accuracy(n_values: list = (500, 2000, 8000), methods: list = None, current: float = 10.) -> dict:
+    """Measures the accuracy per cost of each method: the error of the final state at t = 30 ms
+    (maximum over V, m, h, n) against a Dormand-Prince reference with rtol = 1e-11, and the best
+    wall time of the run, for each number of steps. The current makes the neuron fire, so that the error
+    includes the timing of the spikes.
+
+    Args:
+        n_values (list): numbers of steps
+        methods (list): names of the methods (all of sweep.METHODS when None)
+        current (float): the injected current
+
+    Returns:
+        dict: {'method/n': {'error': ..., 'time': ...}}; a run that raises (e.g. Newton's method
+        not converging) is kept as {'error': inf, 'time': nan, 'failed': True}
+    """
+
+    constants = dict(CONSTANTS, current=current)
+    reference = rk_sol.dopri_solution((0., 30.), Y_0, constants, rtol=1e-11, atol=1e-12)[-1, 1:]
+
+    results = {}
+    for method in methods or sweep.METHODS:
+        for n_steps in n_values:
+            def run():
+                return sweep.METHODS[method]((0., 30.), n_steps, Y_0, constants, stride=n_steps)[-1, 1:]
+
+            try:
+                final = run()
+            except RuntimeError:
+                results[f'{method}/{n_steps}'] = {'error': np.inf, 'time': np.nan, 'failed': True}
+                continue
+            results[f'{method}/{n_steps}'] = {'error': float(np.max(np.abs(final - reference))),
+                                              'time': _best_time(run, 1, repeat=3)}
+
+    return results
+
+
+def run_all() -> dict:
+    """Runs every benchmark of the suite
+
+    Returns:
+        dict: the results of each section ('rhs', 'steps', 'sweep', 'memory', 'step_memory' and 'accuracy')
+    """
+
+    return {
+        'rhs': benchmark_rhs(),
+        'steps': benchmark_steps(),
+        'sweep': benchmark_sweep(),
+        'memory': benchmark_memory(),
+        'step_memory': benchmark_step_memory(),
+        'accuracy': benchmark_accuracy(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """Compares the results of the suite with a stored baseline
+
+    Args:
+        results (dict): the results of run_all
+        baseline (dict): the results of a previous run (see save_baseline)
+        tolerance (float): relative change ignored as noise
+
+    Returns:
+        list: the regressions, as tuples (section, name, baseline value, current value); in the
+        accuracy section the time of a run regresses, and so does its error beyond the tolerance;
+        a value that is not finite (e.g. the nan error of a run that blew up, or the inf error of
+        a run that failed) is always a regression, unless the run also failed in the baseline, and
+        so is a result of the baseline that is missing (its current value is nan)
+    """
+
+    regressions = []
+    for section, higher_is_better in HIGHER_IS_BETTER.items():
+        for name, old in baseline.get(section, {}).items():
+            new = results.get(section, {}).get(name)
+            if new is None:
+                regressions.append((section, name, old['error'] if section == 'accuracy' else old, np.nan))
+                continue
+            if section == 'accuracy' and old.get('failed') and new.get('failed'):
+                continue
+            pairs = [(name, old, new)] if section != 'accuracy' \
+                else [(f'{name} {key}', old[key], new[key]) for key in ('error', 'time')]
+
+            for label, old_value, new_value in pairs:
+                worse = new_value < old_value*(1. - tolerance) if higher_is_better \
+                    else new_value > old_value*(1. + tolerance)
+                if worse or not np.isfinite(new_value):
+                    regressions.append((section, label, old_value, new_value))
+
+    return regressions
+
+
+def save_baseline(results: dict, path: str):
+    """Saves the results of the suite as a JSON baseline"""
+    with open(path, 'w') as file:
+        json.dump(results, file, indent=2)
+
+
+def load_baseline(path: str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks of the right-hand side and of the solvers')
+    parser.add_argument('--save', metavar='BASELINE', nargs='?', const=BASELINE,
+                        help='saves the results as a JSON baseline (benchmark_baseline.json by default)')
+    parser.add_argument('--compare', metavar='BASELINE', nargs='?', const=BASELINE,
+                        help='compares the results with a JSON baseline (benchmark_baseline.json by default)')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='relative change ignored as noise')
+    arguments = parser.parse_args()
+
+    results = run_all()
+
+    for name, rate in results['rhs'].items():
+        print(f'{name}: {rate:.4g} evaluations/s')
+    for name, rate in results['steps'].items():
+        print(f'{name}: {rate:.4g} steps/s')
+    for name, rate in results['sweep'].items():
+        print(f'{name} sweep: {rate:.4g} steps/s')
+    for length, peak in results['memory'].items():
+        print(f'{length} steps: {peak/2**20:.2f} MiB peak')
+    for name, peak in results['step_memory'].items():
+        print(f'{name} population steps: {peak/2**10:.1f} KiB allocated')
+    for name, cost in results['accuracy'].items():
+        print(f'{name}: failed' if cost.get('failed') else f'{name}: error {cost["error"]:.3g} in {cost["time"]:.3g} s')
+
+    if arguments.save:
+        save_baseline(results, arguments.save)
+
+    if arguments.compare:
+        regressions = compare(results, load_baseline(arguments.compare), arguments.tolerance)
+        for section, name, old, new in regressions:
+            print(f'REGRESSION {section} {name}: {old:.4g} -> {new:.4g}')
+        if regressions:
+            raise SystemExit(1)
@@ -0,0 +1,147 @@
+import numpy as np
+from scipy.linalg import solve_banded
+import eq_parameters
+import state_variables
+import stimulus
+import integrator
+
+# the squid giant axon of Hodgkin & Huxley (1952): radius and axial resistivity
+SQUID_RADIUS = 0.0238  # cm
+SQUID_RESISTIVITY = 35.4  # ohm cm
+
+
+class CableStep:
+    """One step of an unbranched cable (axon or dendrite) of N Hodgkin-Huxley compartments of
+    length dx = length/N coupled by the axial current g_axial*(V_{i-1} - 2V_i + V_{i+1}), with
+    sealed ends. The gates are advanced first, exactly for V frozen at V_k (Rush-Larsen), and
+    then V by the implicit Euler's method with the new conductances, which is linear in V:
+
+        (C/dt + g_i)V_i - g_axial(V_{i-1} - 2V_i + V_{i+1}) = C/dt V_k,i + g_i E_i + I_i
+
+    A tridiagonal system solved in O(N) by LAPACK's banded solver, stable for any step size.
+
+    Args:
+        n_compartments (int): number N of compartments
+        length (float): length of the cable, in cm
+        radius (float): radius of the cable, in cm
+        resistivity (float): axial resistivity of the cytoplasm, in ohm cm
+        injection (np.array): weight of the injected current I in each compartment (the current
+            goes only into the first compartment by default)
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+    """
+
+    def __init__(self, n_compartments: int, length: float, radius: float = SQUID_RADIUS,
+                 resistivity: float = SQUID_RESISTIVITY, injection: np.array = None, rates=eq_parameters.rates):
+        if n_compartments < 2:
+            raise ValueError(f'a cable needs at least 2 compartments, got {n_compartments}')
+
+        self.n_compartments = n_compartments
+        self.dx = length/n_compartments
+        # a/(2 R dx^2) is in S/cm^2, the conductances of the model are in mS/cm^2
+        self.coupling = 1e3*radius/(2.*resistivity*self.dx**2)
+        self.rates = rates
+
+        if injection is None:
+            injection = np.zeros(n_compartments)
+            injection[0] = 1.
+        self.injection = np.asarray(injection, dtype=float)
+
+        # the sealed ends have a single neighbour
+        self._neighbours = np.full(n_compartments, 2.)
+        self._neighbours[[0, -1]] = 1.
+        self._banded = np.empty((3, n_compartments))
+
+    def __call__(self, t_k: float, y_k: np.array, delta_t: float, constants: dict) -> np.array:
+        C = constants['capacitance']
+        g_Na, g_K, g_L = constants['g_Na'], constants['g_K'], constants['g_L']
+        E_Na, E_K, E_L = constants['E_Na'], constants['E_K'], constants['E_L']
+
+        V, m, h, n = y_k[:, 0], y_k[:, 1], y_k[:, 2], y_k[:, 3]
+        alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n = self.rates(V)
+
+        next_y = np.empty_like(y_k)
+        next_y[:, 1] = m = state_variables.gate_exponential_step(alpha_m, beta_m, m, delta_t)
+        next_y[:, 2] = h = state_variables.gate_exponential_step(alpha_h, beta_h, h, delta_t)
+        next_y[:, 3] = n = state_variables.gate_exponential_step(alpha_n, beta_n, n, delta_t)
+
+        g_Na_open, g_K_open = g_Na*m**3*h, g_K*n**4
+        I = stimulus.current(constants, t_k + delta_t)*self.injection
+
+        # the three diagonals of the matrix, in the layout of solve_banded (rebuilt in place,
+        # since the solver overwrites it)
+        banded = self._banded
+        banded[0, 1:] = -self.coupling
+        banded[1] = C/delta_t + g_Na_open + g_K_open + g_L + self.coupling*self._neighbours
+        banded[2, :-1] = -self.coupling
+        b = C/delta_t*V + g_Na_open*E_Na + g_K_open*E_K + g_L*E_L + I
+
+        next_y[:, 0] = solve_banded((1, 1), banded, b, overwrite_ab=True, overwrite_b=True, check_finite=False)
+
+        return next_y
+
+
+def cable_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                   n_compartments: int, length: float, radius: float = SQUID_RADIUS,
+                   resistivity: float = SQUID_RESISTIVITY, injection: np.array = None, stride: int = 1,
+                   out: np.array = None, rates=eq_parameters.rates, stats=None):
+    """Computes a numerical solution of a cable of N Hodgkin-Huxley compartments (see CableStep),
+    e.g. the propagation of an action potential along an axon
+
+    Args:
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        initial_y (np.array): the initial state [V, m, h, n] of every compartment, or an (N, 4)
+            array with the initial state of each compartment
+        constants (dict): the constants of the model (scalars or per-compartment (N,) arrays); the
+            current, which may be a stimulus.Stimulus, is injected with the weights of injection
+        n_compartments (int): number N of compartments
+        length (float): length of the cable, in cm
+        radius (float): radius of the cable, in cm
+        resistivity (float): axial resistivity of the cytoplasm, in ohm cm
+        injection (np.array): weight of the injected current in each compartment (only the first one by default)
+        stride (int): stores one point every stride steps (1 stores all of them)
+        out (np.array): optional preallocated buffer for the solution (see integrator.allocate_solution)
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+        stats (instrumentation.SolverStats): optional stats of the run
+
+    Returns:
+        np.array: array (n//stride + 1, N, 5) cujas linhas [t_k, V_k, m_k, h_k, n_k] são o domínio
+        discretizado e a solução aproximada em cada compartimento
+    """
+
+    initial_y = np.broadcast_to(np.asarray(initial_y, dtype=float), (n_compartments, 4))
+    step = CableStep(n_compartments, length, radius, resistivity, injection, rates)
+
+    if stats is not None:
+        stats.start('cable')
+
+    solution = integrator.fixed_step_solution(step, time_interval, n_steps, initial_y, constants, stride, out, stats)
+
+    if stats is not None:
+        stats.end()
+
+    return solution
+
+
+def arrival_times(solution: np.array, threshold: float = 50.) -> np.array:
+    """First instant where V crosses the threshold upwards in each compartment of a cable
+    solution, interpolated linearly between the stored points (nan where it never does)
+
+    Args:
+        solution (np.array): the (k, N, 5) solution of cable_solution
+        threshold (float): the voltage of the crossing, in mV
+
+    Returns:
+        np.array: the (N,) arrival times, e.g. for the conduction velocity dx/diff(arrival_times)
+    """
+
+    t, V = solution[:, :, 0], solution[:, :, 1]
+    crossing = (V[:-1] < threshold) & (V[1:] >= threshold)
+    first = np.argmax(crossing, axis=0)
+    columns = np.arange(V.shape[1])
+
+    V_0, V_1 = V[first, columns], V[first + 1, columns]
+    t_0, t_1 = t[first, columns], t[first + 1, columns]
+    times = t_0 + (threshold - V_0)/(V_1 - V_0)*(t_1 - t_0)
+
+    return np.where(crossing.any(axis=0), times, np.nan)
@@ -1,31 +1,39 @@
 import numpy as np
-import pandas as pd
 import eq_parameters
+import eq_parameters_derivatives
 import state_variables
+import stimulus
 
-def cauchy_function(t: float, y: np.array, constants: dict) -> np.array:
+def cauchy_function(t: float, y: np.array, constants: dict, rates=eq_parameters.rates) -> np.array:
     """The derivative y'(t) = [V'(t), m'(t), h'(t), n'(t)] of the Cauchy's initial problem.
 
+    The state may also be a batch of neurons: an (N, 4) array with one row [V, m, h, n]
+    per neuron, in which case the entries of "constants" may be scalars or (N,) arrays
+    (see batch_constants) and the whole population is evaluated in one vectorized call.
+
     Args:
         t (float): instante of time t
-        y (float): function y in the instant t
+        y (np.array): function y in the instant t, with shape (4,) or (N, 4)
+        constants (dict): the constants I, C, g_Na, g_K, g_L, E_Na, E_K and E_L of the model (the
+            current I may be a stimulus.Stimulus, evaluated in t)
+        rates (callable): backend of the transition rates, V -> (alpha_m, beta_m, alpha_h, beta_h,
+            alpha_n, beta_n); the analytic formulas by default, or a rate_tables.RateTable lookup
 
     Returns:
-        float: the derivative of y'(t) = [V'(t), m'(t), h'(t), n'(t)] in the instante t
+        np.array: the derivative of y'(t) = [V'(t), m'(t), h'(t), n'(t)] in the instante t,
+        with the same shape of y
     """
     
     # unpacking the parameters from the dictionary "constants"
-    I, C = constants['current'], constants['capacitance']
+    I, C = stimulus.current(constants, t), constants['capacitance']
     g_Na, g_K, g_L = constants['g_Na'], constants['g_K'], constants['g_L']
     E_Na, E_K, E_L = constants['E_Na'], constants['E_K'], constants['E_L']
     
     # Getting the values of V, m, h, n in the vector of y
-    V, m, h, n = y[0], y[1], y[2], y[3]
+    V, m, h, n = y[..., 0], y[..., 1], y[..., 2], y[..., 3]
     
     # computing the alpha and beta parameters of the model
-    alpha_m, beta_m = eq_parameters.alpha_m(V), eq_parameters.beta_m(V)
-    alpha_h, beta_h = eq_parameters.alpha_h(V), eq_parameters.beta_h(V)
-    alpha_n, beta_n = eq_parameters.alpha_n(V), eq_parameters.beta_n(V)
+    alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n = rates(V)
     
     # print(V, I, C, m, h, n, g_Na, g_K, g_L, E_Na, E_K, E_L)
     
@@ -35,11 +43,56 @@ def cauchy_function(t: float, y: np.array, constants: dict) -> np.array:
     der_n = state_variables.der_n(alpha_n, beta_n, n)
     der_v = state_variables.der_Voltage(V, I, C, m, h, n, constants)
     
-    der_y = np.array([der_v, der_m, der_h, der_n])
+    der_y = np.stack((der_v, der_m, der_h, der_n), axis=-1)
     
     return der_y
 
 
+def jacobian(t: float, y: np.array, constants: dict, rates=eq_parameters.rates,
+             rate_derivatives=eq_parameters_derivatives.rate_derivatives) -> np.array:
+    """The 4x4 Jacobian matrix J = df/dy of the Cauchy's function f(t, y) = y'(t), with rows
+    [V', m', h', n'] and columns [V, m, h, n], built from the analytic derivatives of the
+    alpha and beta parameters (eq_parameters_derivatives).
+
+    Args:
+        t (float): instante of time t
+        y (np.array): function y in the instant t, with shape (4,) or (N, 4)
+        constants (dict): the constants I, C, g_Na, g_K, g_L, E_Na, E_K and E_L of the model
+        rates (callable): backend of the transition rates (see cauchy_function)
+        rate_derivatives (callable): backend of the derivatives d/dV of the transition rates
+
+    Returns:
+        np.array: the Jacobian df/dy in the instant t, with shape (4, 4) or (N, 4, 4)
+    """
+    
+    # unpacking the parameters from the dictionary "constants"
+    C = constants['capacitance']
+    g_Na, g_K, g_L = constants['g_Na'], constants['g_K'], constants['g_L']
+    E_Na, E_K = constants['E_Na'], constants['E_K']
+    
+    V, m, h, n = y[..., 0], y[..., 1], y[..., 2], y[..., 3]
+    
+    alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n = rates(V)
+    der_alpha_m, der_beta_m, der_alpha_h, der_beta_h, der_alpha_n, der_beta_n = rate_derivatives(V)
+    
+    J = np.zeros(y.shape + (4,))
+    
+    # V' = (I - g_Na*m^3*h*(V - E_Na) - g_K*n^4*(V - E_K) - g_L*(V - E_L))/C
+    J[..., 0, 0] = -(g_Na*m**3*h + g_K*n**4 + g_L)/C
+    J[..., 0, 1] = -3*g_Na*m**2*h*(V - E_Na)/C
+    J[..., 0, 2] = -g_Na*m**3*(V - E_Na)/C
+    J[..., 0, 3] = -4*g_K*n**3*(V - E_K)/C
+    
+    # x' = alpha_x*(1 - x) - beta_x*x, for each gate x = m, h, n
+    J[..., 1, 0] = der_alpha_m*(1 - m) - der_beta_m*m
+    J[..., 1, 1] = -(alpha_m + beta_m)
+    J[..., 2, 0] = der_alpha_h*(1 - h) - der_beta_h*h
+    J[..., 2, 2] = -(alpha_h + beta_h)
+    J[..., 3, 0] = der_alpha_n*(1 - n) - der_beta_n*n
+    J[..., 3, 3] = -(alpha_n + beta_n)
+    
+    return J
+
 def discretize_interval(interval: (float, float), n_steps: int) -> np.array:
     """Discretizes the interval [a, b], in to n points [t_0, t_1, t_2, t_3, ..., t_{n-1}],
     evenly spaced. t_{k+1} = t_k + delta_t, where delta_t = (b-a)/n.
@@ -58,4 +111,24 @@ def discretize_interval(interval: (float, float), n_steps: int) -> np.array:
     
     discrete_domain = np.linspace(start, stop, n_steps + 1)  # +1 to include the stop point
     
-    return discrete_domain, step_size
\ No newline at end of file
+    return discrete_domain, step_size
+
+
+def batch_constants(constants: dict, n_neurons: int) -> dict:
+    """Broadcasts the constants of the model to per-neuron arrays, so that a population
+    of n_neurons can be integrated at once with an (N, 4) state. Each entry may be a
+    scalar (shared by all neurons) or a sequence with one value per neuron.
+
+    Args:
+        constants (dict): the constants I, C, g_Na, g_K, g_L, E_Na, E_K and E_L of the model
+        n_neurons (int): number N of neurons in the population
+
+    Returns:
+        dict: the same constants, each one as a float array of shape (N,)
+    """
+    
+    batched = {}
+    for name, value in constants.items():
+        batched[name] = np.broadcast_to(np.asarray(value, dtype=float), (n_neurons,)).copy()
+    
+    return batched
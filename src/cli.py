@@ -0,0 +1,168 @@
+import argparse
+import json
+import time
+import numpy as np
+import result_cache
+import rk_sol
+import sweep
+import trajectory_store
+
+# configuration of a run: the fixed step methods run once per number of steps in n_values, the
+# adaptive ones once with rtol and atol; with an output pattern, each solution is saved to
+# output.format(method=..., n=...) (see FORMATS), otherwise only a summary is printed; with a
+# cache directory, the runs already computed are read from it (see result_cache)
+DEFAULT_CONFIG = {
+    'methods': ['rk'],
+    'n_values': [5000],
+    'rtol': 1e-6,
+    'atol': 1e-8,
+    'time_interval': [0., 30.],
+    'constants': {
+        'current': 0.,
+        'capacitance': 1.,
+        'g_Na': 120.,
+        'g_K': 36.,
+        'g_L': 0.3,
+        'E_Na': 115.,
+        'E_K':  -12.0,
+        'E_L':  10.613
+    },
+    'initial_y': [0., 0.05, 0.6, 0.06],
+    'stride': 1,
+    'output': None,
+    'format': 'store',
+    'n_workers': 1,
+    'cache': None,
+}
+
+ADAPTIVE_METHODS = {
+    'dopri': rk_sol.dopri_solution,
+}
+
+# 'store' writes a binary trajectory store (see trajectory_store), 'csv' a CSV file like the old
+# ones of main.py (the only path that imports pandas), 'both' writes the two
+FORMATS = ('store', 'csv', 'both')
+
+
+def load_config(path: str = None, **overrides) -> dict:
+    """Reads the configuration of a run: the defaults of DEFAULT_CONFIG, updated by the JSON file
+    at path and then by the overrides that are not None (the constants are updated one by one)
+
+    Args:
+        path (str): optional JSON file with some keys of DEFAULT_CONFIG
+        **overrides: values of keys of DEFAULT_CONFIG
+
+    Returns:
+        dict: the configuration
+    """
+
+    config = dict(DEFAULT_CONFIG, constants=dict(DEFAULT_CONFIG['constants']))
+    updates = {}
+    if path is not None:
+        with open(path) as file:
+            updates.update(json.load(file))
+    updates.update({key: value for key, value in overrides.items() if value is not None})
+
+    unknown = set(updates) - set(DEFAULT_CONFIG)
+    if unknown:
+        raise ValueError(f'unknown keys {sorted(unknown)} in the configuration, expected some of {sorted(DEFAULT_CONFIG)}')
+
+    config['constants'].update(updates.pop('constants', {}))
+    config.update(updates)
+
+    if isinstance(config['methods'], str):
+        config['methods'] = [config['methods']]
+    for method in config['methods']:
+        if method not in sweep.METHODS and method not in ADAPTIVE_METHODS:
+            raise ValueError(f'unknown method {method!r}, expected one of {sorted(sweep.METHODS) + sorted(ADAPTIVE_METHODS)}')
+    if config['format'] not in FORMATS:
+        raise ValueError(f'unknown format {config["format"]!r}, expected one of {FORMATS}')
+
+    return config
+
+
+def save(path: str, solution: np.array, output_format: str = 'store', **metadata):
+    """Saves a solution in the output format of a run (one of FORMATS)"""
+    trajectory_store.save_trajectory(path, solution, **metadata)
+    if output_format != 'store':
+        trajectory_store.export_csv(path, f'{path}.csv')
+
+
+def run(config: dict) -> dict:
+    """Runs every method of a configuration (see load_config), saving or summarizing each solution
+
+    Returns:
+        dict: the solutions, keyed by (method, n) (n is the number of accepted steps of the adaptive methods)
+    """
+
+    constants, time_interval = config['constants'], tuple(config['time_interval'])
+    initial_y = np.array(config['initial_y'], dtype=float)
+    solutions = {}
+
+    def solver(method):
+        return method if config['cache'] is None else result_cache.cached(method, result_cache.get_cache(config['cache']))
+
+    def finish(method, n_steps, solution, elapsed, **metadata):
+        solutions[method, n_steps] = solution
+        if config['output'] is not None:
+            save(config['output'].format(method=method, n=n_steps), solution, config['format'], method=method,
+                 n_steps=n_steps, constants=constants, initial_y=initial_y, **metadata)
+        print(f'{method} n = {n_steps}: y({solution[-1, 0]:g}) = {np.round(solution[-1, 1:], 6).tolist()} ({elapsed:.2f} s)')
+
+    fixed = [method for method in config['methods'] if method in sweep.METHODS]
+    jobs = sweep.grid(fixed, config['n_values'], constants, initial_y, time_interval)
+
+    if len(jobs) > 1 and config['n_workers'] != 1:
+        started = time.time()
+        sweep.run_sweep(jobs, config['n_workers'], config['stride'], progress=None, cache=config['cache'],
+                        on_result=lambda i, job, solution: finish(job.method, job.n_steps, solution, time.time() - started))
+    else:
+        # a single process avoids the start up of a pool, which dominates a small run
+        for job in jobs:
+            started = time.time()
+            solution = solver(sweep.METHODS[job.method])(time_interval, job.n_steps, initial_y, constants,
+                                                          stride=config['stride'])
+            finish(job.method, job.n_steps, solution, time.time() - started)
+
+    for method in config['methods']:
+        if method in ADAPTIVE_METHODS:
+            started = time.time()
+            solution = solver(ADAPTIVE_METHODS[method])(time_interval, initial_y, constants,
+                                                        rtol=config['rtol'], atol=config['atol'])
+            finish(method, len(solution) - 1, solution, time.time() - started, rtol=config['rtol'], atol=config['atol'])
+
+    return solutions
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description='Numerical solutions of the Hodgkin-Huxley equation')
+    parser.add_argument('config', nargs='?', help='JSON file with the configuration of the run (see DEFAULT_CONFIG)')
+    parser.add_argument('--method', nargs='+', dest='methods',
+                        choices=sorted(sweep.METHODS) + sorted(ADAPTIVE_METHODS), help='methods to run')
+    parser.add_argument('--n', nargs='+', type=int, dest='n_values', help='numbers of steps of the fixed step methods')
+    parser.add_argument('--rtol', type=float, help='relative tolerance of the adaptive methods')
+    parser.add_argument('--atol', type=float, help='absolute tolerance of the adaptive methods')
+    parser.add_argument('--t-max', type=float, help='end of the time interval, in ms')
+    parser.add_argument('--current', type=float, help='injected current')
+    parser.add_argument('--stride', type=int, help='stores one point every stride steps')
+    parser.add_argument('--output', help='path pattern of the outputs, with {method} and {n}')
+    parser.add_argument('--format', choices=FORMATS, help='format of the outputs')
+    parser.add_argument('--workers', type=int, dest='n_workers', help='worker processes of a sweep (0 for all the CPUs)')
+    parser.add_argument('--cache', help='directory of the cache of the results')
+    args = parser.parse_args(argv)
+
+    overrides = vars(args)
+    path, t_max, current = overrides.pop('config'), overrides.pop('t_max'), overrides.pop('current')
+    config = load_config(path, **overrides)
+    if t_max is not None:
+        config['time_interval'] = [config['time_interval'][0], t_max]
+    if current is not None:
+        config['constants']['current'] = current
+    if config['n_workers'] == 0:
+        config['n_workers'] = None
+
+    run(config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+import numpy as np
+import sweep
+
+COMPONENTS = ('V', 'm', 'h', 'n')
+
+
+def final_state(method: str, time_interval: (float, float), n_steps: int, initial_y: np.array,
+                constants: dict) -> np.array:
+    """Runs a solver of sweep.METHODS keeping only its final state: with stride = n_steps the
+    solution buffer has two rows (the initial and the final one), whatever the number of steps
+
+    Args:
+        method (str): name of the method (key of sweep.METHODS)
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        initial_y (np.array): the initial value of y, with shape (4,) or (N, 4)
+        constants (dict): the constants of the model
+
+    Returns:
+        np.array: the approximation of y(b) = [V, m, h, n], with shape (4,) or (N, 4)
+    """
+
+    solution = sweep.METHODS[method](time_interval, n_steps, initial_y, constants, stride=n_steps)
+
+    return solution[-1, ..., 1:]
+
+
+def observed_order(coarse: np.array, middle: np.array, fine: np.array, ratio: float = 2.) -> np.array:
+    """Observed order of convergence of each component from the final states of three nested grids
+    with n, ratio*n and ratio^2*n steps: p = log(|y_n - y_rn| / |y_rn - y_r^2n|) / log(ratio)
+
+    Returns:
+        np.array: the observed order of each component (nan where the differences vanish)
+    """
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(np.abs(coarse - middle)/np.abs(middle - fine))/np.log(ratio)
+
+
+def richardson(coarse: np.array, fine: np.array, order, ratio: float = 2.) -> np.array:
+    """Richardson extrapolation of the final states of two nested grids with n and ratio*n steps:
+    y = y_rn + (y_rn - y_n)/(ratio^p - 1), which cancels the leading error term of order p
+
+    Args:
+        coarse (np.array): final state with n steps
+        fine (np.array): final state with ratio*n steps
+        order (float or np.array): order p of the method, or the observed order of each component
+        ratio (float): refinement ratio of the grids
+
+    Returns:
+        np.array: the extrapolated final state
+    """
+
+    return fine + (fine - coarse)/(ratio**np.asarray(order, dtype=float) - 1.)
+
+
+def order_study(method: str, time_interval: (float, float), n_0: int, n_levels: int, initial_y: np.array,
+                constants: dict, ratio: int = 2) -> dict:
+    """Convergence study of a method on nested grids with n_0, ratio*n_0, ..., ratio^(n_levels-1)*n_0
+    steps. Only the final state of each run is kept, and the coarse runs together cost less than
+    the finest one (1/(ratio-1) of it), so no reference solution or stored trajectory is needed.
+
+    Args:
+        method (str): name of the method (key of sweep.METHODS)
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_0 (int): number of steps of the coarsest grid
+        n_levels (int): number of grids (at least 3 for the observed order)
+        initial_y (np.array): the initial value of y
+        constants (dict): the constants of the model
+        ratio (int): refinement ratio between consecutive grids
+
+    Returns:
+        dict: 'n_values' (n_levels,), 'final_states' (n_levels, 4), 'orders' (n_levels - 2, 4) the
+        observed order of V, m, h, n from each triple of consecutive grids, 'reference' (4,) the
+        Richardson extrapolation of the two finest grids with the last observed order, and
+        'errors' (n_levels, 4) the estimated error of each final state against the reference
+    """
+
+    if n_levels < 3:
+        raise ValueError(f'the observed order needs at least 3 grids, got n_levels = {n_levels}')
+
+    n_values = n_0*ratio**np.arange(n_levels)
+    final_states = np.array([final_state(method, time_interval, int(n), initial_y, constants) for n in n_values])
+
+    orders = observed_order(final_states[:-2], final_states[1:-1], final_states[2:], ratio)
+    reference = richardson(final_states[-2], final_states[-1], orders[-1], ratio)
+
+    return {
+        'n_values': n_values,
+        'final_states': final_states,
+        'orders': orders,
+        'reference': reference,
+        'errors': np.abs(final_states - reference),
+    }
+
+
+def order_table(study: dict):
+    """Table of an order study, one row per grid: n_steps, the final V, m, h, n, their estimated errors
+    and the observed orders (given on the finest grid of each triple, nan on the first two)
+
+    Returns:
+        pd.DataFrame: the table
+    """
+    import pandas as pd
+
+    n_levels = len(study['n_values'])
+    orders = np.full((n_levels, len(COMPONENTS)), np.nan)
+    orders[2:] = study['orders']
+
+    table = pd.DataFrame({'n_steps': study['n_values']})
+    for i, component in enumerate(COMPONENTS):
+        table[component] = study['final_states'][:, i]
+        table[f'error_{component}'] = study['errors'][:, i]
+        table[f'p_{component}'] = orders[:, i]
+
+    return table
@@ -0,0 +1,187 @@
+import numpy as np
+import trajectory_store
+
+COMPONENTS = ('V', 'm', 'h', 'n')
+MODES = ('minmax', 'lttb')
+
+
+def minmax_indices(t: np.array, y: np.array, width: int) -> np.array:
+    """Indices of the min/max envelope of a trace: the time axis is split in width buckets of the
+    same duration (one per pixel) and the smallest and the largest sample of each bucket are kept,
+    in their order, so every spike peak and every trough is drawn. It runs in O(n) with one
+    reduceat per reduction, also for unevenly spaced instants (e.g. of the adaptive solvers).
+    NaN samples are skipped, and a bucket with only NaNs keeps its first sample (twice).
+
+    Args:
+        t (np.array): the instants, increasing, with shape (n,)
+        y (np.array): the samples, with shape (n,) or (n, k) for k traces on the same instants
+        width (int): the number of buckets, e.g. the width of the plot in pixels
+
+    Returns:
+        np.array: the increasing indices of each trace, with shape (m,) or (m, k), m <= 2*width
+    """
+
+    y = np.asarray(y)
+    values = y.reshape(len(y), -1)
+    n_samples = len(t)
+
+    # the first sample of every bucket that is not empty
+    edges = np.linspace(t[0], t[-1], width + 1)
+    starts = np.unique(np.searchsorted(t, edges[:-1], side='left'))
+    starts = starts[starts < n_samples]
+    sizes = np.diff(np.append(starts, n_samples))
+    bucket = np.repeat(np.arange(len(starts)), sizes)
+
+    positions = np.arange(n_samples)[:, np.newaxis]
+    indices = []
+    for reduce in (np.fmin, np.fmax):
+        # fmin and fmax skip the NaNs (e.g. of a diverged trace), which give NaN only in a
+        # bucket without any number
+        extreme = reduce.reduceat(values, starts, axis=0)
+        # the first sample of each bucket equal to its extreme (n_samples elsewhere)
+        candidates = np.where(values == extreme[bucket], positions, n_samples)
+        first = np.minimum.reduceat(candidates, starts, axis=0)
+        # a bucket of NaNs keeps its first sample
+        indices.append(np.where(np.isnan(extreme), starts[:, np.newaxis], first))
+
+    indices = np.sort(np.concatenate(indices), axis=0)
+
+    return indices.reshape((-1,) + y.shape[1:])
+
+
+def lttb_indices(t: np.array, y: np.array, n_points: int) -> np.array:
+    """Indices of the largest triangle three buckets (LTTB) downsampling of a trace: the first and
+    the last samples are kept, the others are split in n_points - 2 buckets of the same number of
+    samples, and from each bucket the sample that makes the largest triangle with the one kept in
+    the previous bucket and the mean of the next one is kept. The shape of the trace and every
+    spike are kept with fewer points than the min/max envelope, though a peak may move to a
+    neighbouring sample.
+
+    The buckets are processed in order (each choice depends on the previous one), with the
+    samples of a bucket and the k traces handled at once, so the work is O(n).
+
+    Args:
+        t (np.array): the instants, increasing, with shape (n,)
+        y (np.array): the samples, with shape (n,) or (n, k) for k traces on the same instants
+        n_points (int): the number of samples kept
+
+    Returns:
+        np.array: the increasing indices of each trace, with shape (n_points,) or (n_points, k)
+    """
+
+    y = np.asarray(y)
+    values = y.reshape(len(y), -1)
+    n_samples, n_traces = values.shape
+    t = np.asarray(t, dtype=float)
+
+    if n_points >= n_samples or n_points < 3:
+        indices = np.broadcast_to(np.arange(n_samples)[:, np.newaxis], values.shape)
+        return indices.reshape((-1,) + y.shape[1:])
+
+    n_buckets = n_points - 2
+    edges = np.floor(np.linspace(1, n_samples - 1, n_buckets + 1)).astype(int)
+    sizes = np.diff(edges)
+
+    # the mean of each bucket, and the last sample after the last bucket
+    mean_t = np.append(np.add.reduceat(t[1:-1], edges[:-1] - 1)/sizes, t[-1])
+    mean_y = np.vstack((np.add.reduceat(values[1:-1], edges[:-1] - 1, axis=0)/sizes[:, np.newaxis], values[-1]))
+
+    # the samples of each bucket, padded to the largest bucket with its last sample
+    offsets = np.arange(sizes.max())
+    candidates = edges[:-1, np.newaxis] + np.minimum(offsets, sizes[:, np.newaxis] - 1)
+
+    indices = np.empty((n_points, n_traces), dtype=int)
+    indices[0], indices[-1] = 0, n_samples - 1
+    columns = np.arange(n_traces)
+
+    a_t, a_y = np.full(n_traces, t[0]), values[0].copy()
+    for i in range(n_buckets):
+        samples = candidates[i]
+        c_t, c_y = mean_t[i + 1], mean_y[i + 1]
+
+        area = np.abs((a_t - c_t)*(values[samples] - a_y) - (a_t - t[samples, np.newaxis])*(c_y - a_y))
+        best = samples[np.argmax(area, axis=0)]
+
+        indices[i + 1] = best
+        a_t, a_y = t[best], values[best, columns]
+
+    return indices.reshape((-1,) + y.shape[1:])
+
+
+def decimate(t: np.array, y: np.array, width: int = 1000, mode: str = 'minmax') -> (np.array, np.array):
+    """Downsamples traces for a plot width pixels wide, with the min/max envelope (2 samples per
+    pixel, see minmax_indices) or LTTB (2*width samples, see lttb_indices). Traces that already
+    have fewer samples are returned whole.
+
+    Args:
+        t (np.array): the instants, increasing, with shape (n,)
+        y (np.array): the samples, with shape (n,) or (n, k) for k traces on the same instants
+        width (int): the width of the plot, in pixels
+        mode (str): one of MODES
+
+    Returns:
+        (np.array, np.array): the instants and the samples kept, both with the shape (m,) or (m, k)
+        of the indices, so that plt.plot(t, y) draws the k traces
+    """
+
+    t, y = np.asarray(t), np.asarray(y)
+    if mode not in MODES:
+        raise ValueError(f'unknown mode {mode!r}, expected one of {MODES}')
+
+    if len(t) <= 2*width:
+        return np.broadcast_to(t.reshape((-1,) + (1,)*(y.ndim - 1)), y.shape), y
+
+    if mode == 'minmax':
+        indices = minmax_indices(t, y, width)
+    else:
+        indices = lttb_indices(t, y, 2*width)
+
+    return t[indices], np.take_along_axis(y, indices, axis=0)
+
+
+def decimate_solution(solution: np.array, width: int = 1000, mode: str = 'minmax',
+                      components: tuple = COMPONENTS) -> dict:
+    """Downsamples a solution of the solvers for a plot (see decimate)
+
+    Args:
+        solution (np.array): the rows [t_k, V_k, m_k, h_k, n_k], with shape (k, 5) or (k, N, 5)
+        width (int): the width of the plot, in pixels
+        mode (str): one of MODES
+        components (tuple): the components to downsample
+
+    Returns:
+        dict: the pair (t, y) of each component, with y of shape (m,) or (m, N) for a population
+    """
+
+    t = solution[:, 0] if solution.ndim == 2 else solution[:, 0, 0]
+
+    return {component: decimate(t, solution[..., 1 + COMPONENTS.index(component)], width, mode)
+            for component in components}
+
+
+def decimate_file(path: str, width: int = 1000, mode: str = 'minmax', components: tuple = COMPONENTS,
+                  t_start: float = -np.inf, t_stop: float = np.inf) -> dict:
+    """Downsamples a saved trajectory for a plot (see decimate): a trajectory store is mapped
+    into memory (only the columns and the time slice needed are read), a CSV file of main.py
+    (index, t, V, m, h, n) is read without pandas
+
+    Args:
+        path (str): directory of a trajectory store, or a .csv file
+        width (int): the width of the plot, in pixels
+        mode (str): one of MODES
+        components (tuple): the components to downsample
+        t_start (float): first instant of the slice
+        t_stop (float): last instant of the slice
+
+    Returns:
+        dict: the pair (t, y) of each component
+    """
+
+    if path.endswith('.csv'):
+        table = np.loadtxt(path, delimiter=',', skiprows=1, usecols=range(1, 6))
+        first, last = np.searchsorted(table[:, 0], t_start, side='left'), np.searchsorted(table[:, 0], t_stop, side='right')
+        columns = {column: table[first:last, i] for i, column in enumerate(trajectory_store.COLUMNS)}
+    else:
+        columns = trajectory_store.load_slice(path, t_start, t_stop, ('t',) + tuple(components))
+
+    return {component: decimate(columns['t'], columns[component], width, mode) for component in components}
@@ -93,4 +93,18 @@ def beta_n(voltage: float) -> float:
     V = voltage
     beta = 0.125*np.exp(-V/80)
     
-    return beta
\ No newline at end of file
+    return beta
+
+
+def rates(voltage: float) -> tuple:
+    """Computes all the transition rates of the Hodgkin-Huxley model at once
+
+    Args:
+        voltage (float): voltage V in the neuron
+
+    Returns:
+        tuple: the parameters (alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n) for the specified voltage
+    """
+    V = voltage
+    
+    return alpha_m(V), beta_m(V), alpha_h(V), beta_h(V), alpha_n(V), beta_n(V)
@@ -1,109 +1,123 @@
 import numpy as np
 
 def der_alpha_m(voltage: float) -> float:
-    """Computes the alpha_m parameter of the Hodgkin-Huxley model, given
-    by alpha_m = 0.1(V + 25)/(e^((V + 25)/10) - 1)
+    """Computes the derivative d(alpha_m)/dV of the alpha_m parameter of the Hodgkin-Huxley
+    model, alpha_m = 0.1(25 - V)/(e^((25 - V)/10) - 1)
 
     Args:
         voltage (float): voltage V in the neuron
 
     Returns:
-        float: the alpha_m parameter for the specified voltage 
+        float: the derivative of alpha_m for the specified voltage 
     """
     V = voltage
     
     # auxiliary variables
-    aux_1 = 0.1*(np.exp((V + 25)/10) - 1)
-    aux_2 = 0.01*(V+25)*np.exp((V + 25)/10)
-    aux_3 = (np.exp((V+25)/10) - 1)**2
+    aux_1 = 0.1*(np.exp((25 - V)/10) - 1)
+    aux_2 = 0.01*(25 - V)*np.exp((25 - V)/10)
+    aux_3 = (np.exp((25 - V)/10) - 1)**2
     
-    der_alpha = (aux_1- aux_2)/(aux_3)
+    der_alpha = -(aux_1 - aux_2)/(aux_3)
     
     return der_alpha
 
 
 def der_beta_m(voltage: float) -> float:
-    """Computes the beta_m parameter of the Hodgkin-Huxley model, given
-    by beta_m = 4e^(V/18)
+    """Computes the derivative d(beta_m)/dV of the beta_m parameter of the Hodgkin-Huxley
+    model, beta_m = 4e^(-V/18)
 
     Args:
         voltage (float): voltage V in the neuron
 
     Returns:
-        float: the beta_m parameter for the specified voltage 
+        float: the derivative of beta_m for the specified voltage 
     """
     V = voltage
-    der_beta = (4/18)*np.exp(-V/18.)
+    der_beta = -(4/18)*np.exp(-V/18.)
     
     return der_beta
 
 
 def der_alpha_h(voltage: float) -> float:
-    """Computes the alpha_h parameter of the Hodgkin-Huxley model, given
-    by alpha_h = 0.07e^(V/20)
+    """Computes the derivative d(alpha_h)/dV of the alpha_h parameter of the Hodgkin-Huxley
+    model, alpha_h = 0.07e^(-V/20)
 
     Args:
         voltage (float): voltage V in the neuron
 
     Returns:
-        float: the alpha_h parameter for the specified voltage 
+        float: the derivative of alpha_h for the specified voltage 
     """
     V = voltage
-    der_alpha = (0.07/20)*np.exp(-V/20.)
+    der_alpha = -(0.07/20)*np.exp(-V/20.)
     
     return der_alpha
 
 
 def der_beta_h(voltage: float) -> float:
-    """Computes the beta_h parameter of the Hodgkin-Huxley model, given
-    by beta_h = 1/(e^((V + 30)/10) + 1)
+    """Computes the derivative d(beta_h)/dV of the beta_h parameter of the Hodgkin-Huxley
+    model, beta_h = 1/(e^((30 - V)/10) + 1)
 
     Args:
         voltage (float): voltage V in the neuron
 
     Returns:
-        float: the beta_h parameter for the specified voltage 
+        float: the derivative of beta_h for the specified voltage 
     """
     V = voltage
     
-    aux_1 = -0.1*np.exp((V+30)/10)
-    aux_2 = (np.exp((V+30)/10) + 1)**2
+    aux_1 = -0.1*np.exp((30 - V)/10)
+    aux_2 = (np.exp((30 - V)/10) + 1)**2
     der_beta = -aux_1/aux_2
     
     return der_beta
 
 
 def der_alpha_n(voltage: float) -> float:
-    """Computes the alpha_n parameter of the Hodgkin-Huxley model, given
-    by alpha_n = 0.01(V + 10)/(e^((V + 10)/10) - 1)
+    """Computes the derivative d(alpha_n)/dV of the alpha_n parameter of the Hodgkin-Huxley
+    model, alpha_n = 0.01(10 - V)/(e^((10 - V)/10) - 1)
 
     Args:
         voltage (float): voltage V in the neuron
 
     Returns:
-        float: the alpha_n parameter for the specified voltage 
+        float: the derivative of alpha_n for the specified voltage 
     """
     V = voltage
-    aux_1 = 0.01*(np.exp((V + 10)/10) - 1)
-    aux_2 = 0.001*(V + 10)*np.exp((V+10)/10)
-    aux_3 = (np.exp((V+10)/10) - 1)**2
+    aux_1 = 0.01*(np.exp((10 - V)/10) - 1)
+    aux_2 = 0.001*(10 - V)*np.exp((10 - V)/10)
+    aux_3 = (np.exp((10 - V)/10) - 1)**2
     
-    der_alpha = (aux_1 - aux_2)/aux_3
+    der_alpha = -(aux_1 - aux_2)/aux_3
     
     return der_alpha
 
 
 def der_beta_n(voltage: float) -> float:
-    """Computes the beta_n parameter of the Hodgkin-Huxley model, given
-    by beta_n = 0.125e^(V/80)
+    """Computes the derivative d(beta_n)/dV of the beta_n parameter of the Hodgkin-Huxley
+    model, beta_n = 0.125e^(-V/80)
 
     Args:
         voltage (float): voltage V in the neuron
 
     Returns:
-        float: the beta_n parameter for the specified voltage 
+        float: the derivative of beta_n for the specified voltage 
     """
     V = voltage
     der_beta = -(0.125/80)*np.exp(-V/80)
     
-    return der_beta
\ No newline at end of file
+    return der_beta
+
+
+def rate_derivatives(voltage: float) -> tuple:
+    """Computes the derivatives d/dV of all the transition rates of the Hodgkin-Huxley model at once
+
+    Args:
+        voltage (float): voltage V in the neuron
+
+    Returns:
+        tuple: the derivatives of (alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n) for the specified voltage
+    """
+    V = voltage
+    
+    return der_alpha_m(V), der_beta_m(V), der_alpha_h(V), der_beta_h(V), der_alpha_n(V), der_beta_n(V)
@@ -1,48 +1,59 @@
+import functools
 import numpy as np
-import pandas as pd
 import eq_parameters
 import state_variables
 import cauchy_function
+import integrator
 
-def euler_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict):
+def euler_step(t_k: float, y_k: np.array, delta_t: float, constants: dict, rates=eq_parameters.rates) -> np.array:
+    """Advances y one step with Euler's method: y_{k+1} = y_k + f(t_k, y_k)*delta_t
+
+    Args:
+        t_k (float): instant of time t_k
+        y_k (np.array): the value of y in the instant t_k, with shape (4,) or (N, 4)
+        delta_t (float): step size
+        constants (dict): the constants of the model
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+
+    Returns:
+        np.array: the approximation y_{k+1} of y(t_k + delta_t)
+    """
+    
+    return y_k + cauchy_function.cauchy_function(t_k, y_k, constants, rates)*delta_t
+
+
+def euler_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                   stride: int = 1, out: np.array = None, rates=eq_parameters.rates, stats=None):
     """Computes a numerical solution for the y(t) = [V(t), m(t), h(t), n(t)], the solution of the
     Hodgkin-Huxley differential equation via Euler's method: y_{k+1} = y_k + f(t_k, y_k)*delta_t
 
     Args:
         time_interval ((float, float)): domain of the function (interval [a,b]) 
         n_steps (int): number of steps for discretize the domain
-        initial_y (np.array): the initial value of the vector y: y(0) = [V(0), m(0), h(0), n(0)]
-        constants: the constants g_Na, g_K, g_L, E_Na, E_K and E_L of the model
+        initial_y (np.array): the initial value of the vector y: y(0) = [V(0), m(0), h(0), n(0)],
+            or an (N, 4) array with the initial state of each neuron of a population
+        constants: the constants g_Na, g_K, g_L, E_Na, E_K and E_L of the model (scalars or
+            per-neuron (N,) arrays, see cauchy_function.batch_constants)
+        stride (int): stores one point every stride steps (1 stores all of them)
+        out (np.array): optional preallocated buffer for the solution (see integrator.allocate_solution)
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+        stats (instrumentation.SolverStats): optional stats filled with the evaluations of the
+            right-hand side, the steps and the time of each phase of the run
         
     Returns:
-        (np.array, np.array): tupla (X, Y), em que X = [t_0, t_1, t_2, ..., t_{n-1}] é 
-        o domínio discretizado e Y = [y_0, y_1, y_2, ..., y_{n-1}] é a solução aproximada
-        pelo método de euler(y_{k+1} = y_k + f(t_k, y_k)*delta_t)
+        np.array: array (n//stride + 1, 5) cujas linhas [t_k, V_k, m_k, h_k, n_k] são o domínio
+        discretizado e a solução aproximada pelo método de euler (y_{k+1} = y_k + f(t_k, y_k)*delta_t);
+        para uma população de N neurônios o array tem forma (n//stride + 1, N, 5)
     """
     
-    discretize_domain, delta_t = cauchy_function.discretize_interval(time_interval, n_steps)
-    
-    solution = []
-    
-    y_aprox = []
-    
-    # y_0 = y(0)
-    y_aprox.append(initial_y)
-    
-    # evaluates y_{k+1} with y_k and t_k
-    for k, t_k in enumerate(discretize_domain[:-1]):
-        y_k = y_aprox[k]
-        
-        #Explicit Euler
-        next_y = y_k + cauchy_function.cauchy_function(t_k, y_k, constants)*delta_t
-        y_aprox.append(next_y)
-    
-    # adds time stamps
-    for k, y_k in enumerate(y_aprox):
-        t_k = np.array([discretize_domain[k]])
-        time_stamped_sol = np.concatenate((t_k, y_k))
-        solution.append(time_stamped_sol)
-        
-    # solution = np.array(solution)
-    
+    if stats is not None:
+        stats.start('euler')
+        rates = stats.count_rates(rates)
+
+    step = functools.partial(euler_step, rates=rates)
+    solution = integrator.fixed_step_solution(step, time_interval, n_steps, initial_y, constants, stride, out, stats)
+
+    if stats is not None:
+        stats.end()
+
     return solution
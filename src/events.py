@@ -0,0 +1,179 @@
+import numpy as np
+import cauchy_function
+import eq_parameters
+import stimulus
+import streaming
+
+
+class Event:
+    """An event function g(t, y) whose zeros are detected during the integration. The crossing
+    time is refined by linear interpolation of g inside the step, and the state by linear
+    interpolation of y.
+
+    Args:
+        function (callable): g(t, y), a float for a single neuron or an (N,) array for a population
+        direction (int): 1 detects only increasing crossings, -1 only decreasing ones, 0 both
+        max_events (int): the integration stops once every neuron has this many events (None never stops)
+        name (str): key of the event in the results of detect_events
+    """
+
+    def __init__(self, function, direction: int = 0, max_events: int = None, name: str = 'event'):
+        self.function = function
+        self.direction = direction
+        self.max_events = max_events
+        self.name = name
+
+    def __call__(self, t: float, y: np.array) -> np.array:
+        return np.atleast_1d(self.function(t, y))
+
+    def crossings(self, g_old: np.array, g_new: np.array) -> np.array:
+        """Mask of the neurons whose g changes sign in the chosen direction during the step"""
+        increasing = (g_old < 0.) & (g_new >= 0.)
+        decreasing = (g_old > 0.) & (g_new <= 0.)
+
+        if self.direction > 0:
+            return increasing
+        if self.direction < 0:
+            return decreasing
+        return increasing | decreasing
+
+    def locate(self, t_old: float, y_old: np.array, g_old: np.array, t_new: float, y_new: np.array,
+               g_new: np.array) -> (np.array, np.array):
+        """Instants and states of the crossings of a step, for the neurons given by the rows of
+        y_old, y_new (shape (k, 4)) and g_old, g_new (shape (k,))
+
+        Returns:
+            (np.array, np.array): the crossing times (k,) and the states (k, 4) at them
+        """
+        theta = g_old/(g_old - g_new)
+
+        return t_old + theta*(t_new - t_old), y_old + theta[:, np.newaxis]*(y_new - y_old)
+
+
+class PeakEvent(Event):
+    """Maxima of V: the decreasing zeros of dV/dt, which is computed with the right-hand side of
+    the model (one extra evaluation per step). The peak voltage is refined with the cubic Hermite
+    interpolant of V in the step, which uses the values of dV/dt already computed.
+
+    Args:
+        constants (dict): the constants of the model
+        max_events (int): the integration stops once every neuron has this many peaks
+        name (str): key of the event in the results of detect_events
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+    """
+
+    def __init__(self, constants: dict, max_events: int = None, name: str = 'peak', rates=eq_parameters.rates):
+        def voltage_derivative(t, y):
+            return cauchy_function.cauchy_function(t, y, constants, rates)[..., 0]
+
+        super().__init__(voltage_derivative, -1, max_events, name)
+
+    def locate(self, t_old, y_old, g_old, t_new, y_new, g_new):
+        t, y = super().locate(t_old, y_old, g_old, t_new, y_new, g_new)
+
+        h = t_new - t_old
+        theta = (t - t_old)/h
+        # cubic Hermite basis functions of V in the step, with V' = g at both ends
+        h_00 = (1. + 2.*theta)*(1. - theta)**2
+        h_10 = theta*(1. - theta)**2
+        h_01 = theta**2*(3. - 2.*theta)
+        h_11 = theta**2*(theta - 1.)
+        y[:, 0] = h_00*y_old[:, 0] + h_10*h*g_old + h_01*y_new[:, 0] + h_11*h*g_new
+
+        return t, y
+
+
+def threshold_event(voltage: float = 50., direction: int = 1, max_events: int = None,
+                    name: str = 'threshold') -> Event:
+    """Crossings of a voltage threshold (upward crossings by default, i.e. spikes)
+
+    Args:
+        voltage (float): the threshold, in mV
+        direction (int): 1 for upward crossings, -1 for downward ones, 0 for both
+        max_events (int): the integration stops once every neuron has this many crossings
+        name (str): key of the event in the results of detect_events
+
+    Returns:
+        Event: the event V - voltage
+    """
+
+    return Event(lambda t, y: y[..., 0] - voltage, direction, max_events, name)
+
+
+def detect_events(step, time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                  events: list) -> (dict, float, np.array):
+    """Integrates the Hodgkin-Huxley equation with a fixed step method, keeping only the events
+    instead of the trajectory. The integration stops early once every event with max_events has
+    reached it for every neuron.
+
+    Args:
+        step (str or callable): a method of streaming.STEPS, or a one step method step(t_k, y_k, delta_t, constants)
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        initial_y (np.array): the initial value of y, with shape (4,) or (N, 4)
+        constants (dict): the constants of the model (the current may be a stimulus.Stimulus, see
+            stimulus.step_constants)
+        events (list): the events to detect (see Event, threshold_event and PeakEvent)
+
+    Returns:
+        (dict, float, np.array): for each event name, the arrays {'t': (k,), 'y': (k, 4), 'neuron': (k,)}
+        of its crossings sorted by time (neuron is the index of the neuron in a population, 0 for a
+        single neuron); then the instant where the integration stopped and the state in it
+    """
+
+    step = streaming.resolve_step(step)
+    discretize_domain, delta_t = cauchy_function.discretize_interval(time_interval, n_steps)
+
+    y_k = np.array(initial_y, dtype=float)
+    y_rows = y_k.reshape(-1, 4)
+    n_neurons = len(y_rows)
+
+    g_values = [event(discretize_domain[0], y_k) for event in events]
+    counts = [np.zeros(n_neurons, dtype=int) for _ in events]
+    found = [{'t': [], 'y': [], 'neuron': []} for _ in events]
+    terminal = [event.max_events is not None for event in events]
+
+    # each step gets its own current, like in integrator.fixed_step_solution
+    step_constants = stimulus.step_constants(constants, discretize_domain)
+
+    t_k = discretize_domain[0]
+    for k, constants_k in zip(range(n_steps), step_constants):
+        t_next = discretize_domain[k + 1]
+        y_next = step(t_k, y_k, delta_t, constants_k)
+        next_rows = y_next.reshape(-1, 4)
+
+        stop = any(terminal)
+        for i, event in enumerate(events):
+            g_next = event(t_next, y_next)
+            crossing = event.crossings(g_values[i], g_next)
+
+            if event.max_events is not None:
+                crossing &= counts[i] < event.max_events
+
+            if crossing.any():
+                neurons = np.flatnonzero(crossing)
+                t, y = event.locate(t_k, y_rows[neurons], g_values[i][neurons],
+                                    t_next, next_rows[neurons], g_next[neurons])
+                found[i]['t'].append(t)
+                found[i]['y'].append(y)
+                found[i]['neuron'].append(neurons)
+                counts[i][neurons] += 1
+
+            if event.max_events is not None:
+                stop &= bool(np.all(counts[i] >= event.max_events))
+            g_values[i] = g_next
+
+        t_k, y_k, y_rows = t_next, y_next, next_rows
+        if stop:
+            break
+
+    results = {}
+    for event, crossings in zip(events, found):
+        if crossings['t']:
+            t, y, neuron = (np.concatenate(crossings[key]) for key in ('t', 'y', 'neuron'))
+            order = np.argsort(t, kind='stable')
+            results[event.name] = {'t': t[order], 'y': y[order], 'neuron': neuron[order]}
+        else:
+            results[event.name] = {'t': np.empty(0), 'y': np.empty((0, 4)), 'neuron': np.empty(0, dtype=int)}
+
+    return results, t_k, y_k
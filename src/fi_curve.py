@@ -0,0 +1,182 @@
+import itertools
+import numpy as np
+import cauchy_function
+import steady_state
+import streaming
+
+CLASSES = ('rest', 'transient', 'periodic', 'unconverged')
+
+# the entries of the result of fi_scan besides the scanned parameter
+RESULT_KEYS = ('current', 'rate', 'latency', 'n_spikes', 'classification', 't_stop')
+
+
+def fi_scan(currents: np.array, constants: dict, parameter: str = None, values: np.array = None,
+            t_max: float = 500., delta_t: float = 0.025, step='rush_larsen2', initial_y: np.array = None,
+            threshold: float = 50., n_intervals: int = 5, rtol: float = 1e-3, quiet_time: float = 50.,
+            steady_tol: float = 1e-3, check_every: float = 1.) -> dict:
+    """f-I curve (and two parameter scan) of the model: every current of currents (times every
+    value of the parameter) is integrated at once as a population, each member starting from its
+    resting state without current (see steady_state), as if the current was switched on at t = 0.
+    Every check_every ms each member is classified, and the decided ones leave the batch:
+
+        periodic: its last n_intervals interspike intervals agree within rtol (a periodic orbit)
+        rest: no spike, and quiet for quiet_time ms with |y'| < steady_tol (a steady state)
+        transient: some spikes, then a steady state
+        unconverged: undecided at t_max
+
+    Args:
+        currents (np.array): the injected currents
+        constants (dict): the other constants of the model
+        parameter (str): optional second parameter scanned (a key of constants, e.g. 'g_K')
+        values (np.array): the values of the second parameter
+        t_max (float): longest integration, in ms
+        delta_t (float): step size
+        step (str or callable): a method of streaming.STEPS, or a one step method step(t_k, y_k, delta_t, constants)
+        initial_y (np.array): initial state of every member, instead of the resting states
+        threshold (float): voltage of a spike, in mV
+        n_intervals (int): number of interspike intervals that must agree
+        rtol (float): relative spread allowed between those intervals
+        quiet_time (float): time without spikes before a steady state is accepted, in ms
+        steady_tol (float): largest |y'| of a steady state
+        check_every (float): time between two classifications, in ms
+
+    Returns:
+        dict: arrays with one entry per member: 'current', the parameter (if any), 'rate' (Hz, from
+        the last intervals), 'latency' (first spike time, nan without spikes), 'n_spikes',
+        'classification' (one of CLASSES) and 't_stop' (when it left the batch)
+    """
+
+    if parameter is None:
+        grid = np.asarray(currents, dtype=float)[:, np.newaxis]
+    else:
+        grid = np.array(list(itertools.product(currents, values)), dtype=float)
+    n_members = len(grid)
+
+    batch = cauchy_function.batch_constants(constants, n_members)
+    batch['current'] = grid[:, 0]
+    if parameter is not None:
+        batch[parameter] = grid[:, 1]
+
+    if initial_y is None:
+        initial_y, _ = steady_state.steady_state(dict(batch, current=0.))
+    y = np.broadcast_to(np.asarray(initial_y, dtype=float), (n_members, 4)).copy()
+    step = streaming.resolve_step(step)
+
+    # results of every member, and the state of the members still in the batch
+    rate, latency, t_stop = np.zeros(n_members), np.full(n_members, np.nan), np.full(n_members, t_max)
+    n_spikes, classification = np.zeros(n_members, dtype=int), np.full(n_members, CLASSES.index('unconverged'))
+
+    active = np.arange(n_members)
+    recent = np.full((n_members, n_intervals + 1), np.nan)  # last spike times, a ring buffer per member
+    last_spike = np.zeros(n_members)
+
+    n_steps = int(round(t_max/delta_t))
+    check = max(1, int(round(check_every/delta_t)))
+
+    for k in range(n_steps):
+        t = k*delta_t
+        next_y = step(t, y, delta_t, batch)
+
+        crossing = (y[:, 0] < threshold) & (next_y[:, 0] >= threshold)
+        if crossing.any():
+            members = np.flatnonzero(crossing)
+            V_0, V_1 = y[members, 0], next_y[members, 0]
+            times = t + (threshold - V_0)/(V_1 - V_0)*delta_t
+
+            global_members = active[members]
+            latency[global_members] = np.where(n_spikes[global_members] == 0, times, latency[global_members])
+            recent[members, n_spikes[global_members] % (n_intervals + 1)] = times
+            n_spikes[global_members] += 1
+            last_spike[members] = times
+
+        y = next_y
+
+        if (k + 1) % check != 0:
+            continue
+
+        t = (k + 1)*delta_t
+        counts = n_spikes[active]
+
+        intervals = np.diff(np.sort(recent, axis=1), axis=1)
+        mean_interval = intervals.mean(axis=1)
+        with np.errstate(invalid='ignore'):
+            periodic = (counts > n_intervals) & (np.ptp(intervals, axis=1) <= rtol*mean_interval)
+
+        quiet = t - last_spike >= quiet_time
+        if quiet.any():
+            derivative = cauchy_function.cauchy_function(t, y, batch)
+            quiet &= np.max(np.abs(derivative), axis=1) < steady_tol
+
+        done = periodic | quiet
+        if not done.any():
+            continue
+
+        finished = active[done]
+        rate[finished] = np.where(periodic[done], 1000./mean_interval[done], 0.)
+        classification[finished] = np.where(periodic[done], CLASSES.index('periodic'),
+                                            np.where(counts[done] > 0, CLASSES.index('transient'), CLASSES.index('rest')))
+        t_stop[finished] = t
+
+        # the decided members leave the batch
+        keep = ~done
+        active, y, recent, last_spike = active[keep], y[keep], recent[keep], last_spike[keep]
+        batch = {name: value[keep] for name, value in batch.items()}
+        if len(active) == 0:
+            break
+
+    # the undecided members get the rate of the intervals they have
+    counts = n_spikes[active]
+    intervals = np.diff(np.sort(recent, axis=1), axis=1)
+    with np.errstate(invalid='ignore'):
+        mean_interval = np.nanmean(np.where(np.isfinite(intervals), intervals, np.nan), axis=1) \
+            if intervals.size else np.full(len(active), np.nan)
+    rate[active] = np.where(counts > 1, 1000./mean_interval, 0.)
+
+    result = {'current': grid[:, 0]}
+    if parameter is not None:
+        result[parameter] = grid[:, 1]
+    result.update({
+        'rate': rate,
+        'latency': latency,
+        'n_spikes': n_spikes,
+        'classification': np.array(CLASSES)[classification],
+        't_stop': t_stop,
+    })
+
+    return result
+
+
+def rheobase(result: dict):
+    """The smallest current of a scan with periodic firing (nan if none); for a two parameter
+    scan, the rheobase of each value of the second parameter
+
+    Args:
+        result (dict): the result of fi_scan
+
+    Returns:
+        float or (np.array, np.array): the rheobase, or the sorted values of the second parameter
+        and the rheobase of each one
+    """
+
+    periodic = result['classification'] == 'periodic'
+    parameters = [name for name in result if name not in RESULT_KEYS]
+    if not parameters:
+        return result['current'][periodic].min() if periodic.any() else np.nan
+
+    settings = result[parameters[0]]
+    values = np.unique(settings)
+    rheobases = np.array([result['current'][periodic & (settings == value)].min()
+                          if (periodic & (settings == value)).any() else np.nan for value in values])
+
+    return values, rheobases
+
+
+def scan_table(result: dict):
+    """The result of fi_scan as a table, one row per member
+
+    Returns:
+        pd.DataFrame: the table
+    """
+    import pandas as pd
+
+    return pd.DataFrame(result)
@@ -0,0 +1,258 @@
+import math
+import typing
+import numpy as np
+import integrator
+import stimulus
+
+# e^((25 - V)/10), e^((10 - V)/10) and e^((30 - V)/10) of alpha_m, alpha_n and beta_h all come from e^(-V/10)
+EXP_25, EXP_10, EXP_30 = math.exp(2.5), math.exp(1.), math.exp(3.)
+
+
+class Parameters(typing.NamedTuple):
+    """The constants of the model resolved once per run, in the order the fused kernel unpacks
+    them. Each one is a float, or a read-only (N,) array for a population of N neurons."""
+    current: float
+    capacitance: float
+    g_Na: float
+    g_K: float
+    g_L: float
+    E_Na: float
+    E_K: float
+    E_L: float
+
+
+def pack_constants(constants: dict) -> Parameters:
+    """Packs the dictionary of constants of the model into the immutable Parameters of the
+    fused kernel, so that the 8 dictionary lookups happen once per run instead of once per call
+    (a stimulus.Stimulus current is kept as it is, and the solver gives each step its current)
+
+    Args:
+        constants (dict): the constants I, C, g_Na, g_K, g_L, E_Na, E_K and E_L of the model
+
+    Returns:
+        Parameters: the packed constants
+    """
+
+    values = []
+    for name in Parameters._fields:
+        value = constants[name]
+        if isinstance(value, stimulus.Stimulus):
+            pass
+        elif np.ndim(value) == 0:
+            value = float(value)
+        else:
+            value = np.array(value, dtype=float)
+            value.setflags(write=False)
+        values.append(value)
+
+    return Parameters(*values)
+
+
+def allocate_scratch(shape: tuple) -> (np.array, np.array):
+    """Allocates the scratch buffers of the batched fused kernel for states of the given shape,
+    so that a run allocates them once instead of in every call
+
+    Args:
+        shape (tuple): the shape of the states, (4,) or (N, 4)
+
+    Returns:
+        (np.array, np.array): four float rows and a boolean row with the shape of V
+    """
+
+    return np.empty((4,) + tuple(shape[:-1])), np.empty(tuple(shape[:-1]), dtype=bool)
+
+
+def fused_cauchy_function(t: float, y: np.array, parameters: Parameters, out: np.array = None,
+                          scratch: tuple = None) -> np.array:
+    """The same derivative y'(t) = [V'(t), m'(t), h'(t), n'(t)] of cauchy_function.cauchy_function,
+    computed in one function: the constants come already unpacked, the six rates share three
+    exponentials (e^(-V/10), e^(-V/80) = e^(-V/20)^(1/4) and e^(-V/18)) and the result is written
+    into the caller's buffer. A single neuron is computed with Python floats and math.exp; a
+    population is computed with ufuncs writing into the scratch buffers, so with out and scratch
+    given a call allocates no array.
+
+    Args:
+        t (float): instante of time t
+        y (np.array): function y in the instant t, with shape (4,) or (N, 4)
+        parameters (Parameters): the packed constants of the model (see pack_constants)
+        out (np.array): buffer with the shape of y where the derivative is written (allocated if None);
+            it must not overlap y
+        scratch ((np.array, np.array)): buffers of the batched path (see allocate_scratch,
+            allocated if None)
+
+    Returns:
+        np.array: the derivative of y'(t) = [V'(t), m'(t), h'(t), n'(t)] in the instante t (out)
+    """
+
+    if out is None:
+        out = np.empty(np.shape(y))
+
+    I, C, g_Na, g_K, g_L, E_Na, E_K, E_L = parameters
+    I = stimulus.evaluate(I, t)
+
+    if np.ndim(y) == 1 and np.ndim(I) == 0:
+        V, m, h, n = y.tolist()
+
+        e_10 = math.exp(-V/10.)
+        e_80 = math.exp(-V/80.)
+        e_20 = e_80*e_80
+        e_20 *= e_20
+
+        # alpha_m and alpha_n are 0/0 at V = 25 and V = 10, where their limits are 1 and 0.1
+        u_m, u_n = 25. - V, 10. - V
+        alpha_m = 0.1*u_m/(EXP_25*e_10 - 1.) if u_m != 0. else 1.
+        beta_m = 4.*math.exp(-V/18.)
+        alpha_h = 0.07*e_20
+        beta_h = 1./(EXP_30*e_10 + 1.)
+        alpha_n = 0.01*u_n/(EXP_10*e_10 - 1.) if u_n != 0. else 0.1
+        beta_n = 0.125*e_80
+
+        m_3h = m*m*m*h
+        n_4 = n*n
+        n_4 *= n_4
+
+        out[0] = (I - g_Na*m_3h*(V - E_Na) - g_K*n_4*(V - E_K) - g_L*(V - E_L))/C
+        out[1] = alpha_m*(1. - m) - beta_m*m
+        out[2] = alpha_h*(1. - h) - beta_h*h
+        out[3] = alpha_n*(1. - n) - beta_n*n
+
+        return out
+
+    if scratch is None:
+        scratch = allocate_scratch(np.shape(y))
+    rows, singular = scratch
+    # [i, ...] keeps 0-d views for a single neuron with a per-step array current
+    e_10, e_80, a, b = (rows[i, ...] for i in range(4))
+    V, m, h, n = y[..., 0], y[..., 1], y[..., 2], y[..., 3]
+
+    np.divide(V, -10., out=e_10)
+    np.exp(e_10, out=e_10)
+    np.divide(V, -80., out=e_80)
+    np.exp(e_80, out=e_80)
+
+    # n' = alpha_n*(1 - n) - beta_n*n, with alpha_n = 0.1 at its 0/0 in V = 10
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.multiply(e_10, EXP_10, out=a)
+        np.subtract(a, 1., out=a)
+        np.subtract(10., V, out=b)
+        np.multiply(b, 0.01, out=b)
+        np.divide(b, a, out=a)
+    np.equal(V, 10., out=singular)
+    np.copyto(a, 0.1, where=singular)
+    np.subtract(1., n, out=b)
+    np.multiply(a, b, out=a)
+    np.multiply(e_80, 0.125, out=b)
+    np.multiply(b, n, out=b)
+    np.subtract(a, b, out=out[..., 3])
+
+    # m' = alpha_m*(1 - m) - beta_m*m, with alpha_m = 1 at its 0/0 in V = 25
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.multiply(e_10, EXP_25, out=a)
+        np.subtract(a, 1., out=a)
+        np.subtract(25., V, out=b)
+        np.multiply(b, 0.1, out=b)
+        np.divide(b, a, out=a)
+    np.equal(V, 25., out=singular)
+    np.copyto(a, 1., where=singular)
+    np.subtract(1., m, out=b)
+    np.multiply(a, b, out=a)
+    np.divide(V, -18., out=b)
+    np.exp(b, out=b)
+    np.multiply(b, 4., out=b)
+    np.multiply(b, m, out=b)
+    np.subtract(a, b, out=out[..., 1])
+
+    # h' = alpha_h*(1 - h) - beta_h*h
+    np.square(e_80, out=a)
+    np.square(a, out=a)
+    np.multiply(a, 0.07, out=a)
+    np.subtract(1., h, out=b)
+    np.multiply(a, b, out=a)
+    np.multiply(e_10, EXP_30, out=b)
+    np.add(b, 1., out=b)
+    np.divide(h, b, out=b)
+    np.subtract(a, b, out=out[..., 2])
+
+    # V' = (I - g_Na*m^3*h*(V - E_Na) - g_K*n^4*(V - E_K) - g_L*(V - E_L))/C, reusing e_10 and e_80
+    np.multiply(m, m, out=a)
+    np.multiply(a, m, out=a)
+    np.multiply(a, h, out=a)
+    np.multiply(a, g_Na, out=a)
+    np.subtract(V, E_Na, out=b)
+    np.multiply(a, b, out=a)
+    np.square(n, out=b)
+    np.square(b, out=b)
+    np.multiply(b, g_K, out=b)
+    np.subtract(V, E_K, out=e_10)
+    np.multiply(b, e_10, out=b)
+    np.add(a, b, out=a)
+    np.subtract(V, E_L, out=e_80)
+    np.multiply(e_80, g_L, out=e_80)
+    np.add(a, e_80, out=a)
+    np.subtract(I, a, out=a)
+    np.divide(a, C, out=out[..., 0])
+
+    return out
+
+
+def fused_rk_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                      stride: int = 1, out: np.array = None, stats=None):
+    """Computes the same solution of rk_sol.rk_solution (classic Runge-Kutta's method) with the fused
+    kernel: the constants are packed once, and the four stages, the scratch of the kernel and the
+    new state are written into buffers allocated once per run, so the steps of a population
+    allocate no array (the step returns one of two state buffers, used alternately).
+
+    Args:
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        initial_y (np.array): the initial value of the vector y, with shape (4,) or (N, 4)
+        constants (dict): the constants of the model (scalars or per-neuron (N,) arrays)
+        stride (int): stores one point every stride steps (1 stores all of them)
+        out (np.array): optional preallocated buffer for the solution (see integrator.allocate_solution)
+        stats (instrumentation.SolverStats): optional stats filled with the evaluations of the
+            right-hand side and the time of each phase
+
+    Returns:
+        np.array: array (n//stride + 1, 5) cujas linhas [t_k, V_k, m_k, h_k, n_k] são o domínio
+        discretizado e a solução aproximada pelo método de Runge-Kutta (ou (n//stride + 1, N, 5))
+    """
+
+    if stats is not None:
+        stats.start('fused_rk')
+
+    parameters = pack_constants(constants)
+    shape = np.shape(initial_y)
+    k1, k2, k3, k4, stage = (np.empty(shape) for _ in range(5))
+    states = (np.empty(shape), np.empty(shape))
+    scratch = allocate_scratch(shape)
+
+    def step(t_k, y_k, delta_t, parameters):
+        fused_cauchy_function(t_k, y_k, parameters, k1, scratch)
+        np.multiply(k1, delta_t*0.5, out=stage)
+        np.add(stage, y_k, out=stage)
+        fused_cauchy_function(t_k + delta_t*0.5, stage, parameters, k2, scratch)
+        np.multiply(k2, delta_t*0.5, out=stage)
+        np.add(stage, y_k, out=stage)
+        fused_cauchy_function(t_k + delta_t*0.5, stage, parameters, k3, scratch)
+        np.multiply(k3, delta_t, out=stage)
+        np.add(stage, y_k, out=stage)
+        fused_cauchy_function(t_k + delta_t, stage, parameters, k4, scratch)
+
+        # y_{k+1} = y_k + delta_t*(k1 + 2*k2 + 2*k3 + k4)/6, in the state buffer that is not y_k
+        y_next = states[0] if y_k is not states[0] else states[1]
+        np.add(k2, k3, out=stage)
+        np.multiply(stage, 2., out=stage)
+        np.add(stage, k1, out=stage)
+        np.add(stage, k4, out=stage)
+        np.multiply(stage, delta_t/6., out=stage)
+        np.add(y_k, stage, out=y_next)
+
+        return y_next
+
+    solution = integrator.fixed_step_solution(step, time_interval, n_steps, initial_y, parameters, stride, out, stats)
+
+    if stats is not None:
+        stats.n_rhs += 4*n_steps
+        stats.end()
+
+    return solution
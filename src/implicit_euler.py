@@ -1,48 +1,170 @@
 import numpy as np
-import pandas as pd
 import eq_parameters
+import eq_parameters_derivatives
 import state_variables
 import cauchy_function
+import integrator
 
-def implicit_euler_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict):
+class ImplicitEulerStep:
+    """One step of Euler's implicit method, y_{k+1} = y_k + f(t_{k+1}, y_{k+1})*delta_t, solved
+    by Newton's method on G(z) = z - y_k - f(t_{k+1}, z)*delta_t.
+
+    The Newton matrix I - delta_t*J, with J the analytic Jacobian of cauchy_function.jacobian,
+    is kept (as its inverse) from one step to the next and is only rebuilt when the Newton
+    iterations stop contracting fast enough or fail to converge (simplified Newton).
+
+    The step keeps running counts of the steps solved and of their Newton's iterations (total and
+    largest), so it runs in constant memory however long it is streamed; the iterations of each
+    step are only kept with record_iterations.
+
+    Args:
+        tol (float): tolerance of the Newton's iterations, in the norm max|dz|/(1 + |z|)
+        max_iterations (int): maximum number of iterations with the same Newton matrix
+        contraction (float): the matrix is rebuilt when |dz_{i+1}|/|dz_i| exceeds this value
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+        rate_derivatives (callable): backend of the derivatives of the transition rates
+        record_iterations (bool): keeps the number of iterations of each step in the list iterations
+    """
+
+    def __init__(self, tol: float = 1e-10, max_iterations: int = 10, contraction: float = 0.5,
+                 rates=eq_parameters.rates, rate_derivatives=eq_parameters_derivatives.rate_derivatives,
+                 record_iterations: bool = False):
+        self.tol = tol
+        self.max_iterations = max_iterations
+        self.contraction = contraction
+        self.rates = rates
+        self.rate_derivatives = rate_derivatives
+        self.n_steps = 0
+        self.n_iterations = 0
+        self.largest_iterations = 0
+        self.iterations = [] if record_iterations else None
+        self.jacobian_updates = 0
+        self._inverse = None
+        self._delta_t = None
+        self._increment = None
+
+    def _update_matrix(self, t: float, z: np.array, delta_t: float, constants: dict):
+        J = cauchy_function.jacobian(t, z, constants, self.rates, self.rate_derivatives)
+        self._inverse = np.linalg.inv(np.eye(4) - delta_t*J)
+        self._delta_t = delta_t
+        self.jacobian_updates += 1
+
+    def _newton(self, t_next: float, y_k: np.array, z: np.array, delta_t: float, constants: dict,
+                contraction: float):
+        """Runs the Newton's iterations with the current matrix, starting from the guess z, and
+        gives up as soon as |dz_{i+1}|/|dz_i| exceeds the given contraction.
+
+        Returns:
+            (np.array, int, bool): the last iterate, the number of iterations and whether the
+            iterations converged while contracting fast enough to keep the matrix
+        """
+        previous_norm = None
+
+        for i in range(1, self.max_iterations + 1):
+            G = z - y_k - cauchy_function.cauchy_function(t_next, z, constants, self.rates)*delta_t
+            dz = -np.einsum('...ij,...j->...i', self._inverse, G)
+            z = z + dz
+
+            norm = np.max(np.abs(dz)/(1. + np.abs(z)))
+            if not np.isfinite(norm):
+                return z, i, False
+            if norm < self.tol:
+                return z, i, True
+            if previous_norm is not None:
+                theta = norm/previous_norm
+                if theta > contraction:
+                    return z, i, False
+                # the remaining error of a contraction is bounded by theta/(1 - theta)*|dz|
+                if theta/(1. - theta)*norm < self.tol:
+                    return z, i, True
+            previous_norm = norm
+
+        return z, self.max_iterations, False
+
+    def __call__(self, t_k: float, y_k: np.array, delta_t: float, constants: dict) -> np.array:
+        t_next = t_k + delta_t
+
+        if self._inverse is None or self._delta_t != delta_t:
+            self._update_matrix(t_next, y_k, delta_t, constants)
+
+        # the increment of the previous step extrapolates the initial guess of the iterations
+        guess = y_k if self._increment is None else y_k + self._increment
+        z, iterations, converged = self._newton(t_next, y_k, guess, delta_t, constants, self.contraction)
+
+        if not converged:
+            # the old matrix degraded: rebuild it on the last iterate (or on y_k if the
+            # iterations diverged) and solve the step again from y_k, now only giving up
+            # if the iterations stop contracting at all
+            restart = z if np.all(np.isfinite(z)) else y_k
+            self._update_matrix(t_next, restart, delta_t, constants)
+            z, more_iterations, converged = self._newton(t_next, y_k, y_k.copy(), delta_t, constants, 1.)
+            iterations += more_iterations
+
+            if not converged:
+                raise RuntimeError(f"Newton's method did not converge in the step t = {t_k} -> {t_next}, "
+                                   "try a smaller step size (more steps)")
+
+        self.n_steps += 1
+        self.n_iterations += iterations
+        self.largest_iterations = max(self.largest_iterations, iterations)
+        if self.iterations is not None:
+            self.iterations.append(iterations)
+        self._increment = z - y_k
+
+        return z
+
+
+def implicit_euler_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                            stride: int = 1, out: np.array = None, tol: float = 1e-10, max_iterations: int = 10,
+                            return_iterations: bool = False, rates=eq_parameters.rates,
+                            rate_derivatives=eq_parameters_derivatives.rate_derivatives, stats=None):
     """Computes a numerical solution for the y(t) = [V(t), m(t), h(t), n(t)], the solution of the
     Hodgkin-Huxley differential equation via Euler's implicit method: y_{k+1} = y_k + f(t_{K+1}, y_{k+1})*delta_t
 
+    Each step is solved with Newton's method using the analytic Jacobian of the model, which is
+    reused between steps while the iterations keep converging (see ImplicitEulerStep).
+
     Args:
-        time_interval ((float, float)): domain of the function (interval [a,b]) 
+        time_interval ((float, float)): domain of the function (interval [a,b])
         n_steps (int): number of steps for discretize the domain
-        initial_y (np.array): the initial value of the vector y: y(0) = [V(0), m(0), h(0), n(0)]
-        constants: the constants g_Na, g_K, g_L, E_Na, E_K and E_L of the model
-        
+        initial_y (np.array): the initial value of the vector y: y(0) = [V(0), m(0), h(0), n(0)],
+            or an (N, 4) array with the initial state of each neuron of a population
+        constants: the constants g_Na, g_K, g_L, E_Na, E_K and E_L of the model (scalars or
+            per-neuron (N,) arrays, see cauchy_function.batch_constants)
+        stride (int): stores one point every stride steps (1 stores all of them)
+        out (np.array): optional preallocated buffer for the solution (see integrator.allocate_solution)
+        tol (float): tolerance of the Newton's iterations
+        max_iterations (int): maximum number of Newton's iterations with the same Jacobian
+        return_iterations (bool): also returns the number of Newton's iterations of each step
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+        rate_derivatives (callable): backend of the derivatives of the transition rates
+        stats (instrumentation.SolverStats): optional stats filled with the evaluations of the
+            right-hand side, the Newton's iterations, the Jacobians and the time of each phase
+
     Returns:
-        (np.array, np.array): tupla (X, Y), em que X = [t_0, t_1, t_2, ..., t_{n-1}] é 
-        o domínio discretizado e Y = [y_0, y_1, y_2, ..., y_{n-1}] é a solução aproximada
-        pelo método de euler(y_{k+1} = y_k + f(t_k, y_k)*delta_t)
+        np.array: array (n//stride + 1, 5) cujas linhas [t_k, V_k, m_k, h_k, n_k] são o domínio
+        discretizado e a solução aproximada pelo método de euler implícito; para uma população de
+        N neurônios o array tem forma (n//stride + 1, N, 5). Com return_iterations, retorna a tupla
+        (solução, iterações), em que iterações é o array com o número de iterações de Newton de cada passo
     """
-    
-    discretize_domain, delta_t = cauchy_function.discretize_interval(time_interval, n_steps)
-    
-    solution = []
-    
-    y_aprox = []
-    
-    # y_0 = y(0)
-    y_aprox.append(initial_y)
-    
-    # evaluates y_{k+1} with y_k and t_k
-    for k, t_k in enumerate(discretize_domain[:-1]):
-        y_k = y_aprox[k]
-        
-        #Explicit Euler
-        next_y = y_k + cauchy_function.cauchy_function(t_k, y_k, constants)*delta_t
-        y_aprox.append(next_y)
-    
-    # adds time stamps
-    for k, y_k in enumerate(y_aprox):
-        t_k = np.array([discretize_domain[k]])
-        time_stamped_sol = np.concatenate((t_k, y_k))
-        solution.append(time_stamped_sol)
-        
-    # solution = np.array(solution)
-    
-    return solution
\ No newline at end of file
+
+    if stats is not None:
+        stats.start('implicit_euler')
+        # the rates are evaluated by each Newton's iteration and by each Jacobian
+        rates = stats.count_rates(rates)
+
+    step = ImplicitEulerStep(tol, max_iterations, rates=rates, rate_derivatives=rate_derivatives,
+                             record_iterations=return_iterations)
+    try:
+        solution = integrator.fixed_step_solution(step, time_interval, n_steps, initial_y, constants, stride, out, stats)
+    finally:
+        # also when Newton's method fails, so that the hooks get the 'end' event
+        if stats is not None:
+            stats.n_newton_iterations += step.n_iterations
+            stats.n_jacobians += step.jacobian_updates
+            stats.end()
+
+    if return_iterations:
+        return solution, np.array(step.iterations)
+
+    return solution
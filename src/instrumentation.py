@@ -0,0 +1,79 @@
+import contextlib
+import functools
+import time
+
+PHASES = ('integrate', 'store', 'serialize')
+
+
+class SolverStats:
+    """Counters and phase timers of a solver run. A solver given a SolverStats (stats=...) fills it
+    in place; without one the solvers skip the timers and the counters, so it costs next to nothing
+    when unused.
+
+    Hooks are called as hook(event, stats, **data) with the events 'start' (method), 'step' (k, t, y),
+    after every step of the fixed step solvers, and 'end', which lets a profiler or a metrics sink
+    follow the run. The 'step' event is only emitted when there are hooks.
+
+    Args:
+        hooks (list): callables hook(event, stats, **data)
+    """
+
+    def __init__(self, hooks: list = ()):
+        self.hooks = list(hooks)
+        self.method = None
+        self.n_rhs = 0
+        self.n_steps = 0
+        self.n_accepted = 0
+        self.n_rejected = 0
+        self.n_newton_iterations = 0
+        self.n_jacobians = 0
+        self.times = dict.fromkeys(PHASES, 0.)
+
+    def emit(self, event: str, **data):
+        for hook in self.hooks:
+            hook(event, self, **data)
+
+    def start(self, method: str):
+        self.method = method
+        self.emit('start', method=method)
+
+    def end(self):
+        self.emit('end')
+
+    def count_rates(self, rates):
+        """Wraps a backend of the transition rates so that each call (one per evaluation of the
+        right-hand side) is counted in n_rhs"""
+
+        @functools.wraps(rates)
+        def counted(voltage):
+            self.n_rhs += 1
+            return rates(voltage)
+
+        return counted
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Adds the wall time of the block to the phase name (one of PHASES)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] += time.perf_counter() - start
+
+    def as_dict(self) -> dict:
+        return {
+            'method': self.method,
+            'n_rhs': self.n_rhs,
+            'n_steps': self.n_steps,
+            'n_accepted': self.n_accepted,
+            'n_rejected': self.n_rejected,
+            'n_newton_iterations': self.n_newton_iterations,
+            'n_jacobians': self.n_jacobians,
+            'times': dict(self.times),
+        }
+
+    def __repr__(self):
+        times = ', '.join(f'{name} {seconds:.3g} s' for name, seconds in self.times.items())
+        return (f'SolverStats({self.method}: {self.n_steps} steps ({self.n_accepted} accepted, '
+                f'{self.n_rejected} rejected), {self.n_rhs} rhs evaluations, '
+                f'{self.n_newton_iterations} Newton iterations, {self.n_jacobians} jacobians; {times})')
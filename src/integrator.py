@@ -0,0 +1,104 @@
+import time
+import numpy as np
+import cauchy_function
+import stimulus
+
+def allocate_solution(discretize_domain: np.array, initial_y: np.array, stride: int = 1, out: np.array = None) -> np.array:
+    """Allocates the array that stores a time stamped solution [t_k, V_k, m_k, h_k, n_k], keeping
+    only every stride-th point of the discretized domain. The time column is filled here, so the
+    solvers only have to write the state of each stored step in place.
+
+    Args:
+        discretize_domain (np.array): the discretized interval [t_0, t_1, ..., t_n]
+        initial_y (np.array): the initial value of y, with shape (4,) or (N, 4)
+        stride (int): stores one point every stride steps (1 stores all of them); it must divide
+            the number of steps, so that the last point is always stored
+        out (np.array): optional preallocated buffer to be filled instead of a new array
+
+    Returns:
+        np.array: the solution buffer, with shape (n//stride + 1, 5) or (n//stride + 1, N, 5)
+    """
+
+    n_steps = len(discretize_domain) - 1
+    if stride < 1 or n_steps % stride != 0:
+        raise ValueError(f'stride must be a positive integer dividing the number of steps {n_steps}, '
+                         f'so that the last state is stored, got {stride}')
+
+    time_stamps = discretize_domain[::stride]
+    shape = (len(time_stamps),) + initial_y.shape[:-1] + (5,)
+
+    if out is None:
+        out = np.empty(shape)
+    elif out.shape != shape or out.dtype != np.float64:
+        raise ValueError(f'out must be a float64 array of shape {shape}, got {out.dtype} {out.shape}')
+
+    # t_k is repeated for every neuron of a batched solution
+    out[..., 0] = time_stamps.reshape((-1,) + (1,)*(initial_y.ndim - 1))
+
+    return out
+
+
+def fixed_step_solution(step, time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                        stride: int = 1, out: np.array = None, stats=None) -> np.array:
+    """Integrates the Hodgkin-Huxley equation with a one step method y_{k+1} = step(t_k, y_k, delta_t, constants)
+    over the evenly spaced discretization of the time interval, writing the solution in place.
+    With a stimulus.Stimulus current, each step gets its own current (see stimulus.step_constants).
+
+    Args:
+        step (callable): the one step method, step(t_k, y_k, delta_t, constants) -> y_{k+1}
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        initial_y (np.array): the initial value of the vector y, with shape (4,) or (N, 4)
+        constants (dict): the constants of the model
+        stride (int): stores one point every stride steps (1 stores all of them)
+        out (np.array): optional preallocated buffer (see allocate_solution)
+        stats (instrumentation.SolverStats): optional stats filled with the steps and the time spent
+            integrating and storing them; its hooks get the 'step' event after every step
+
+    Returns:
+        np.array: the array of rows [t_k, V_k, m_k, h_k, n_k], with shape (n//stride + 1, 5),
+        or (n//stride + 1, N, 5) for a population of N neurons
+    """
+
+    clock = time.perf_counter
+    start = clock()
+
+    discretize_domain, delta_t = cauchy_function.discretize_interval(time_interval, n_steps)
+    step_constants = stimulus.step_constants(constants, discretize_domain)
+
+    y_k = np.array(initial_y, dtype=float)
+    solution = allocate_solution(discretize_domain, y_k, stride, out)
+    solution[0, ..., 1:] = y_k
+
+    # with stats, the wall time of the steps (integrate) and of the allocation and the writes
+    # of the solution (store) are measured, and the 'step' event is sent to its hooks
+    timed = stats is not None
+    hooks = timed and bool(stats.hooks)
+    integrate, store = 0., clock() - start
+
+    # evaluates y_{k+1} with y_k and t_k
+    for k, constants_k in zip(range(n_steps), step_constants):
+        if timed:
+            before = clock()
+
+        y_k = step(discretize_domain[k], y_k, delta_t, constants_k)
+
+        if timed:
+            after = clock()
+
+        if (k + 1) % stride == 0:
+            solution[(k + 1)//stride, ..., 1:] = y_k
+
+        if timed:
+            integrate += after - before
+            store += clock() - after
+            if hooks:
+                stats.emit('step', k=k + 1, t=discretize_domain[k + 1], y=y_k)
+
+    if timed:
+        stats.n_steps += n_steps
+        stats.n_accepted += n_steps
+        stats.times['integrate'] += integrate
+        stats.times['store'] += store
+
+    return solution
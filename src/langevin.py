@@ -0,0 +1,177 @@
+import collections
+import functools
+import os
+import numpy as np
+import eq_parameters
+import state_variables
+import steady_state
+import stimulus
+import streaming
+
+# channel densities of the squid axon, in channels per um^2
+SODIUM_DENSITY = 60.
+POTASSIUM_DENSITY = 18.
+
+
+class LangevinStep:
+    """One Euler-Maruyama step of the stochastic Hodgkin-Huxley model with channel noise (Fox &
+    Lu's Langevin approximation): each gate x of a membrane with N_x channels follows
+
+        dx = (alpha_x(1 - x) - beta_x x) dt + sqrt((alpha_x(1 - x) + beta_x x)/N_x) dW
+
+    with N_Na sodium channels for m and h and N_K potassium channels for n; the gates are clipped
+    to [0, 1]. The noise is drawn from the generator of the step, so that a run is reproducible.
+
+    Args:
+        rng (np.random.Generator): the random generator of the run
+        area (float): area of the membrane, in um^2 (its channel numbers set the size of the noise)
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+    """
+
+    def __init__(self, rng: np.random.Generator, area: float = 100., rates=eq_parameters.rates):
+        self.rng = rng
+        self.n_sodium = SODIUM_DENSITY*area
+        self.n_potassium = POTASSIUM_DENSITY*area
+        self.rates = rates
+
+    def __call__(self, t_k: float, y_k: np.array, delta_t: float, constants: dict) -> np.array:
+        V, m, h, n = y_k[..., 0], y_k[..., 1], y_k[..., 2], y_k[..., 3]
+        alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n = self.rates(V)
+
+        I, C = stimulus.current(constants, t_k), constants['capacitance']
+        noise = self.rng.standard_normal(y_k.shape[:-1] + (3,))
+
+        next_y = np.empty_like(y_k)
+        next_y[..., 0] = V + state_variables.der_Voltage(V, I, C, m, h, n, constants)*delta_t
+
+        gates = ((state_variables.der_m, m, alpha_m, beta_m, self.n_sodium),
+                 (state_variables.der_h, h, alpha_h, beta_h, self.n_sodium),
+                 (state_variables.der_n, n, alpha_n, beta_n, self.n_potassium))
+        for i, (derivative, x, alpha, beta, n_channels) in enumerate(gates, start=1):
+            drift = derivative(alpha, beta, x)
+            spread = np.sqrt(np.maximum(alpha*(1. - x) + beta*x, 0.)*delta_t/n_channels)
+            next_y[..., i] = np.clip(x + drift*delta_t + spread*noise[..., i - 1], 0., 1.)
+
+        return next_y
+
+
+def _run_block(seed: np.random.SeedSequence, n_trials: int, time_interval: (float, float), n_steps: int,
+               initial_y: np.array, constants: dict, area: float, stride: int, bin_edges: np.array,
+               threshold: float) -> tuple:
+    """Runs one block of trials with its own random stream, keeping only its statistics: the
+    mean and the sum of squared deviations of the state over the trials at every stored instant,
+    and the histogram of the spike times"""
+
+    step = LangevinStep(np.random.default_rng(seed), area)
+    y_0 = np.broadcast_to(initial_y, (n_trials, 4))
+
+    means, squares = [], []
+    spikes = streaming.SpikeCounter(threshold)
+    for chunk in streaming.stream_solution(step, time_interval, n_steps, y_0, constants, stride=stride):
+        mean = chunk[..., 1:].mean(axis=1)
+        means.append(mean)
+        squares.append(((chunk[..., 1:] - mean[:, np.newaxis])**2).sum(axis=1))
+        spikes.consume(chunk)
+    spikes.close()
+
+    histogram, _ = np.histogram(spikes.spike_times, bin_edges)
+
+    return n_trials, np.concatenate(means), np.concatenate(squares), histogram
+
+
+def _merge(first: tuple, second: tuple) -> tuple:
+    """Merges the statistics of two groups of trials (Chan et al.'s parallel update of the mean
+    and of the sum of squared deviations)"""
+    count, mean, squares, histogram = first
+    block_count, block_mean, block_squares, block_histogram = second
+
+    total = count + block_count
+    delta = block_mean - mean
+    mean = mean + delta*block_count/total
+    squares = squares + block_squares + delta**2*count*block_count/total
+
+    return total, mean, squares, histogram + block_histogram
+
+
+def _block_results(pool, n_workers: int, seeds: list, sizes: list, arguments: tuple):
+    """Yields the statistics of the blocks run on the pool (a ProcessPoolExecutor) in block order,
+    keeping at most 2*n_workers blocks submitted or waiting to be merged, so the memory does not
+    grow with the number of trials"""
+    pending = collections.deque()
+    for block_seed, size in zip(seeds, sizes):
+        if len(pending) >= 2*n_workers:
+            yield pending.popleft().result()
+        pending.append(pool.submit(_run_block, block_seed, size, *arguments))
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def ensemble(n_trials: int, time_interval: (float, float), n_steps: int, constants: dict, area: float = 100.,
+             initial_y: np.array = None, seed: int = None, block_size: int = 250, n_workers: int = None,
+             stride: int = 1, bin_width: float = 1., threshold: float = 50.) -> dict:
+    """Monte Carlo ensemble of the stochastic model (see LangevinStep): the trials are split in
+    blocks of block_size, integrated as populations on a pool of worker processes, and reduced
+    to their statistics as they run, so that no trajectory of a trial is kept.
+
+    Each block has its own random stream, spawned from the seed (np.random.SeedSequence.spawn),
+    and the statistics of the blocks are merged in block order as they finish (at most 2*n_workers
+    blocks are in flight), so the results are the same bit for bit whatever the number of workers
+    and the memory does not grow with the number of blocks.
+
+    Args:
+        n_trials (int): number of trials
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        constants (dict): the constants of the model (the current may be a stimulus.Stimulus)
+        area (float): area of the membrane, in um^2
+        initial_y (np.array): initial state of every trial (the resting state of the constants by default)
+        seed (int): seed of the ensemble (None draws a fresh one)
+        block_size (int): number of trials integrated at once
+        n_workers (int): number of worker processes (the number of CPUs when None, 1 runs in this process)
+        stride (int): keeps the statistics of one instant every stride steps
+        bin_width (float): width of the bins of the spike time histogram, in ms
+        threshold (float): voltage of a spike, in mV
+
+    Returns:
+        dict: 't' (k,) the stored instants, 'mean' and 'variance' (k, 4) of [V, m, h, n] over the
+        trials, 'spike_histogram' and 'bin_edges' of the spike times, 'n_trials' and 'seed' (the
+        entropy of the SeedSequence, to reproduce the ensemble)
+    """
+
+    if initial_y is None:
+        initial_y, _ = steady_state.steady_state(constants)
+    initial_y = np.asarray(initial_y, dtype=float)
+
+    root = np.random.SeedSequence(seed)
+    sizes = [min(block_size, n_trials - start) for start in range(0, n_trials, block_size)]
+    seeds = root.spawn(len(sizes))
+
+    start, stop = time_interval
+    bin_edges = np.arange(start, stop + bin_width, bin_width)
+    arguments = (time_interval, n_steps, initial_y, constants, area, stride, bin_edges, threshold)
+
+    n_workers = min(n_workers or os.cpu_count(), len(sizes))
+    if n_workers == 1:
+        blocks = (_run_block(block_seed, size, *arguments) for block_seed, size in zip(seeds, sizes))
+        statistics = functools.reduce(_merge, blocks)
+    else:
+        # imported here, since the process pools cost more to import than a small run
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            statistics = functools.reduce(_merge, _block_results(pool, n_workers, seeds, sizes, arguments))
+
+    count, mean, squares, histogram = statistics
+
+    domain = np.linspace(start, stop, n_steps + 1)[::stride]
+
+    return {
+        't': domain,
+        'mean': mean,
+        'variance': squares/max(count - 1, 1),
+        'spike_histogram': histogram,
+        'bin_edges': bin_edges,
+        'n_trials': count,
+        'seed': root.entropy,
+    }
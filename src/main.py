@@ -1,39 +1,16 @@
 import numpy as np
-import pandas as pd
-import implicit_euler
-import euler_sol
-import rk_sol
-import splines
-import math
-
-def print_coef(coef, file):
-    with open(file, 'w') as file:
-        file.write("a_i & b_i & c_i & d_i \\\\ \n")
-        for i in range(0, len(coef), 4):
-            line = ' & '.join(["{:.4f}".format(value) for value in coef[i:i+4]]) + ' \\\\ \n'
-            file.write(line)
+import cli
+import sweep
+import trajectory_store
 
 def main():
-    constants = {
-        'current': 0., 
-        'capacitance': 1.,
-        'g_Na': 120.,
-        'g_K': 36., 
-        'g_L': 0.3,
-        'E_Na': 115., 
-        'E_K':  -12.0, 
-        'E_L':  10.613
-    }
+    # the constants and the initial state of the runs of cli.py (see cli.DEFAULT_CONFIG)
+    constants = dict(cli.DEFAULT_CONFIG['constants'])
     
     T = [0, 30]
     n = 5000
     
-    y_0 = np.array([
-            0., # V
-            0.05,  # m
-            0.6,  # h
-            0.06  # n
-        ])
+    y_0 = np.array(cli.DEFAULT_CONFIG['initial_y'])
     
     #print(cauchy_function(0, y_0, constants))
     
@@ -49,34 +26,39 @@ def main():
             10000, 20000, 30000, 40000, 50000, 60000, 70000, 80000, 90000, 100000,
             ]
     
-    for n in n_values:
-        print(f'n = {n}')
-        implicit_euler_sol = implicit_euler.implicit_euler_solution(T, n, y_0, constants)
-        df = pd.DataFrame(implicit_euler_sol)
-        df.to_csv(f'imgs/implicit_euler_out/out_imp_euler_{n}.csv')
+    # binary trajectory stores (see trajectory_store); export_csv also writes the old CSV files
+    output_paths = {
+        'implicit_euler': 'imgs/implicit_euler_out/out_imp_euler_{n}',
+        'rk': 'imgs/rk_out/out_rk_{n}',
+    }
+    export_csv = False
     
-    for n in n_values:
-        print(f'n = {n}')
-        RK = rk_sol.rk_solution(T, n, y_0, constants)
-        df = pd.DataFrame(RK)
-        df.to_csv(f'imgs/rk_out/out_rk_{n}.csv')
+    def save(index, job, solution):
+        path = output_paths[job.method].format(n=job.n_steps)
+        trajectory_store.save_trajectory(path, solution, method=job.method, n_steps=job.n_steps,
+                                         constants=job.constants, initial_y=job.initial_y)
+        if export_csv:
+            trajectory_store.export_csv(path, f'{path}.csv')
+    
+    # with a cache directory (e.g. result_cache.DEFAULT_DIRECTORY), the runs already in it (the
+    # same method, n, constants and y_0) are not computed again
+    cache = None
+
+    # runs the implicit Euler and the Runge-Kutta solutions of every n in parallel
+    jobs = sweep.grid(['implicit_euler', 'rk'], n_values, constants, y_0, T)
+    sweep.run_sweep(jobs, on_result=save, cache=cache)
 
-    # # Get the coefficients of the interpolation
-    # print_coef(coef_V, file_V_int)
-    # print_coef(coef_m, file_m_int)
-    # print_coef(coef_n, file_n_int)
-    # print_coef(coef_h, file_h_int)
+    # # Get the coefficients of the interpolation (splines imports scipy)
+    # import splines
+    # spline = splines.StateSpline(trajectory_store.load_trajectory(output_paths['rk'].format(n=n)))
+    # for component in splines.COMPONENTS:
+    #     spline.export_coefficients(f'{component}_coef.txt', component)
 
     # # Get the points from the interpolation
-    # df = pd.DataFrame(points_V)
-    # df.to_csv('interpolated_points_V.csv')    
-    # df = pd.DataFrame(points_m)
-    # df.to_csv('interpolated_points_m.csv')  
-    # df = pd.DataFrame(points_n)
-    # df.to_csv('interpolated_points_n.csv')  
-    # df = pd.DataFrame(points_h)
-    # df.to_csv('interpolated_points_h.csv')    
+    # points = np.concatenate(list(spline.resample_uniform(10*n)))
+    # trajectory_store.save_trajectory('imgs/interpolated_points', points)
 
     return
 
-main()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+import numpy as np
+import scipy.sparse as sparse
+import integrator
+import streaming
+import stimulus
+
+# reversal potentials of the synapses, in mV above the resting potential like V (0 and -80 mV absolute)
+E_EXCITATORY = 65.
+E_INHIBITORY = -15.
+
+
+class Network:
+    """Connectivity of a network of N Hodgkin-Huxley neurons, as scipy.sparse matrices.
+
+    A chemical synapse from j to i injects W_ij s_j (E_j - V_i) into i, where s_j is the opening
+    of the synapses of j: it decays with time constant tau and jumps towards 1 at every spike of j
+    (V_j crossing the threshold upwards). A gap junction between i and j injects G_ij (V_j - V_i).
+
+    Args:
+        weights (sparse matrix): (N, N) maximal synaptic conductances W_ij, in mS/cm^2
+        reversal (np.array): (N,) reversal potential E_j of the synapses of each presynaptic neuron
+        gap (sparse matrix): (N, N) symmetric conductances G_ij of the gap junctions (None for none)
+        tau (float): decay time constant of the synapses, in ms
+        jump (float): fraction of the way to 1 that s_j jumps at each spike
+        threshold (float): voltage of a spike, in mV
+    """
+
+    def __init__(self, weights, reversal: np.array, gap=None, tau: float = 5., jump: float = 1.,
+                 threshold: float = 50.):
+        weights = sparse.csr_matrix(weights, dtype=float)
+        n_neurons = weights.shape[0]
+        gap = sparse.csr_matrix((n_neurons, n_neurons)) if gap is None else sparse.csr_matrix(gap, dtype=float)
+
+        self.n_neurons = n_neurons
+        self.reversal = np.broadcast_to(np.asarray(reversal, dtype=float), (n_neurons,))
+        self.tau = tau
+        self.jump = jump
+        self.threshold = threshold
+
+        # [W G] multiplies the stacked presynaptic columns [[s*E, s], [V, 0]], so that the
+        # chemical and electrical inputs of every neuron come from one sparse product
+        self.coupling = sparse.hstack((weights, gap), format='csr')
+        self.gap_total = np.asarray(gap.sum(axis=1)).ravel()
+
+        # the chemical synapses, and the gap junctions counted once per pair of neurons
+        self.n_synapses = weights.nnz
+        self.n_gap_junctions = sparse.triu(gap, k=1).nnz
+
+
+def random_network(n_neurons: int, n_synapses: int, weight: float = 0.01, inhibitory: float = 0.2,
+                   n_gap_junctions: int = 0, gap_conductance: float = 0.01, seed: int = None, **kwargs) -> Network:
+    """Random network with n_synapses synapses between uniformly chosen pairs of distinct neurons
+
+    Args:
+        n_neurons (int): number N of neurons
+        n_synapses (int): number of chemical synapses
+        weight (float): maximal conductance of each synapse, in mS/cm^2
+        inhibitory (float): fraction of inhibitory neurons (the last ones)
+        n_gap_junctions (int): number of gap junctions
+        gap_conductance (float): conductance of each gap junction, in mS/cm^2
+        seed (int): seed of the random generator
+        **kwargs: tau, jump and threshold of the Network
+
+    Returns:
+        Network: the network
+    """
+
+    rng = np.random.default_rng(seed)
+
+    def pairs(n_pairs):
+        pre = rng.integers(n_neurons, size=n_pairs)
+        # a shift in [1, N) never connects a neuron to itself
+        post = (pre + rng.integers(1, n_neurons, size=n_pairs)) % n_neurons
+        return pre, post
+
+    pre, post = pairs(n_synapses)
+    weights = sparse.coo_matrix((np.full(n_synapses, weight), (post, pre)), shape=(n_neurons, n_neurons))
+
+    reversal = np.full(n_neurons, E_EXCITATORY)
+    reversal[n_neurons - int(round(inhibitory*n_neurons)):] = E_INHIBITORY
+
+    gap = None
+    if n_gap_junctions:
+        a, b = pairs(n_gap_junctions)
+        values = np.full(2*n_gap_junctions, gap_conductance)
+        gap = sparse.coo_matrix((values, (np.concatenate((a, b)), np.concatenate((b, a)))),
+                                shape=(n_neurons, n_neurons))
+
+    return Network(weights, reversal, gap, **kwargs)
+
+
+class NetworkStep:
+    """One step of a network: the synaptic and gap junction currents of every neuron are computed
+    at t_k with one sparse product, added to the injected current and held during the step of the
+    single neuron method; then the synapses decay exactly and the spikes of the step open them.
+
+    Args:
+        network (Network): the connectivity
+        step (str or callable): a method of streaming.STEPS, or a one step method step(t_k, y_k, delta_t, constants)
+        initial_s (np.array): initial opening s_j of the synapses of each neuron (closed by default)
+    """
+
+    def __init__(self, network: Network, step='rush_larsen', initial_s: np.array = None):
+        self.network = network
+        self.step = streaming.resolve_step(step)
+        self.s = np.zeros(network.n_neurons) if initial_s is None else np.array(initial_s, dtype=float)
+        self.spike_times = []
+        self.spike_neurons = []
+        self._presynaptic = np.zeros((2*network.n_neurons, 2))
+
+    def synaptic_current(self, V: np.array) -> np.array:
+        """The current injected into each neuron by its synapses and gap junctions"""
+        network, n_neurons = self.network, self.network.n_neurons
+
+        presynaptic = self._presynaptic
+        presynaptic[:n_neurons, 0] = self.s*network.reversal
+        presynaptic[:n_neurons, 1] = self.s
+        presynaptic[n_neurons:, 0] = V
+
+        inputs = network.coupling @ presynaptic
+
+        return inputs[:, 0] - V*(inputs[:, 1] + network.gap_total)
+
+    def __call__(self, t_k: float, y_k: np.array, delta_t: float, constants: dict) -> np.array:
+        network = self.network
+        V = y_k[:, 0]
+
+        current = stimulus.current(constants, t_k) + self.synaptic_current(V)
+        next_y = self.step(t_k, y_k, delta_t, dict(constants, current=current))
+
+        spiking = (V < network.threshold) & (next_y[:, 0] >= network.threshold)
+        self.s *= np.exp(-delta_t/network.tau)
+
+        if spiking.any():
+            neurons = np.flatnonzero(spiking)
+            self.s[neurons] += network.jump*(1. - self.s[neurons])
+
+            # the spike time is interpolated linearly inside the step
+            V_0, V_1 = V[neurons], next_y[neurons, 0]
+            self.spike_times.append(t_k + (network.threshold - V_0)/(V_1 - V_0)*delta_t)
+            self.spike_neurons.append(neurons)
+
+        return next_y
+
+    def spikes(self) -> (np.array, np.array):
+        """The spikes of the run so far, as the arrays (times, neurons) sorted by time"""
+        if not self.spike_times:
+            return np.empty(0), np.empty(0, dtype=int)
+
+        # the spikes of a step are kept in the order of the neurons
+        times, neurons = np.concatenate(self.spike_times), np.concatenate(self.spike_neurons)
+        order = np.argsort(times, kind='stable')
+
+        return times[order], neurons[order]
+
+
+def network_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                     network: Network, step='rush_larsen', stride: int = 1, out: np.array = None,
+                     return_spikes: bool = False, stats=None):
+    """Computes a numerical solution of a network of Hodgkin-Huxley neurons coupled by synapses
+    and gap junctions (see Network and NetworkStep)
+
+    Args:
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        initial_y (np.array): the initial state [V, m, h, n] of every neuron, or an (N, 4) array
+        constants (dict): the constants of the model (scalars or per-neuron (N,) arrays); the
+            current is the external current injected into each neuron
+        network (Network): the connectivity
+        step (str or callable): the single neuron method (a name of streaming.STEPS)
+        stride (int): stores one point every stride steps (1 stores all of them)
+        out (np.array): optional preallocated buffer for the solution (see integrator.allocate_solution)
+        return_spikes (bool): also returns the spikes of the run
+        stats (instrumentation.SolverStats): optional stats of the run
+
+    Returns:
+        np.array: array (n//stride + 1, N, 5) cujas linhas [t_k, V_k, m_k, h_k, n_k] são o domínio
+        discretizado e a solução aproximada de cada neurônio. Com return_spikes, retorna a tupla
+        (solução, tempos, neurônios) com os instantes dos disparos e os neurônios que dispararam
+    """
+
+    initial_y = np.broadcast_to(np.asarray(initial_y, dtype=float), (network.n_neurons, 4))
+    network_step = NetworkStep(network, step)
+
+    if stats is not None:
+        stats.start('network')
+
+    solution = integrator.fixed_step_solution(network_step, time_interval, n_steps, initial_y, constants,
+                                              stride, out, stats)
+
+    if stats is not None:
+        stats.end()
+
+    if return_spikes:
+        return (solution,) + network_step.spikes()
+
+    return solution
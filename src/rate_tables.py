@@ -0,0 +1,236 @@
+import functools
+import numpy as np
+import eq_parameters
+import eq_parameters_derivatives
+
+RATE_NAMES = ('alpha_m', 'beta_m', 'alpha_h', 'beta_h', 'alpha_n', 'beta_n')
+
+# alpha_m = 0.1(25 - V)/(e^((25 - V)/10) - 1) and alpha_n = 0.01(10 - V)/(e^((10 - V)/10) - 1) are 0/0
+# at V = 25 and V = 10; both have the form A*10*g(x), g(x) = x/(e^x - 1), x = (V_0 - V)/10
+SINGULARITIES = {'alpha_m': (25., 0.1), 'alpha_n': (10., 0.01)}
+
+
+def _regular_rates(voltage: np.array) -> (np.array, np.array):
+    """Computes the rates and their derivatives on an array of voltages with the analytic
+    formulas, replacing the removable singularities of alpha_m and alpha_n by the Taylor's
+    expansion g(x) = 1 - x/2 + x^2/12 near them.
+
+    Returns:
+        (np.array, np.array): the rates and their derivatives, each with shape (6, len(V))
+    """
+    V = voltage
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.stack(eq_parameters.rates(V))
+        derivatives = np.stack(eq_parameters_derivatives.rate_derivatives(V))
+
+    for name, (V_0, A) in SINGULARITIES.items():
+        i = RATE_NAMES.index(name)
+        x = (V_0 - V)/10.
+        near = np.abs(x) < 1e-4
+        values[i, near] = A*10.*(1. - x[near]/2. + x[near]**2/12.)
+        derivatives[i, near] = -A*(-0.5 + x[near]/6.)
+
+    return values, derivatives
+
+
+class RateTable:
+    """Transition rates of the Hodgkin-Huxley model (and their derivatives) sampled once on an
+    evenly spaced voltage grid and evaluated by interpolation, which makes each evaluation a
+    table lookup instead of six exponentials. Voltages outside [v_min, v_max] are evaluated with
+    the analytic formulas, so a trace that leaves the grid is not silently flattened.
+
+    The analytic formulas stay the default backend of the solvers: NumPy's exponentials are about
+    as fast as the lookup, so a table is only worth it where the rates are expensive to evaluate.
+
+    Use rate_table to build it, so tables with the same grid are shared.
+
+    Args:
+        v_min (float): lowest voltage of the grid
+        v_max (float): highest voltage of the grid
+        resolution (float): spacing of the grid, in mV
+        method (str): 'linear' interpolation, or 'cubic' Hermite's interpolation that uses the
+            analytic derivatives of the rates in the nodes
+    """
+
+    def __init__(self, v_min: float = -100., v_max: float = 150., resolution: float = 0.01, method: str = 'linear'):
+        if method not in ('linear', 'cubic'):
+            raise ValueError(f"method must be 'linear' or 'cubic', got {method!r}")
+        if not v_min < v_max or resolution <= 0:
+            raise ValueError(f'invalid grid [{v_min}, {v_max}] with resolution {resolution}')
+
+        self.v_min, self.v_max, self.method = v_min, v_max, method
+        n_nodes = int(np.ceil((v_max - v_min)/resolution)) + 1
+        self.voltages = np.linspace(v_min, v_max, n_nodes)
+        self.resolution = self.voltages[1] - self.voltages[0]
+
+        self.values, self.derivatives = _regular_rates(self.voltages)
+        self.values.setflags(write=False)
+        self.derivatives.setflags(write=False)
+
+        # each column i holds everything the interpolation in [V_i, V_{i+1}] needs, so a lookup
+        # is one gather: [p_i, p_{i+1} - p_i] for the linear method and [p_i, d_i, p_{i+1}, d_{i+1}]
+        # (d the derivatives) for Hermite's; the rows of the derivatives follow the same layout
+        p, d = self.values, self.derivatives
+        p_next, d_next = np.roll(p, -1, axis=1), np.roll(d, -1, axis=1)
+        if method == 'linear':
+            self._nodes = np.concatenate((p, p_next - p))
+            self._derivative_nodes = np.concatenate((d, d_next - d))
+        else:
+            self._nodes = np.concatenate((p, d, p_next, d_next))
+            self._derivative_nodes = self._nodes
+
+        # the same columns in Python floats, for the lookup of a single voltage
+        self._node_columns = self._nodes.T.tolist()
+        self._derivative_node_columns = self._derivative_nodes.T.tolist()
+
+    def _locate(self, voltage):
+        """Finds the interval [V_i, V_{i+1}] of each voltage and its position s in it (0 <= s <= 1)"""
+        position = (np.clip(voltage, self.v_min, self.v_max) - self.v_min)/self.resolution
+        index = np.minimum(np.floor(position).astype(int), len(self.voltages) - 2)
+
+        return index, position - index
+
+    def _evaluate(self, voltage, derivatives: bool) -> np.array:
+        """Interpolates the six rates (or their derivatives) at an array of voltages, and
+        evaluates the analytic formulas at the voltages outside the grid.
+
+        Returns:
+            np.array: the values, with shape (6,) + V.shape
+        """
+        voltage = np.asarray(voltage, dtype=float)
+        outside = ~((voltage >= self.v_min) & (voltage <= self.v_max))
+        values = self._interpolate(np.where(outside, self.v_min, voltage), derivatives)
+
+        if outside.any():
+            exact_values, exact_derivatives = _regular_rates(voltage[outside])
+            values[:, outside] = exact_derivatives if derivatives else exact_values
+
+        return values
+
+    def _interpolate(self, voltage, derivatives: bool) -> np.array:
+        """Interpolates the six rates (or their derivatives) at an array of voltages (clamped to
+        the grid).
+
+        Returns:
+            np.array: the interpolated values, with shape (6,) + V.shape
+        """
+        index, s = self._locate(voltage)
+
+        if self.method == 'linear':
+            nodes = (self._derivative_nodes if derivatives else self._nodes).take(index, axis=1)
+            return nodes[:6] + s*nodes[6:]
+
+        nodes = self._nodes.take(index, axis=1)
+        p_0, d_0, p_1, d_1 = nodes[:6], nodes[6:12], nodes[12:18], nodes[18:]
+        dv = self.resolution
+        s_2, s_3 = s*s, s*s*s
+
+        if derivatives:
+            # derivative of Hermite's cubic
+            return (6*s_2 - 6*s)*(p_0 - p_1)/dv + (3*s_2 - 4*s + 1)*d_0 + (3*s_2 - 2*s)*d_1
+
+        # cubic Hermite's basis on the interval, with the derivatives scaled by its width
+        return ((2*s_3 - 3*s_2 + 1)*p_0 + (s_3 - 2*s_2 + s)*dv*d_0
+                + (-2*s_3 + 3*s_2)*p_1 + (s_3 - s_2)*dv*d_1)
+
+    def _interpolate_scalar(self, voltage: float, derivatives: bool) -> list:
+        """Same as _interpolate for a single voltage, in Python floats (numpy's overhead on one
+        element is larger than the exponentials it replaces)"""
+        voltage = float(voltage)
+        if not self.v_min <= voltage <= self.v_max:
+            exact = eq_parameters_derivatives.rate_derivatives if derivatives else eq_parameters.rates
+            return list(exact(voltage))
+
+        position = (voltage - self.v_min)/self.resolution
+        index = min(int(position), len(self.voltages) - 2)
+        s = position - index
+
+        if self.method == 'linear':
+            nodes = (self._derivative_node_columns if derivatives else self._node_columns)[index]
+            return [p + s*slope for p, slope in zip(nodes[:6], nodes[6:])]
+
+        nodes = self._node_columns[index]
+        p_0, d_0, p_1, d_1 = nodes[:6], nodes[6:12], nodes[12:18], nodes[18:]
+        dv = self.resolution
+        s_2, s_3 = s*s, s*s*s
+
+        if derivatives:
+            g_0, g_10, g_11 = (6*s_2 - 6*s)/dv, 3*s_2 - 4*s + 1, 3*s_2 - 2*s
+            return [g_0*(a - b) + g_10*da + g_11*db for a, da, b, db in zip(p_0, d_0, p_1, d_1)]
+
+        h_00, h_10, h_01, h_11 = 2*s_3 - 3*s_2 + 1, (s_3 - 2*s_2 + s)*dv, -2*s_3 + 3*s_2, (s_3 - s_2)*dv
+        return [h_00*a + h_10*da + h_01*b + h_11*db for a, da, b, db in zip(p_0, d_0, p_1, d_1)]
+
+    def rates(self, voltage) -> tuple:
+        """Drop-in replacement of eq_parameters.rates (see cauchy_function.cauchy_function)
+
+        Args:
+            voltage (float or np.array): voltage V in the neuron
+
+        Returns:
+            tuple: the interpolated (alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n)
+        """
+        if np.ndim(voltage) == 0:
+            return tuple(self._interpolate_scalar(voltage, False))
+
+        return tuple(self._evaluate(voltage, False))
+
+    def rate_derivatives(self, voltage) -> tuple:
+        """Drop-in replacement of eq_parameters_derivatives.rate_derivatives (see cauchy_function.jacobian)
+
+        Args:
+            voltage (float or np.array): voltage V in the neuron
+
+        Returns:
+            tuple: the interpolated derivatives of (alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n)
+        """
+        if np.ndim(voltage) == 0:
+            return tuple(self._interpolate_scalar(voltage, True))
+
+        return tuple(self._evaluate(voltage, True))
+
+    def accuracy_report(self, n_samples: int = 100001) -> dict:
+        """Measures the interpolation error against the analytic formulas on n_samples voltages
+        evenly spread over the grid (most of them between the nodes).
+
+        Args:
+            n_samples (int): number of sampled voltages
+
+        Returns:
+            dict: for each rate name, the maximum absolute and relative errors of the rate and of
+            its derivative: {'alpha_m': {'max_abs_error': ..., 'max_rel_error': ...,
+            'max_abs_error_derivative': ..., 'max_rel_error_derivative': ...}, ...}
+        """
+        V = np.linspace(self.v_min, self.v_max, n_samples)
+        exact_values, exact_derivatives = _regular_rates(V)
+        values, derivatives = self._interpolate(V, False), self._interpolate(V, True)
+
+        report = {}
+        for i, name in enumerate(RATE_NAMES):
+            error = np.abs(values[i] - exact_values[i])
+            error_derivative = np.abs(derivatives[i] - exact_derivatives[i])
+            report[name] = {
+                'max_abs_error': error.max(),
+                'max_rel_error': (error/np.maximum(np.abs(exact_values[i]), 1e-300)).max(),
+                'max_abs_error_derivative': error_derivative.max(),
+                'max_rel_error_derivative': (error_derivative/np.maximum(np.abs(exact_derivatives[i]), 1e-300)).max(),
+            }
+
+        return report
+
+
+@functools.lru_cache(maxsize=None)
+def rate_table(v_min: float = -100., v_max: float = 150., resolution: float = 0.01, method: str = 'linear') -> RateTable:
+    """Builds the RateTable of the given grid, or returns the one already built for it
+
+    Args:
+        v_min (float): lowest voltage of the grid
+        v_max (float): highest voltage of the grid
+        resolution (float): spacing of the grid, in mV
+        method (str): 'linear' or 'cubic' interpolation
+
+    Returns:
+        RateTable: the (shared) rate table of the grid
+    """
+
+    return RateTable(v_min, v_max, resolution, method)
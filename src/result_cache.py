@@ -0,0 +1,283 @@
+import collections
+import functools
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+import numpy as np
+
+# directory of the cache used when none is given
+DEFAULT_DIRECTORY = '.hh_cache'
+
+# modules shared by every solver: a change in any of them, in the module of the solver or in the
+# modules of this package that it imports changes the code version, so the results computed by
+# the old code are not reused
+CODE_MODULES = ('cauchy_function', 'eq_parameters', 'eq_parameters_derivatives', 'state_variables',
+                'integrator', 'stimulus', 'rate_tables', 'fused_rhs', 'rk_sol', 'implicit_euler')
+
+# the directory of the modules of this package
+SOURCE_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+
+
+def _canonical(value):
+    """A JSON representation of a value that is the same for equal values: dictionaries are
+    sorted, arrays become the digest of their bytes (json writes floats with repr, so equal keys
+    mean equal values), callables become their qualified names (with their instance, for bound
+    methods) and other objects their public attributes"""
+    if isinstance(value, dict):
+        return {str(key): _canonical(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, np.ndarray):
+        # the digest of the bytes, since large arrays (e.g. the tables of a RateTable) are slow to write out
+        data = hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()
+        return {'shape': list(value.shape), 'dtype': value.dtype.str, 'data': data}
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if callable(value) and hasattr(value, '__qualname__'):
+        # a bound method (e.g. RateTable.rates) also depends on its instance
+        instance = getattr(value, '__self__', None)
+        if instance is not None and not inspect.ismodule(instance):
+            return {'method': f'{type(instance).__module__}.{value.__qualname__}', 'self': _canonical(instance)}
+        return f'{value.__module__}.{value.__qualname__}'
+
+    attributes = {name: item for name, item in vars(value).items() if not name.startswith('_')}
+    return {'type': type(value).__qualname__, **_canonical(attributes)}
+
+
+@functools.lru_cache(maxsize=None)
+def _file_digest(path: str, modified: float) -> str:
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _package_modules(names) -> dict:
+    """The modules of names and, transitively, the modules of this package (of SOURCE_DIRECTORY)
+    that they import, by name"""
+    modules = {}
+    pending = [sys.modules.get(name) or __import__(name) for name in names]
+    while pending:
+        module = pending.pop()
+        if module.__name__ in modules:
+            continue
+        modules[module.__name__] = module
+        for value in vars(module).values():
+            imported = value if inspect.ismodule(value) else sys.modules.get(getattr(value, '__module__', None) or '')
+            path = getattr(imported, '__file__', None)
+            if path is not None and os.path.dirname(os.path.abspath(path)) == SOURCE_DIRECTORY:
+                pending.append(imported)
+
+    return modules
+
+
+def code_version(solver) -> str:
+    """Hash of the source files of the module of the solver, of CODE_MODULES and of the modules
+    of this package that they import"""
+    modules = _package_modules(set(CODE_MODULES) | {solver.__module__})
+    digest = hashlib.sha256()
+    for name in sorted(modules):
+        path = inspect.getsourcefile(modules[name])
+        digest.update(_file_digest(path, os.path.getmtime(path)).encode())
+
+    return digest.hexdigest()
+
+
+def key(solver, *args, **kwargs) -> str:
+    """The key of a run: a hash of the name and the code version of the solver and of its
+    arguments (the step specification, the constants and the initial state)
+
+    Args:
+        solver (callable): the solver
+        *args, **kwargs: the arguments of the run
+
+    Returns:
+        str: the hexadecimal SHA-256 of the run
+    """
+
+    # the same run gives the same key whether its arguments are passed by position, by name or left to their defaults
+    arguments = inspect.signature(solver).bind(*args, **kwargs)
+    arguments.apply_defaults()
+
+    description = {
+        'solver': _canonical(solver),
+        'code_version': code_version(solver),
+        'arguments': _canonical(dict(arguments.arguments)),
+    }
+
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """Persistent cache of solutions, one .npy file per run named by its key (see key).
+
+    An entry is written to a temporary file and renamed into place, so a reader never sees a
+    partial file and parallel sweep workers that compute the same run just replace it by an equal
+    one. Each hit touches its file, and when the files exceed max_bytes the least recently used
+    ones are removed; an entry removed by another process while it is read is a miss. The last
+    memory_items results, up to memory_bytes in total, are also kept in memory, so repeated calls
+    in a process skip the disk. Every solution given by the cache is read-only.
+
+    Args:
+        directory (str): directory of the cache (created if needed)
+        max_bytes (int): largest total size of the entries on disk
+        memory_items (int): number of results kept in memory (0 for none)
+        memory_bytes (int): largest total size of the results kept in memory
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = 2**30, memory_items: int = 16,
+                 memory_bytes: int = 2**28):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = collections.OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+
+    def _path(self, run_key: str) -> str:
+        return os.path.join(self.directory, f'{run_key}.npy')
+
+    def _remember(self, run_key: str, solution: np.array):
+        with self._lock:
+            previous = self._memory.pop(run_key, None)
+            if previous is not None:
+                self._memory_size -= previous.nbytes
+            # a solution larger than the memory tier is only kept on disk
+            if solution.nbytes > self.memory_bytes:
+                return
+
+            self._memory[run_key] = solution
+            self._memory_size += solution.nbytes
+            while len(self._memory) > self.memory_items or self._memory_size > self.memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= evicted.nbytes
+
+    def get(self, run_key: str) -> np.array:
+        """The cached solution of a key (read-only, since it is shared), or None"""
+        with self._lock:
+            solution = self._memory.get(run_key)
+            if solution is not None:
+                self._memory.move_to_end(run_key)
+                self.hits += 1
+                return solution
+
+        path = self._path(run_key)
+        try:
+            solution = np.load(path)
+            os.utime(path)
+        except (FileNotFoundError, ValueError, EOFError):
+            self.misses += 1
+            return None
+
+        solution.setflags(write=False)
+        self.hits += 1
+        self._remember(run_key, solution)
+
+        return solution
+
+    def put(self, run_key: str, solution: np.array) -> np.array:
+        """Stores the solution of a key, evicting the least recently used entries if needed
+
+        Returns:
+            np.array: the read-only copy of the solution that was stored
+        """
+        solution = np.array(solution)
+        solution.setflags(write=False)
+
+        temporary = os.path.join(self.directory, f'{run_key}.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(temporary, 'wb') as file:
+            np.save(file, solution)
+        os.replace(temporary, self._path(run_key))
+
+        self._remember(run_key, solution)
+        self.evict()
+
+        return solution
+
+    def evict(self):
+        """Removes the least recently used entries on disk until they fit in max_bytes"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith('.npy'):
+                continue
+            try:
+                status = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((status.st_mtime, status.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Removes every entry, on disk and in memory"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(('.npy', '.tmp')):
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+    def size(self) -> int:
+        """Total size of the entries on disk, in bytes"""
+        return sum(entry.stat().st_size for entry in os.scandir(self.directory) if entry.name.endswith('.npy'))
+
+
+@functools.lru_cache(maxsize=None)
+def get_cache(directory: str = DEFAULT_DIRECTORY, max_bytes: int = 2**30) -> ResultCache:
+    """The ResultCache of a directory, shared by the calls of a process (with its memory tier)"""
+    return ResultCache(directory, max_bytes)
+
+
+def cached(solver, cache: ResultCache = None):
+    """Wraps a solver so that it consults a cache: solver(*args, **kwargs) is computed only the
+    first time, and then read back from the cache; the first run gives the same read-only array
+    as the later ones, so a caller cannot depend on whether it was a hit. Runs with an out buffer
+    or with stats, and runs that do not return a single array (e.g. with dense_output), are always
+    computed.
+
+    Args:
+        solver (callable): the solver, e.g. rk_sol.rk_solution
+        cache (ResultCache): the cache (get_cache() by default)
+
+    Returns:
+        callable: the solver with the same signature
+    """
+
+    signature = inspect.signature(solver)
+
+    @functools.wraps(solver)
+    def cached_solver(*args, **kwargs):
+        # out and stats may also be passed by position
+        arguments = signature.bind(*args, **kwargs).arguments
+        if arguments.get('out') is not None or arguments.get('stats') is not None:
+            return solver(*args, **kwargs)
+
+        results = cache if cache is not None else get_cache()
+        run_key = key(solver, *args, **kwargs)
+        solution = results.get(run_key)
+        if solution is None:
+            solution = solver(*args, **kwargs)
+            if isinstance(solution, np.ndarray):
+                solution = results.put(run_key, solution)
+
+        return solution
+
+    return cached_solver
@@ -1,52 +1,274 @@
+import functools
+import time
 import numpy as np
-import pandas as pd
 import eq_parameters
 import state_variables
 import cauchy_function
+import integrator
+import stimulus
 
-def rk_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict):
+def rk_step(t_k: float, y_k: np.array, delta_t: float, constants: dict, rates=eq_parameters.rates) -> np.array:
+    """Advances y one step with the classic (fourth order) Runge-Kutta's method
+
+    Args:
+        t_k (float): instant of time t_k
+        y_k (np.array): the value of y in the instant t_k, with shape (4,) or (N, 4)
+        delta_t (float): step size
+        constants (dict): the constants of the model
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+
+    Returns:
+        np.array: the approximation y_{k+1} of y(t_k + delta_t)
+    """
+    
+    k1 = cauchy_function.cauchy_function(t_k, y_k, constants, rates)
+    k2 = cauchy_function.cauchy_function(t_k + delta_t*0.5, y_k + delta_t*k1*0.5, constants, rates)
+    k3 = cauchy_function.cauchy_function(t_k + delta_t*0.5, y_k + delta_t*0.5*k2, constants, rates)
+    k4 = cauchy_function.cauchy_function(t_k + delta_t, y_k + delta_t*k3, constants, rates)
+    
+    return y_k + delta_t*(k1 + 2.*k2 + 2.*k3 + k4)/6.
+
+
+def rk_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                stride: int = 1, out: np.array = None, rates=eq_parameters.rates, stats=None):
     """Computes a numerical solution for the y(t) = [V(t), m(t), h(t), n(t)], the solution of the
     Hodgkin-Huxley differential equation via Runge-Kutta's method
 
     Args:
         time_interval ((float, float)): domain of the function (interval [a,b]) 
         n_steps (int): number of steps for discretize the domain
-        initial_y (np.array): the initial value of the vector y: y(0) = [V(0), m(0), h(0), n(0)]
-        constants: the constants g_Na, g_K, g_L, E_Na, E_K and E_L of the model
+        initial_y (np.array): the initial value of the vector y: y(0) = [V(0), m(0), h(0), n(0)],
+            or an (N, 4) array with the initial state of each neuron of a population
+        constants: the constants g_Na, g_K, g_L, E_Na, E_K and E_L of the model (scalars or
+            per-neuron (N,) arrays, see cauchy_function.batch_constants)
+        stride (int): stores one point every stride steps (1 stores all of them)
+        out (np.array): optional preallocated buffer for the solution (see integrator.allocate_solution)
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+        stats (instrumentation.SolverStats): optional stats filled with the evaluations of the
+            right-hand side, the steps and the time of each phase of the run
         
     Returns:
-        (np.array, np.array): tupla (X, Y), em que X = [t_0, t_1, t_2, ..., t_{n-1}] é 
-        o domínio discretizado e Y = [y_0, y_1, y_2, ..., y_{n-1}] é a solução aproximada
-        pelo método de Runge-Kutta
+        np.array: array (n//stride + 1, 5) cujas linhas [t_k, V_k, m_k, h_k, n_k] são o domínio
+        discretizado e a solução aproximada pelo método de Runge-Kutta; para uma população de
+        N neurônios o array tem forma (n//stride + 1, N, 5)
     """
     
-    discretize_domain, delta_t = cauchy_function.discretize_interval(time_interval, n_steps)
-    
-    solution = []
-    
-    y_aprox = []
-    
-    # y_0 = y(0)
-    y_aprox.append(initial_y)
-    
-    # evaluates y_{k+1} with y_k and t_k
-    for k, t_k in enumerate(discretize_domain[:-1]):
-        
-        #Classic Runge-Kutta
-        y_k = y_aprox[k]
-        k1 = cauchy_function.cauchy_function(t_k, y_k, constants)
-        k2 = cauchy_function.cauchy_function(t_k + delta_t*0.5, y_k + delta_t*k1*0.5, constants)
-        k3 = cauchy_function.cauchy_function(t_k + delta_t*0.5, y_k + delta_t*0.5*k2, constants)
-        k4 = cauchy_function.cauchy_function(t_k + delta_t, y_k + delta_t*k3, constants)
-        next_y = y_k + delta_t*(k1 + 2.*k2 + 2.*k3 + k4)/6.
-        y_aprox.append(next_y)
-    
-    # adds time stamps
-    for k, y_k in enumerate(y_aprox):
-        t_k = np.array([discretize_domain[k]])
-        time_stamped_sol = np.concatenate((t_k, y_k))
-        solution.append(time_stamped_sol)
-        
-    # solution = np.array(solution)
-    
-    return solution
\ No newline at end of file
+    if stats is not None:
+        stats.start('rk')
+        rates = stats.count_rates(rates)
+
+    step = functools.partial(rk_step, rates=rates)
+    solution = integrator.fixed_step_solution(step, time_interval, n_steps, initial_y, constants, stride, out, stats)
+
+    if stats is not None:
+        stats.end()
+
+    return solution
+
+
+# Dormand-Prince 5(4) coefficients (Butcher tableau, error weights b_5 - b_4 and the
+# coefficients of the fourth order continuous extension of Hairer & Wanner's DOPRI5)
+DOPRI_C = np.array([0., 1/5, 3/10, 4/5, 8/9, 1., 1.])
+DOPRI_A = [
+    [],
+    [1/5],
+    [3/40, 9/40],
+    [44/45, -56/15, 32/9],
+    [19372/6561, -25360/2187, 64448/6561, -212/729],
+    [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+    [35/384, 0., 500/1113, 125/192, -2187/6784, 11/84],
+]
+DOPRI_E = np.array([71/57600, 0., -71/16695, 71/1920, -17253/339200, 22/525, -1/40])
+DOPRI_D = np.array([-12715105075/11282082432, 0., 87487479700/32700410799, -10690763975/1880347072,
+                    701980252875/199316789632, -1453857185/822651844, 69997945/29380423])
+
+
+class DenseOutput:
+    """Continuous solution of an adaptive Runge-Kutta's run: evaluates the fourth order
+    interpolant of the step that contains each requested instant.
+
+    Args:
+        t_old (np.array): the instant where each accepted step starts
+        step_sizes (np.array): the size of each accepted step
+        coefficients (np.array): the 5 interpolation coefficients of each step, with shape
+            (n_accepted, 5) + shape of y
+    """
+
+    def __init__(self, t_old: np.array, step_sizes: np.array, coefficients: np.array):
+        self.t_old = t_old
+        self.step_sizes = step_sizes
+        self.coefficients = coefficients
+
+    def __call__(self, t) -> np.array:
+        """Evaluates y(t) = [V(t), m(t), h(t), n(t)] at the instants t.
+
+        Args:
+            t (float or np.array): instants inside the integrated interval
+
+        Returns:
+            np.array: y(t), with shape t.shape + shape of y
+        """
+        t = np.asarray(t, dtype=float)
+        index = np.clip(np.searchsorted(self.t_old, t, side='right') - 1, 0, len(self.t_old) - 1)
+
+        theta = (t - self.t_old[index])/self.step_sizes[index]
+        theta = theta.reshape(theta.shape + (1,)*(self.coefficients.ndim - 2))
+        theta_1 = 1. - theta
+
+        r = self.coefficients[index]
+        r0, r1, r2, r3, r4 = np.moveaxis(r, t.ndim, 0)
+
+        return r0 + theta*(r1 + theta_1*(r2 + theta*(r3 + theta_1*r4)))
+
+
+def _error_norm(error: np.array, scale: np.array) -> float:
+    return np.sqrt(np.mean((error/scale)**2))
+
+
+def _initial_step(t_0: float, y_0: np.array, f_0: np.array, constants: dict, rtol: float, atol: float,
+                  rates=eq_parameters.rates) -> float:
+    """Guesses the first step size from the size of y and of its first two derivatives
+    (Hairer, Norsett & Wanner, Solving ODEs I, section II.4)."""
+    scale = atol + rtol*np.abs(y_0)
+    d_0, d_1 = _error_norm(y_0, scale), _error_norm(f_0, scale)
+    h_0 = 1e-6 if d_0 < 1e-5 or d_1 < 1e-5 else 0.01*d_0/d_1
+
+    f_1 = cauchy_function.cauchy_function(t_0 + h_0, y_0 + h_0*f_0, constants, rates)
+    d_2 = _error_norm(f_1 - f_0, scale)/h_0
+
+    if max(d_1, d_2) <= 1e-15:
+        h_1 = max(1e-6, 1e-3*h_0)
+    else:
+        h_1 = (0.01/max(d_1, d_2))**(1/5)
+
+    return min(100*h_0, h_1)
+
+
+def dopri_solution(time_interval: (float, float), initial_y: np.array, constants: dict,
+                   rtol: float = 1e-6, atol: float = 1e-8, first_step: float = None, max_step: float = np.inf,
+                   dense_output: bool = False, rates=eq_parameters.rates, stats=None):
+    """Computes a numerical solution for the y(t) = [V(t), m(t), h(t), n(t)], the solution of the
+    Hodgkin-Huxley differential equation via the adaptive Runge-Kutta's method of Dormand-Prince 5(4).
+
+    The step size is chosen so that the local error estimated by the embedded fourth order
+    solution stays below atol + rtol*|y| (in RMS norm), so the spikes get small steps and the
+    flat intervals between them get large ones. With a stimulus.Stimulus current, the steps stop
+    exactly on its discontinuities (the pulse edges), so that no step straddles a jump of I(t).
+
+    Args:
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        initial_y (np.array): the initial value of the vector y: y(0) = [V(0), m(0), h(0), n(0)],
+            or an (N, 4) array with the initial state of each neuron of a population
+        constants: the constants g_Na, g_K, g_L, E_Na, E_K and E_L of the model
+        rtol (float): relative tolerance of the local error
+        atol (float): absolute tolerance of the local error
+        first_step (float): size of the first step (estimated from the derivatives when None)
+        max_step (float): largest step size allowed
+        dense_output (bool): also returns a DenseOutput that evaluates y at any instant of the interval
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+        stats (instrumentation.SolverStats): optional stats filled with the evaluations of the
+            right-hand side, the accepted and rejected steps and the time of each phase of the run
+
+    Returns:
+        np.array: array (n_accepted + 1, 5) cujas linhas [t_k, V_k, m_k, h_k, n_k] são os instantes
+        dos passos aceitos e a solução aproximada neles (ou (n_accepted + 1, N, 5) para uma população).
+        Com dense_output, retorna a tupla (solução, DenseOutput)
+    """
+
+    if stats is not None:
+        stats.start('dopri')
+        rates = stats.count_rates(rates)
+        start = time.perf_counter()
+
+    t, t_end = float(time_interval[0]), float(time_interval[1])
+    y = np.array(initial_y, dtype=float)
+    n_rejected = 0
+
+    current = constants['current']
+    stimulated = isinstance(current, stimulus.Stimulus)
+    edges, after_edge = [], False
+    if stimulated:
+        edges = current.discontinuities_in((t, t_end)).tolist()
+    step_constants = constants
+
+    k = np.empty((7,) + y.shape)
+    k[0] = cauchy_function.cauchy_function(t, y, constants, rates)
+
+    h = _initial_step(t, y, k[0], constants, rtol, atol, rates) if first_step is None else first_step
+    h = min(h, max_step, t_end - t)
+
+    times, states = [t], [y]
+    t_old, step_sizes, coefficients = [], [], []
+
+    while t < t_end:
+        if h < 1e-12*max(1., abs(t)):
+            raise RuntimeError(f'step size underflow at t = {t}')
+
+        last = t + h >= t_end
+        if last:
+            h = t_end - t
+
+        on_edge = bool(edges) and t + h >= edges[0]
+        if on_edge:
+            h, last = edges[0] - t, False
+        if stimulated:
+            # the current of the step, with I(t + h) from the left (the constants are not modified)
+            step_constants = dict(constants, current=stimulus.step_current(current, t, t + h))
+        if after_edge:
+            # the last stage of the previous step saw the current from before the edge
+            k[0] = cauchy_function.cauchy_function(t, y, step_constants, rates)
+            after_edge = False
+
+        for i in range(1, 7):
+            y_stage = y + h*np.tensordot(DOPRI_A[i], k[:i], axes=1)
+            k[i] = cauchy_function.cauchy_function(t + DOPRI_C[i]*h, y_stage, step_constants, rates)
+
+        # the seventh stage is evaluated at the fifth order solution (first same as last)
+        next_y = y_stage
+        error = h*np.tensordot(DOPRI_E, k, axes=1)
+        scale = atol + rtol*np.maximum(np.abs(y), np.abs(next_y))
+        error_norm = _error_norm(error, scale)
+
+        if error_norm <= 1.:
+            if dense_output:
+                y_diff = next_y - y
+                b_spline = h*k[0] - y_diff
+                t_old.append(t)
+                step_sizes.append(h)
+                coefficients.append([y, y_diff, b_spline, y_diff - h*k[6] - b_spline,
+                                     h*np.tensordot(DOPRI_D, k, axes=1)])
+
+            t = t_end if last else edges.pop(0) if on_edge else t + h
+            y = next_y
+            k[0] = k[6]
+            times.append(t)
+            states.append(y)
+            after_edge = on_edge
+
+            factor = 10. if error_norm == 0. else min(10., 0.9*error_norm**(-1/5))
+        else:
+            factor = max(0.2, 0.9*error_norm**(-1/5))
+            n_rejected += 1
+
+        h = min(h*factor, max_step)
+
+    if stats is not None:
+        stored = time.perf_counter()
+
+    solution = np.empty((len(times),) + y.shape[:-1] + (5,))
+    solution[..., 0] = np.reshape(times, (-1,) + (1,)*(y.ndim - 1))
+    solution[..., 1:] = states
+
+    if stats is not None:
+        # the accepted states are kept in lists during the integration and copied here
+        stats.n_accepted += len(times) - 1
+        stats.n_rejected += n_rejected
+        stats.n_steps += len(times) - 1 + n_rejected
+        stats.times['integrate'] += stored - start
+        stats.times['store'] += time.perf_counter() - stored
+        stats.end()
+
+    if dense_output:
+        return solution, DenseOutput(np.array(t_old), np.array(step_sizes), np.array(coefficients))
+
+    return solution
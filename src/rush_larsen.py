@@ -0,0 +1,144 @@
+import functools
+import numpy as np
+import eq_parameters
+import state_variables
+import stimulus
+import integrator
+
+def _exponential_step(t: float, y_k: np.array, frozen_y: np.array, delta_t: float, constants: dict,
+                      rates=eq_parameters.rates) -> np.array:
+    """Advances y_k over delta_t with the rates and the conductances frozen at the given state.
+    With them frozen, every equation is linear in its own variable: x' = alpha_x*(1 - x) - beta_x*x
+    for the gates and V' = (I - g(V - E))/C for the voltage, where g = g_Na*m^3*h + g_K*n^4 + g_L is
+    the total conductance and E = (g_Na*m^3*h*E_Na + g_K*n^4*E_K + g_L*E_L)/g, so each variable is
+    integrated exactly (generalized Rush-Larsen).
+
+    Args:
+        t (float): the instant where the current I is frozen
+        y_k (np.array): the value of y in the beginning of the step, with shape (4,) or (N, 4)
+        frozen_y (np.array): the state y where the rates and the conductances are frozen
+        delta_t (float): step size
+        constants (dict): the constants of the model
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+
+    Returns:
+        np.array: the approximation of y after the step
+    """
+
+    # unpacking the parameters from the dictionary "constants"
+    I, C = stimulus.current(constants, t), constants['capacitance']
+    g_Na, g_K, g_L = constants['g_Na'], constants['g_K'], constants['g_L']
+    E_Na, E_K, E_L = constants['E_Na'], constants['E_K'], constants['E_L']
+
+    V, m, h, n = frozen_y[..., 0], frozen_y[..., 1], frozen_y[..., 2], frozen_y[..., 3]
+
+    alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n = rates(V)
+
+    # V' = -(g/C)*(V - V_inf), with V_inf = E + I/g
+    g_Na_open, g_K_open = g_Na*m**3*h, g_K*n**4
+    g = g_Na_open + g_K_open + g_L
+    V_inf = (g_Na_open*E_Na + g_K_open*E_K + g_L*E_L + I)/g
+
+    next_y = np.empty_like(y_k)
+    next_y[..., 0] = V_inf + (y_k[..., 0] - V_inf)*np.exp(-delta_t*g/C)
+    next_y[..., 1] = state_variables.gate_exponential_step(alpha_m, beta_m, y_k[..., 1], delta_t)
+    next_y[..., 2] = state_variables.gate_exponential_step(alpha_h, beta_h, y_k[..., 2], delta_t)
+    next_y[..., 3] = state_variables.gate_exponential_step(alpha_n, beta_n, y_k[..., 3], delta_t)
+
+    return next_y
+
+
+def rush_larsen_step(t_k: float, y_k: np.array, delta_t: float, constants: dict, rates=eq_parameters.rates) -> np.array:
+    """Advances y one step with the Rush-Larsen's method: the gates m, h and n are linear for a
+    fixed V, so they are integrated exactly with V held at V_k, and V is integrated exactly
+    with the conductances held at their values in t_k
+
+    Args:
+        t_k (float): instant of time t_k
+        y_k (np.array): the value of y in the instant t_k, with shape (4,) or (N, 4)
+        delta_t (float): step size
+        constants (dict): the constants of the model
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+
+    Returns:
+        np.array: the approximation y_{k+1} of y(t_k + delta_t)
+    """
+
+    return _exponential_step(t_k, y_k, y_k, delta_t, constants, rates)
+
+
+def rush_larsen2_step(t_k: float, y_k: np.array, delta_t: float, constants: dict, rates=eq_parameters.rates) -> np.array:
+    """Advances y one step with the second order (midpoint) Rush-Larsen's method: a Rush-Larsen's
+    half step gives y_{k+1/2}, and the full step from y_k freezes the rates and the conductances
+    at y_{k+1/2}
+
+    Args:
+        t_k (float): instant of time t_k
+        y_k (np.array): the value of y in the instant t_k, with shape (4,) or (N, 4)
+        delta_t (float): step size
+        constants (dict): the constants of the model
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+
+    Returns:
+        np.array: the approximation y_{k+1} of y(t_k + delta_t)
+    """
+
+    half_y = _exponential_step(t_k, y_k, y_k, delta_t*0.5, constants, rates)
+
+    return _exponential_step(t_k + delta_t*0.5, y_k, half_y, delta_t, constants, rates)
+
+
+def rush_larsen_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                         stride: int = 1, out: np.array = None, rates=eq_parameters.rates):
+    """Computes a numerical solution for the y(t) = [V(t), m(t), h(t), n(t)], the solution of the
+    Hodgkin-Huxley differential equation via the (first order) Rush-Larsen's method. The exact
+    integration of the gates and of V (with frozen conductances) removes their stiffness, so much
+    larger steps stay stable than with Euler's or Runge-Kutta's methods.
+
+    Args:
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        initial_y (np.array): the initial value of the vector y: y(0) = [V(0), m(0), h(0), n(0)],
+            or an (N, 4) array with the initial state of each neuron of a population
+        constants: the constants g_Na, g_K, g_L, E_Na, E_K and E_L of the model (scalars or
+            per-neuron (N,) arrays, see cauchy_function.batch_constants)
+        stride (int): stores one point every stride steps (1 stores all of them)
+        out (np.array): optional preallocated buffer for the solution (see integrator.allocate_solution)
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+
+    Returns:
+        np.array: array (n//stride + 1, 5) cujas linhas [t_k, V_k, m_k, h_k, n_k] são o domínio
+        discretizado e a solução aproximada pelo método de Rush-Larsen; para uma população de
+        N neurônios o array tem forma (n//stride + 1, N, 5)
+    """
+
+    step = functools.partial(rush_larsen_step, rates=rates)
+
+    return integrator.fixed_step_solution(step, time_interval, n_steps, initial_y, constants, stride, out)
+
+
+def rush_larsen2_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                          stride: int = 1, out: np.array = None, rates=eq_parameters.rates):
+    """Computes a numerical solution for the y(t) = [V(t), m(t), h(t), n(t)], the solution of the
+    Hodgkin-Huxley differential equation via the second order (midpoint) Rush-Larsen's method
+
+    Args:
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        initial_y (np.array): the initial value of the vector y: y(0) = [V(0), m(0), h(0), n(0)],
+            or an (N, 4) array with the initial state of each neuron of a population
+        constants: the constants g_Na, g_K, g_L, E_Na, E_K and E_L of the model (scalars or
+            per-neuron (N,) arrays, see cauchy_function.batch_constants)
+        stride (int): stores one point every stride steps (1 stores all of them)
+        out (np.array): optional preallocated buffer for the solution (see integrator.allocate_solution)
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+
+    Returns:
+        np.array: array (n//stride + 1, 5) cujas linhas [t_k, V_k, m_k, h_k, n_k] são o domínio
+        discretizado e a solução aproximada pelo método de Rush-Larsen de segunda ordem; para uma
+        população de N neurônios o array tem forma (n//stride + 1, N, 5)
+    """
+
+    step = functools.partial(rush_larsen2_step, rates=rates)
+
+    return integrator.fixed_step_solution(step, time_interval, n_steps, initial_y, constants, stride, out)
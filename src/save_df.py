@@ -1,23 +1,10 @@
 import numpy as np
-import pandas as pd
 import euler_sol
 import rk_sol
-import splines
-import math
-
-file_V_int = "V_coef.txt"
-file_m_int = "m_coef.txt"
-file_n_int = "n_coef.txt"
-file_h_int = "h_coef.txt"
-
-def print_coef(coef, file):
-    with open(file, 'w') as file:
-        file.write("a_i & b_i & c_i & d_i \\\\ \n")
-        for i in range(0, len(coef), 4):
-            line = ' & '.join(["{:.4f}".format(value) for value in coef[i:i+4]]) + ' \\\\ \n'
-            file.write(line)
 
 def main():
+    import pandas as pd
+
     constants = {
         'current': 0., 
         'capacitance': 1.,
@@ -58,4 +45,5 @@ def main():
     
     return
 
-main()
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import numpy as np
+import cauchy_function
+import eq_parameters
+import eq_parameters_derivatives
+import integrator
+import stimulus
+
+PARAMETERS = ('g_Na', 'g_K', 'g_L', 'E_Na', 'E_K', 'E_L')
+
+
+def parameter_derivatives(t: float, y: np.array, constants: dict, parameters: tuple = PARAMETERS,
+                          rates=eq_parameters.rates) -> np.array:
+    """The derivatives df/dtheta of the right-hand side with respect to the parameters: only V'
+    depends on them, through V' = (I - g_Na m^3 h (V - E_Na) - g_K n^4 (V - E_K) - g_L (V - E_L))/C
+
+    Args:
+        t (float): the instant, where a stimulus.Stimulus current is evaluated (dV'/dC = -V'/C)
+        y (np.array): the state, with shape (4,) or (N, 4)
+        constants (dict): the constants of the model
+        parameters (tuple): the names of the parameters (of PARAMETERS, 'current' or 'capacitance')
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+
+    Returns:
+        np.array: the matrix df/dtheta, with shape (4, P) or (N, 4, P)
+    """
+
+    C = constants['capacitance']
+    V, m, h, n = y[..., 0], y[..., 1], y[..., 2], y[..., 3]
+    m_3h, n_4 = m**3*h, n**4
+
+    columns = {
+        'g_Na': lambda: -m_3h*(V - constants['E_Na']),
+        'g_K': lambda: -n_4*(V - constants['E_K']),
+        'g_L': lambda: -(V - constants['E_L']),
+        'E_Na': lambda: constants['g_Na']*m_3h,
+        'E_K': lambda: constants['g_K']*n_4,
+        'E_L': lambda: constants['g_L']*np.ones_like(V),
+        'current': lambda: np.ones_like(V),
+        'capacitance': lambda: -cauchy_function.cauchy_function(t, y, constants, rates)[..., 0],
+    }
+
+    derivatives = np.zeros(y.shape + (len(parameters),))
+    for j, name in enumerate(parameters):
+        derivatives[..., 0, j] = columns[name]()/C
+
+    return derivatives
+
+
+def sensitivity_solution(time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                         parameters: tuple = PARAMETERS, stride: int = 1, rates=eq_parameters.rates,
+                         rate_derivatives=eq_parameters_derivatives.rate_derivatives) -> (np.array, np.array):
+    """Computes the solution of the Hodgkin-Huxley equation with the classic Runge-Kutta's method
+    together with its forward sensitivities S = dy/dtheta, which follow dS/dt = J S + df/dtheta
+    with J the analytic Jacobian (cauchy_function.jacobian, built on eq_parameters_derivatives) and
+    S(t_0) = 0. One run gives the gradient of the trajectory with respect to every parameter.
+
+    Args:
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        initial_y (np.array): the initial value of y, with shape (4,) or (N, 4) for a batch of traces
+        constants (dict): the constants of the model (scalars or per-trace (N,) arrays); the current
+            may be a stimulus.Stimulus, applied to each step like in rk_sol.rk_solution
+        parameters (tuple): the names of the parameters theta
+        stride (int): stores one point every stride steps (1 stores all of them)
+        rates (callable): backend of the transition rates (see cauchy_function.cauchy_function)
+        rate_derivatives (callable): backend of the derivatives of the transition rates
+
+    Returns:
+        (np.array, np.array): a solução (n//stride + 1, 5) com linhas [t_k, V_k, m_k, h_k, n_k] (ou
+        (n//stride + 1, N, 5)), e as sensibilidades dV/dtheta em cada ponto, (n//stride + 1, P) (ou (n//stride + 1, N, P))
+    """
+
+    discretize_domain, delta_t = cauchy_function.discretize_interval(time_interval, n_steps)
+
+    y_k = np.array(initial_y, dtype=float)
+    S_k = np.zeros(y_k.shape + (len(parameters),))
+
+    solution = integrator.allocate_solution(discretize_domain, y_k, stride)
+    sensitivities = np.empty(solution.shape[:-1] + (len(parameters),))
+    solution[0, ..., 1:] = y_k
+    sensitivities[0] = S_k[..., 0, :]
+
+    def derivative(t, y, S, constants):
+        J = cauchy_function.jacobian(t, y, constants, rates, rate_derivatives)
+        return (cauchy_function.cauchy_function(t, y, constants, rates),
+                J @ S + parameter_derivatives(t, y, constants, parameters, rates))
+
+    # each step gets its own current, like in rk_sol.rk_solution (see stimulus.step_constants)
+    for k, constants_k in zip(range(n_steps), stimulus.step_constants(constants, discretize_domain)):
+        t_k = discretize_domain[k]
+        k1_y, k1_S = derivative(t_k, y_k, S_k, constants_k)
+        k2_y, k2_S = derivative(t_k + delta_t*0.5, y_k + delta_t*0.5*k1_y, S_k + delta_t*0.5*k1_S, constants_k)
+        k3_y, k3_S = derivative(t_k + delta_t*0.5, y_k + delta_t*0.5*k2_y, S_k + delta_t*0.5*k2_S, constants_k)
+        k4_y, k4_S = derivative(t_k + delta_t, y_k + delta_t*k3_y, S_k + delta_t*k3_S, constants_k)
+
+        y_k = y_k + delta_t*(k1_y + 2.*k2_y + 2.*k3_y + k4_y)/6.
+        S_k = S_k + delta_t*(k1_S + 2.*k2_S + 2.*k3_S + k4_S)/6.
+
+        if (k + 1) % stride == 0:
+            solution[(k + 1)//stride, ..., 1:] = y_k
+            sensitivities[(k + 1)//stride] = S_k[..., 0, :]
+
+    return solution, sensitivities
+
+
+def fit(t: np.array, traces: np.array, initial_y: np.array, constants: dict, parameters: tuple = ('g_Na', 'g_K', 'g_L'),
+        shared: bool = True, substeps: int = 10, **options) -> dict:
+    """Fits parameters of the model to recorded voltage traces by nonlinear least squares
+    (scipy.optimize.least_squares), with the exact gradients of the forward sensitivities: each
+    evaluation of the residuals and of their Jacobian costs one run of sensitivity_solution, with
+    all the traces integrated at once as a batch.
+
+    Args:
+        t (np.array): the evenly spaced instants of the samples (the same for every trace)
+        traces (np.array): the recorded voltages, with shape (k,) or (N, k) for N traces
+        initial_y (np.array): the initial state of the traces, with shape (4,) or (N, 4)
+        constants (dict): the constants of the model, which give the initial guess of the parameters
+            (the other ones, e.g. a different current for each trace, may be per-trace (N,) arrays)
+        parameters (tuple): the names of the fitted parameters
+        shared (bool): fits one set of parameters to all the traces; otherwise each trace gets its own
+        substeps (int): steps of the solver between two samples
+        **options: options of scipy.optimize.least_squares
+
+    Returns:
+        dict: the fitted parameters (floats, or (N,) arrays when not shared), plus 'cost' (half the
+        sum of the squared residuals) and 'result' (the scipy.optimize.OptimizeResult)
+    """
+    from scipy.optimize import least_squares
+
+    traces = np.atleast_2d(np.asarray(traces, dtype=float))
+    n_traces, n_samples = traces.shape
+    n_parameters = len(parameters)
+
+    batch = cauchy_function.batch_constants(constants, n_traces)
+    initial_y = np.broadcast_to(np.asarray(initial_y, dtype=float), (n_traces, 4))
+    time_interval, n_steps = (t[0], t[-1]), (n_samples - 1)*substeps
+
+    def unpack(theta):
+        values = theta.reshape(-1, n_parameters) if not shared else np.broadcast_to(theta, (n_traces, n_parameters))
+        return dict(batch, **{name: values[:, j] for j, name in enumerate(parameters)})
+
+    cache = {}
+
+    def simulate(theta):
+        key = theta.tobytes()
+        if key not in cache:
+            cache.clear()
+            cache[key] = sensitivity_solution(time_interval, n_steps, initial_y, unpack(theta), parameters, substeps)
+        return cache[key]
+
+    def residuals(theta):
+        solution, _ = simulate(theta)
+        return (solution[:, :, 1].T - traces).ravel()
+
+    def jacobian(theta):
+        _, sensitivities = simulate(theta)
+        # (N, k, P): the derivative of each sample of each trace
+        gradients = np.moveaxis(sensitivities, 0, 1)
+        if shared:
+            return gradients.reshape(-1, n_parameters)
+
+        blocks = np.zeros((n_traces, n_samples, n_traces, n_parameters))
+        blocks[np.arange(n_traces), :, np.arange(n_traces)] = gradients
+        return blocks.reshape(n_traces*n_samples, n_traces*n_parameters)
+
+    guess = np.array([batch[name] for name in parameters]).T
+    theta_0 = guess[0] if shared else guess.ravel()
+
+    result = least_squares(residuals, theta_0, jac=jacobian, **{'x_scale': 'jac', **options})
+
+    values = unpack(result.x)
+    fitted = {name: (float(values[name][0]) if shared else values[name]) for name in parameters}
+    fitted.update({'cost': result.cost, 'result': result})
+
+    return fitted
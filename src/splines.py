@@ -1,32 +1,109 @@
 import numpy as np
-import numpy as np
-import pandas as pd
-from scipy.interpolate import CubicSpline
-
-def splines(solution: list):
-    t, V, m, n, h = zip(*solution)
-
-    sorted_indices = np.argsort(t)
-    t_sorted = np.array(t)[sorted_indices]
-    V_sorted = np.array(V)[sorted_indices]
-    m_sorted = np.array(m)[sorted_indices]
-    n_sorted = np.array(n)[sorted_indices]
-    h_sorted = np.array(h)[sorted_indices]
-
-    V_int = CubicSpline(t_sorted, V_sorted, bc_type='natural')
-    m_int = CubicSpline(t_sorted, m_sorted, bc_type='natural')
-    n_int = CubicSpline(t_sorted, n_sorted, bc_type='natural')
-    h_int = CubicSpline(t_sorted, h_sorted, bc_type='natural')
-
-    V_coef = V_int.c
-    m_coef = m_int.c
-    n_coef = n_int.c
-    h_coef = h_int.c
-
-    points_V = np.array(list(zip(t_sorted, V_int(t_sorted))))
-    points_m = np.array(list(zip(t_sorted, m_int(t_sorted))))
-    points_n = np.array(list(zip(t_sorted, n_int(t_sorted))))
-    points_h = np.array(list(zip(t_sorted, h_int(t_sorted))))
-
-    return V_coef, m_coef, n_coef, h_coef, points_V, points_m, points_n, points_h
-    
+from scipy.interpolate import CubicSpline, PPoly
+
+COMPONENTS = ('V', 'm', 'h', 'n')
+
+
+class StateSpline:
+    """Natural cubic spline of the whole state [V, m, h, n] of a solution: a single spline over
+    the (n, 4) array, evaluated lazily on any query grid. The time stamps are only sorted when
+    they are not already increasing (the solvers write them in order).
+
+    Args:
+        solution (np.array): the rows [t_k, V_k, m_k, h_k, n_k] of a solver, with shape (n, 5)
+    """
+
+    def __init__(self, solution: np.array):
+        solution = np.asarray(solution, dtype=float)
+        t, y = solution[:, 0], solution[:, 1:]
+
+        if np.any(np.diff(t) <= 0.):
+            order = np.argsort(t, kind='stable')
+            t, y = t[order], y[order]
+
+        self.spline = CubicSpline(t, y, axis=0, bc_type='natural')
+
+    @classmethod
+    def from_coefficients(cls, t: np.array, coefficients: np.array):
+        """Rebuilds a spline from its knots and coefficients (see save and load)"""
+        spline = cls.__new__(cls)
+        spline.spline = PPoly.construct_fast(coefficients, t)
+
+        return spline
+
+    @property
+    def t(self) -> np.array:
+        """The knots t_0 < t_1 < ... < t_n"""
+        return self.spline.x
+
+    @property
+    def coefficients(self) -> np.array:
+        """The coefficients, with shape (4, n, 4): [k, i, j] multiplies (t - t_i)^(3 - k) in the
+        interval i of the component j (V, m, h, n)"""
+        return self.spline.c
+
+    def __call__(self, t) -> np.array:
+        """Evaluates [V(t), m(t), h(t), n(t)], with shape t.shape + (4,)"""
+        return self.spline(t)
+
+    def resample(self, t, batch_size: int = 65536):
+        """Evaluates the spline on the query instants t, a batch at a time
+
+        Args:
+            t (np.array): the query instants
+            batch_size (int): number of instants evaluated at once
+
+        Yields:
+            np.array: the rows [t, V, m, h, n] of each batch, with shape (batch_size, 5) (the last one may be shorter)
+        """
+
+        t = np.asarray(t, dtype=float)
+        for start in range(0, len(t), batch_size):
+            batch = t[start:start + batch_size]
+            yield np.column_stack((batch, self.spline(batch)))
+
+    def resample_uniform(self, n_points: int, batch_size: int = 65536):
+        """Evaluates the spline on n_points evenly spaced instants between the first and the last
+        knot, a batch at a time, without building the whole grid
+
+        Yields:
+            np.array: the rows [t, V, m, h, n] of each batch
+        """
+
+        t_0, t_1 = self.t[0], self.t[-1]
+        delta_t = (t_1 - t_0)/(n_points - 1)
+        for start in range(0, n_points, batch_size):
+            batch = t_0 + delta_t*np.arange(start, min(start + batch_size, n_points))
+            yield np.column_stack((batch, self.spline(batch)))
+
+    def save(self, path: str):
+        """Saves the knots and the coefficients in the binary .npz format (see load)"""
+        np.savez(path, t=self.t, coefficients=self.coefficients)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            return cls.from_coefficients(data['t'], data['coefficients'])
+
+    def export_coefficients(self, file: str, component: str, format: str = 'latex', precision: int = 4):
+        """Writes the table of coefficients of one component, one line per interval i with
+        S_i(t) = a_i + b_i(t - t_i) + c_i(t - t_i)^2 + d_i(t - t_i)^3
+
+        Args:
+            file (str): the file to be written
+            component (str): one of 'V', 'm', 'h', 'n'
+            format (str): 'latex' for the rows of a tabular, 'text' for columns separated by spaces
+            precision (int): number of decimal places
+        """
+
+        if format not in ('latex', 'text'):
+            raise ValueError(f"unknown format {format!r}, expected 'latex' or 'text'")
+
+        # the coefficients of the spline go from the cubic term to the constant one
+        table = self.coefficients[::-1, :, COMPONENTS.index(component)].T
+
+        if format == 'latex':
+            np.savetxt(file, table, fmt=f'%.{precision}f', delimiter=' & ', newline=' \\\\ \n',
+                       header='a_i & b_i & c_i & d_i', comments='')
+        else:
+            np.savetxt(file, table, fmt=f'%.{precision}f', header='a_i b_i c_i d_i', comments='')
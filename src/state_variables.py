@@ -26,8 +26,8 @@ def der_Voltage(
     C = capacitance
     I = current
     
-    # unpacking the parameters from the dictionary "constants"
-    I, C = constants['current'], constants['capacitance']
+    # unpacking the parameters from the dictionary "constants" (I and C come as arguments, so
+    # that the current may depend on time)
     g_Na, g_K, g_L = constants['g_Na'], constants['g_K'], constants['g_L']
     E_Na, E_K, E_L = constants['E_Na'], constants['E_K'], constants['E_L']
     
@@ -81,4 +81,24 @@ def der_n(alfa_n: float, beta_n: float, n: float) -> float:
         float: the derivative of the probability of opening of potassium channel by voltage
     """    
     
-    return alfa_n*(1-n) - beta_n*n
\ No newline at end of file
+    return alfa_n*(1-n) - beta_n*n
+
+
+def gate_exponential_step(alfa: float, beta: float, x: float, delta_t: float) -> float:
+    """Advances a gate x (m, h or n) exactly over a step delta_t with the voltage held constant.
+    For a fixed V the equation x' = alfa*(1 - x) - beta*x is linear, with solution
+    x(t + delta_t) = x_inf + (x(t) - x_inf)*e^(-delta_t*(alfa + beta)), where x_inf = alfa/(alfa + beta)
+
+    Args:
+        alfa (float): opening transition rate of the gate
+        beta (float): closing transition rate of the gate
+        x (float): probability of the gate being open
+        delta_t (float): step size
+
+    Returns:
+        float: the probability of the gate being open after the step
+    """
+    
+    x_inf = alfa/(alfa + beta)
+    
+    return x_inf + (x - x_inf)*np.exp(-delta_t*(alfa + beta))
@@ -0,0 +1,123 @@
+import functools
+import numpy as np
+import cauchy_function
+import eq_parameters
+import eq_parameters_derivatives
+import stimulus
+
+# the interval where the equilibrium voltage is searched, in mV
+V_MIN, V_MAX = -100., 150.
+
+
+def gate_steady_states(voltage) -> (np.array, np.array):
+    """The steady states x_inf(V) = alpha/(alpha + beta) of the gates m, h and n, and their
+    derivatives dx_inf/dV = (alpha'*beta - alpha*beta')/(alpha + beta)^2
+
+    Args:
+        voltage (float or np.array): voltage V
+
+    Returns:
+        (np.array, np.array): [m_inf, h_inf, n_inf] and their derivatives, with shape (3,) + V.shape
+    """
+
+    voltage = np.asarray(voltage, dtype=float)
+    rates = np.array(eq_parameters.rates(voltage))
+    derivatives = np.array(eq_parameters_derivatives.rate_derivatives(voltage))
+
+    alpha, beta = rates[0::2], rates[1::2]
+    der_alpha, der_beta = derivatives[0::2], derivatives[1::2]
+    total = alpha + beta
+
+    return alpha/total, (der_alpha*beta - alpha*der_beta)/total**2
+
+
+def _current_balance(V: np.array, I, g_Na, g_K, g_L, E_Na, E_K, E_L) -> (np.array, np.array):
+    """The membrane current F(V) = I - g_Na m_inf^3 h_inf (V - E_Na) - g_K n_inf^4 (V - E_K) - g_L (V - E_L)
+    with the gates at their steady states, which vanishes at the equilibria, and its derivative"""
+    (m, h, n), (dm, dh, dn) = gate_steady_states(V)
+
+    g_Na_open, g_K_open = g_Na*m**3*h, g_K*n**4
+    F = I - g_Na_open*(V - E_Na) - g_K_open*(V - E_K) - g_L*(V - E_L)
+    dF = (-g_Na_open - g_K_open - g_L
+          - g_Na*(3.*m**2*h*dm + m**3*dh)*(V - E_Na)
+          - g_K*4.*n**3*dn*(V - E_K))
+
+    return F, dF
+
+
+@functools.lru_cache(maxsize=1024)
+def _solve(key: tuple, tol: float, max_iterations: int) -> (np.array, np.array):
+    constants = {name: np.array(value) for name, value in key}
+    I, C = constants['current'], constants['capacitance']
+    parameters = (I, constants['g_Na'], constants['g_K'], constants['g_L'],
+                  constants['E_Na'], constants['E_K'], constants['E_L'])
+
+    # Newton's method on V, kept inside a bracket [low, high] of the root: a step that leaves it
+    # is replaced by a bisection (F(V_MIN) > 0 > F(V_MAX) for the usual constants)
+    shape = np.broadcast(*parameters).shape
+    low, high = np.full(shape, V_MIN), np.full(shape, V_MAX)
+    V = np.zeros(shape)
+
+    for _ in range(max_iterations):
+        F, dF = _current_balance(V, *parameters)
+        low = np.where(F > 0., V, low)
+        high = np.where(F > 0., high, V)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            newton = V - F/dF
+        inside = np.isfinite(newton) & (newton > low) & (newton < high)
+        next_V = np.where(inside, newton, 0.5*(low + high))
+
+        converged = np.all(np.abs(next_V - V) <= tol*(1. + np.abs(V)))
+        V = next_V
+        if converged:
+            break
+    else:
+        raise RuntimeError(f'the steady state did not converge in {max_iterations} iterations')
+
+    gates, _ = gate_steady_states(V)
+    y = np.stack((V,) + tuple(gates), axis=-1)
+    eigenvalues = np.linalg.eigvals(cauchy_function.jacobian(0., y, constants))
+
+    y.setflags(write=False)
+    eigenvalues.setflags(write=False)
+
+    return y, eigenvalues
+
+
+def _key(constants: dict) -> tuple:
+    """A hashable key of the constants (per-neuron arrays become tuples)"""
+    key = []
+    for name, value in sorted(constants.items()):
+        if name == 'current':
+            value = stimulus.current(constants, 0.)
+        value = np.asarray(value, dtype=float)
+        key.append((name, float(value) if value.ndim == 0 else tuple(value.tolist())))
+
+    return tuple(key)
+
+
+def steady_state(constants: dict, tol: float = 1e-12, max_iterations: int = 100) -> (np.array, np.array):
+    """The equilibrium y* = [V*, m_inf(V*), h_inf(V*), n_inf(V*)] with f(y*) = 0: with the gates at
+    their steady states only the current balance F(V) = 0 remains, solved by Newton's method on V
+    with the analytic derivatives of eq_parameters_derivatives. The results are memoized by the
+    values of the constants, so a sweep computes each equilibrium only once.
+
+    Args:
+        constants (dict): the constants of the model (scalars, or per-neuron (N,) arrays for a
+            population); a stimulus.Stimulus current is taken at t = 0
+        tol (float): relative tolerance of V*
+        max_iterations (int): maximum number of Newton's iterations
+
+    Returns:
+        (np.array, np.array): y*, with shape (4,) or (N, 4), and the eigenvalues of the Jacobian in
+        y*, with shape (4,) or (N, 4) (y* is stable when all their real parts are negative); both
+        are read-only, since they are shared by the memoized calls
+    """
+
+    return _solve(_key(constants), tol, max_iterations)
+
+
+def is_stable(eigenvalues: np.array) -> np.array:
+    """Whether the equilibria of the eigenvalues of steady_state are stable"""
+    return np.all(eigenvalues.real < 0., axis=-1)
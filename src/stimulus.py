@@ -0,0 +1,268 @@
+import bisect
+import fractions
+import itertools
+import math
+import numpy as np
+
+
+class Stimulus:
+    """Injected current I(t) compiled into segments: I(t) = a_i + b_i*t for t_i <= t < t_{i+1},
+    with t_0 = -inf. It replaces the constant constants['current'] of the model, and is evaluated
+    with a binary search in the breakpoints; at a breakpoint I(t) takes the value of the segment
+    that starts there. A Stimulus is not modified after it is built, so it can be shared by the
+    runs of a sweep and be part of the key of a cached run.
+
+    The fixed step solvers do not evaluate it in the right-hand side: they give each step its own
+    current (see step_constants), a float where the current is constant in the step.
+
+    Args:
+        times (np.array): the breakpoints t_1 < t_2 < ... where each segment after the first starts
+        values (np.array): the current at the start of each segment (one more than the breakpoints,
+            the first one being the constant current before t_1)
+        slopes (np.array): the slope of each segment (zero for piecewise constant currents)
+    """
+
+    def __init__(self, times: np.array, values: np.array, slopes: np.array = None):
+        times = np.asarray(times, dtype=float)
+        values = np.asarray(values, dtype=float)
+        slopes = np.zeros(len(values)) if slopes is None else np.asarray(slopes, dtype=float)
+
+        if len(values) != len(times) + 1 or len(slopes) != len(values):
+            raise ValueError('values and slopes must have one entry more than times')
+        if np.any(np.diff(times) <= 0.) or slopes[0] != 0.:
+            raise ValueError('times must be increasing and the first segment constant')
+
+        self.times = np.concatenate(([-np.inf], times))
+        self.slopes = slopes
+        self.intercepts = values - slopes*np.concatenate(([0.], times))
+
+        # the current just before each breakpoint, to find the jumps of I(t)
+        before = self.intercepts[:-1] + self.slopes[:-1]*times
+        jumps = np.abs(values[1:] - before) > 1e-12*np.maximum(1., np.abs(before))
+        self.discontinuities = times[jumps]
+
+        self._times = self.times.tolist()
+        self._intercepts = self.intercepts.tolist()
+        self._slopes = self.slopes.tolist()
+
+    def __call__(self, t):
+        """Evaluates I(t) at an instant or an array of instants"""
+        if np.ndim(t) == 0:
+            i = bisect.bisect_right(self._times, t) - 1
+            return self._intercepts[i] + self._slopes[i]*t
+
+        t = np.asarray(t, dtype=float)
+        i = np.searchsorted(self.times, t, side='right') - 1
+
+        return self.intercepts[i] + self.slopes[i]*t
+
+    def left_limit(self, t: float) -> float:
+        """The limit of I(s) as s -> t from the left"""
+        i = bisect.bisect_left(self._times, t) - 1
+        return self._intercepts[i] + self._slopes[i]*t
+
+    def discontinuities_in(self, time_interval: (float, float)) -> np.array:
+        """The jumps of I(t) strictly inside the interval (a, b)"""
+        start, stop = time_interval
+        return self.discontinuities[(self.discontinuities > start) & (self.discontinuities < stop)]
+
+
+class StepCurrent:
+    """The current of a Stimulus in one step [t_start, t_end] of a solver, where it is not constant:
+    its values at the start, at the middle and at the end of the step (the only instants where the
+    fixed step methods evaluate it) are computed once, and any other instant is evaluated on the
+    stimulus. At t_end it takes the limit from the left, so a step that stops exactly on a pulse
+    edge only sees the current from before the edge. It is not modified after it is built.
+
+    Args:
+        stimulus (Stimulus): the stimulus
+        t_start (float): start of the step
+        t_end (float): end of the step
+        start (float): I(t_start)
+        middle (float): I((t_start + t_end)/2)
+        end (float): the limit of I(t) as t -> t_end from the left
+    """
+
+    __slots__ = ('stimulus', 't_start', 't_end', 'values', '_inverse_half_step')
+
+    def __init__(self, stimulus: Stimulus, t_start: float, t_end: float, start: float, middle: float, end: float):
+        self.stimulus = stimulus
+        self.t_start = t_start
+        self.t_end = t_end
+        self.values = (start, middle, end)
+        self._inverse_half_step = 2./(t_end - t_start)
+
+    def __call__(self, t):
+        if np.ndim(t) == 0:
+            # t_start, the middle and t_end are the positions 0, 1 and 2 of the step
+            position = (t - self.t_start)*self._inverse_half_step
+            j = round(position)
+            if 0 <= j <= 2 and abs(position - j) < 1e-9:
+                return self.values[j]
+
+        return self.stimulus(t)
+
+
+def evaluate(I, t):
+    """The value in the instant t of a current: I(t) for a Stimulus or a StepCurrent, I itself
+    for a constant one (a float or a per-neuron array)"""
+    return I(t) if isinstance(I, (Stimulus, StepCurrent)) else I
+
+
+def current(constants, t: float):
+    """The injected current of the model in the instant t: constants['current'], or its value in
+    t when it is a Stimulus (or the StepCurrent of a step)"""
+    return evaluate(constants['current'], t)
+
+
+def step_current(stimulus: Stimulus, t_start: float, t_end: float):
+    """The current of a stimulus in the step [t_start, t_end] of a solver: a float when I(t) is
+    constant in the whole step, otherwise its StepCurrent
+
+    Returns:
+        float or StepCurrent: the current of the step
+    """
+
+    i = bisect.bisect_right(stimulus._times, t_start) - 1
+    if bisect.bisect_left(stimulus._times, t_end) - 1 == i and stimulus._slopes[i] == 0.:
+        return stimulus._intercepts[i]
+
+    return StepCurrent(stimulus, t_start, t_end, stimulus(t_start), stimulus((t_start + t_end)*0.5),
+                       stimulus.left_limit(t_end))
+
+
+def step_currents(stimulus: Stimulus, discretize_domain: np.array) -> list:
+    """The current of every step of a grid (see step_current), computed with one binary search
+    per breakpoint kind for the whole grid
+
+    Args:
+        stimulus (Stimulus): the stimulus
+        discretize_domain (np.array): the discretized interval [t_0, t_1, ..., t_n]
+
+    Returns:
+        list: the n currents, floats or StepCurrent
+    """
+
+    t_start, t_end = discretize_domain[:-1], discretize_domain[1:]
+    first = np.searchsorted(stimulus.times, t_start, side='right') - 1
+    last = np.searchsorted(stimulus.times, t_end, side='left') - 1
+    constant = (first == last) & (stimulus.slopes[first] == 0.)
+
+    currents = np.where(constant, stimulus.intercepts[first], 0.).tolist()
+    for k in np.flatnonzero(~constant).tolist():
+        currents[k] = step_current(stimulus, float(t_start[k]), float(t_end[k]))
+
+    return currents
+
+
+def step_constants(constants, discretize_domain: np.array, block_size: int = 4096):
+    """The constants of each step of a fixed step solver over discretize_domain: when the current
+    is a Stimulus, a copy of the constants with the current of the step (see step_current), built
+    a block of steps at a time and shared by the consecutive steps with the same constant current,
+    so a new copy is only made at the edges of the segments; otherwise the constants themselves.
+    The constants given are never modified, so they can be shared between runs (and the steps
+    must not modify theirs).
+
+    Args:
+        constants (dict or fused_rhs.Parameters): the constants of the model
+        discretize_domain (np.array): the discretized interval [t_0, t_1, ..., t_n]
+        block_size (int): number of steps whose currents are computed at once
+
+    Returns:
+        iterator: the constants of each of the n steps
+    """
+
+    I = constants['current'] if isinstance(constants, dict) else constants.current
+    n_steps = len(discretize_domain) - 1
+    if not isinstance(I, Stimulus):
+        return itertools.repeat(constants, n_steps)
+
+    def replace(value):
+        return dict(constants, current=value) if isinstance(constants, dict) else constants._replace(current=value)
+
+    def steps():
+        constants_k, current_k = None, None
+        for start in range(0, n_steps, block_size):
+            for value in step_currents(I, discretize_domain[start:start + block_size + 1]):
+                # the steps of a segment with a constant current share the same constants
+                if constants_k is None or not (isinstance(value, float) and isinstance(current_k, float)
+                                               and value == current_k):
+                    constants_k, current_k = replace(value), value
+                yield constants_k
+
+    return steps()
+
+
+def aligned_n_steps(time_interval: (float, float), n_steps: int, stimulus: Stimulus) -> int:
+    """The smallest number of steps, at least n_steps, whose evenly spaced grid of the interval
+    has a point on every discontinuity of the stimulus, so that no step straddles a pulse edge
+
+    Returns:
+        int: the number of steps
+    """
+
+    start, stop = time_interval
+    multiple = 1
+    for edge in stimulus.discontinuities_in(time_interval):
+        fraction = fractions.Fraction((edge - start)/(stop - start)).limit_denominator(10**9)
+        multiple = math.lcm(multiple, fraction.denominator)
+
+    return -(-n_steps//multiple)*multiple
+
+
+def piecewise_constant(times: np.array, values: np.array, baseline: float = 0.) -> Stimulus:
+    """I(t) = values[i] for times[i] <= t < times[i + 1] (the last value holds until the end),
+    and baseline before times[0]"""
+    return Stimulus(times, np.concatenate(([baseline], values)))
+
+
+def pulse_train(amplitude: float, width: float, period: float, start: float = 0., n_pulses: int = 1,
+                baseline: float = 0.) -> Stimulus:
+    """n_pulses square pulses of the given amplitude and width, one every period from start
+
+    Args:
+        amplitude (float): current during the pulses
+        width (float): duration of each pulse, in ms
+        period (float): time between the starts of two pulses, in ms
+        start (float): start of the first pulse
+        n_pulses (int): number of pulses
+        baseline (float): current between the pulses
+
+    Returns:
+        Stimulus: the pulse train
+    """
+
+    if not 0. < width < period:
+        raise ValueError(f'the width of the pulses must be in (0, period), got {width}')
+
+    onsets = start + period*np.arange(n_pulses)
+    times = np.column_stack((onsets, onsets + width)).ravel()
+    values = np.tile([amplitude, baseline], n_pulses)
+
+    return piecewise_constant(times, values, baseline)
+
+
+def ramp(t_start: float, t_stop: float, I_start: float, I_stop: float, baseline: float = 0.) -> Stimulus:
+    """Baseline before t_start, then a linear ramp from I_start to I_stop, and I_stop after t_stop"""
+    slope = (I_stop - I_start)/(t_stop - t_start)
+    return Stimulus([t_start, t_stop], [baseline, I_start, I_stop], [0., slope, 0.])
+
+
+def sampled_waveform(t: np.array, values: np.array, baseline: float = 0.) -> Stimulus:
+    """A recorded current, linearly interpolated between its samples (t_i, values_i), and
+    baseline outside of the recording
+
+    Args:
+        t (np.array): increasing instants of the samples
+        values (np.array): the current in each sample
+        baseline (float): current before the first and after the last sample
+
+    Returns:
+        Stimulus: the waveform
+    """
+
+    t, values = np.asarray(t, dtype=float), np.asarray(values, dtype=float)
+    slopes = np.diff(values)/np.diff(t)
+
+    return Stimulus(t, np.concatenate(([baseline], values[:-1], [baseline])),
+                    np.concatenate(([0.], slopes, [0.])))
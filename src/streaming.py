@@ -0,0 +1,255 @@
+import numpy as np
+import euler_sol
+import implicit_euler
+import rk_sol
+import rush_larsen
+import stimulus
+import trajectory_store
+
+# one step methods of the fixed step solvers; implicit Euler keeps state between steps, so a
+# new ImplicitEulerStep is created for each stream
+STEPS = {
+    'euler': euler_sol.euler_step,
+    'implicit_euler': implicit_euler.ImplicitEulerStep,
+    'rk': rk_sol.rk_step,
+    'rush_larsen': rush_larsen.rush_larsen_step,
+    'rush_larsen2': rush_larsen.rush_larsen2_step,
+}
+
+
+def resolve_step(step):
+    """Returns the one step method of a name of STEPS (a new one for stateful methods), or step itself"""
+    if isinstance(step, str):
+        if step not in STEPS:
+            raise ValueError(f'unknown method {step!r}, expected one of {sorted(STEPS)}')
+        step = STEPS[step]
+    if step is implicit_euler.ImplicitEulerStep:
+        step = step()
+
+    return step
+
+
+def stream(step, initial_y: np.array, constants: dict, delta_t: float, t_0: float = 0., n_steps: int = None,
+           chunk_size: int = 4096, stride: int = 1):
+    """Integrates the Hodgkin-Huxley equation step by step and yields the solution in chunks of
+    chunk_size rows [t_k, V_k, m_k, h_k, n_k], so that only one chunk is kept in memory whatever
+    the length of the simulation. With n_steps None the generator never stops. With a
+    stimulus.Stimulus current, each step gets its own current like in integrator.fixed_step_solution
+    (see stimulus.step_constants), so a stream gives the same solution as the fixed step solvers.
+
+    The same buffer is reused for every chunk: a consumer that keeps a chunk must copy it.
+
+    Args:
+        step (str or callable): a method of STEPS, or a one step method step(t_k, y_k, delta_t, constants)
+        initial_y (np.array): the initial value of y, with shape (4,) or (N, 4)
+        constants (dict): the constants of the model
+        delta_t (float): step size
+        t_0 (float): initial instant
+        n_steps (int): number of steps, or None for an unbounded simulation
+        chunk_size (int): number of rows of each chunk
+        stride (int): keeps one row every stride steps
+
+    Yields:
+        np.array: chunks with shape (k, 5), or (k, N, 5) for a population, with k <= chunk_size
+    """
+
+    if stride < 1 or (n_steps is not None and n_steps % stride != 0):
+        raise ValueError(f'stride must be a positive integer dividing the number of steps {n_steps}, '
+                         f'so that the last state is kept, got {stride}')
+
+    step = resolve_step(step)
+    y_k = np.array(initial_y, dtype=float)
+    chunk = np.empty((chunk_size,) + y_k.shape[:-1] + (5,))
+
+    chunk[0, ..., 0] = t_0
+    chunk[0, ..., 1:] = y_k
+    row, k = 1, 0
+
+    while n_steps is None or k < n_steps:
+        # the steps that fill a chunk, with the constants of each one
+        n_block = chunk_size*stride if n_steps is None else min(chunk_size*stride, n_steps - k)
+        block_constants = stimulus.step_constants(constants, t_0 + delta_t*np.arange(k, k + n_block + 1))
+
+        for constants_k in block_constants:
+            # t_k is computed from k, so it does not accumulate rounding errors
+            y_k = step(t_0 + k*delta_t, y_k, delta_t, constants_k)
+            k += 1
+
+            if k % stride == 0:
+                if row == chunk_size:
+                    yield chunk
+                    row = 0
+                chunk[row, ..., 0] = t_0 + k*delta_t
+                chunk[row, ..., 1:] = y_k
+                row += 1
+
+    yield chunk[:row]
+
+
+def stream_solution(step, time_interval: (float, float), n_steps: int, initial_y: np.array, constants: dict,
+                    chunk_size: int = 4096, stride: int = 1):
+    """Streaming version of the fixed step solvers (same discretization of the interval [a, b]
+    in n_steps steps): yields the solution in chunks instead of returning it whole (see stream)
+
+    Args:
+        step (str or callable): a method of STEPS, or a one step method step(t_k, y_k, delta_t, constants)
+        time_interval ((float, float)): domain of the function (interval [a,b])
+        n_steps (int): number of steps for discretize the domain
+        initial_y (np.array): the initial value of y, with shape (4,) or (N, 4)
+        constants (dict): the constants of the model
+        chunk_size (int): number of rows of each chunk
+        stride (int): keeps one row every stride steps
+
+    Yields:
+        np.array: chunks with shape (k, 5), or (k, N, 5) for a population
+    """
+
+    start, stop = time_interval[0], time_interval[1]
+    delta_t = (stop - start)/n_steps
+
+    return stream(step, initial_y, constants, delta_t, start, n_steps, chunk_size, stride)
+
+
+def run_stream(chunks, sinks: list) -> list:
+    """Feeds every chunk of a stream to each sink, then closes the sinks
+
+    Args:
+        chunks (iterable): the chunks of stream or stream_solution
+        sinks (list): objects with the methods consume(chunk) and close()
+
+    Returns:
+        list: the sinks
+    """
+
+    try:
+        for chunk in chunks:
+            for sink in sinks:
+                sink.consume(chunk)
+    finally:
+        for sink in sinks:
+            sink.close()
+
+    return sinks
+
+
+class FileSink:
+    """Appends the chunks to a trajectory store (see trajectory_store.TrajectoryWriter)
+
+    Args:
+        path (str): directory of the store
+        n_neurons (int): number N of neurons of a batched stream, or None for a single neuron
+        **metadata: information saved in the header of the store
+    """
+
+    def __init__(self, path: str, n_neurons: int = None, **metadata):
+        self.writer = trajectory_store.TrajectoryWriter(path, n_neurons, **metadata)
+
+    def consume(self, chunk: np.array):
+        self.writer.append(chunk)
+
+    def close(self):
+        self.writer.close()
+
+
+class Decimator:
+    """Keeps one row every `every` rows of the stream (counted across chunks), and passes them on
+    to another sink or collects them in memory (in `rows`, with 1/every of the stream's size)
+
+    Args:
+        every (int): keeps one row every `every` rows
+        sink: sink that receives the kept rows, or None to keep them in memory
+    """
+
+    def __init__(self, every: int, sink=None):
+        self.every = every
+        self.sink = sink
+        self.offset = 0
+        self._kept = []
+        self.rows = None
+
+    def consume(self, chunk: np.array):
+        kept = chunk[(-self.offset) % self.every::self.every]
+        self.offset = (self.offset + len(chunk)) % self.every
+
+        if self.sink is not None:
+            self.sink.consume(kept)
+        else:
+            self._kept.append(kept.copy())
+
+    def close(self):
+        if self.sink is not None:
+            self.sink.close()
+        elif self._kept:
+            self.rows = np.concatenate(self._kept)
+
+
+class RunningMinMax:
+    """Online minimum and maximum of each column [t, V, m, h, n] (per neuron for a population)"""
+
+    def __init__(self):
+        self.minimum = None
+        self.maximum = None
+
+    def consume(self, chunk: np.array):
+        if len(chunk) == 0:
+            return
+        chunk_min, chunk_max = chunk.min(axis=0), chunk.max(axis=0)
+        if self.minimum is None:
+            self.minimum, self.maximum = chunk_min, chunk_max
+        else:
+            np.minimum(self.minimum, chunk_min, out=self.minimum)
+            np.maximum(self.maximum, chunk_max, out=self.maximum)
+
+    def close(self):
+        pass
+
+
+class SpikeCounter:
+    """Online spike counter: counts the upward crossings of a voltage threshold, with the crossing
+    times interpolated linearly between the two rows around each crossing. After close, the spikes
+    are in spike_times and spike_neurons (the neuron of each spike, 0 for a single neuron), sorted
+    by time like network.NetworkStep.spikes
+
+    Args:
+        threshold (float): voltage of the crossing, in mV
+    """
+
+    def __init__(self, threshold: float = 50.):
+        self.threshold = threshold
+        self.count = 0
+        self._times = []
+        self._neurons = []
+        self._last = None
+        self.spike_times = None
+        self.spike_neurons = None
+
+    def consume(self, chunk: np.array):
+        if len(chunk) == 0:
+            return
+        # the last row of the previous chunk, so that crossings between chunks are not lost
+        rows = chunk if self._last is None else np.concatenate((self._last[np.newaxis], chunk))
+        t, V = rows[..., 0], rows[..., 1]
+
+        before, after = V[:-1] < self.threshold, V[1:] >= self.threshold
+        crossing = before & after
+        self.count = self.count + crossing.sum(axis=0)
+
+        if crossing.any():
+            fraction = (self.threshold - V[:-1][crossing])/(V[1:][crossing] - V[:-1][crossing])
+            self._times.append(t[:-1][crossing] + fraction*(t[1:][crossing] - t[:-1][crossing]))
+            self._neurons.append(np.nonzero(crossing)[1] if crossing.ndim == 2 else np.zeros(crossing.sum(), dtype=int))
+
+        self._last = chunk[-1].copy()
+
+    def spikes(self) -> (np.array, np.array):
+        """The spikes counted so far, as the arrays (times, neurons) sorted by time"""
+        if not self._times:
+            return np.empty(0), np.empty(0, dtype=int)
+
+        times, neurons = np.concatenate(self._times), np.concatenate(self._neurons)
+        order = np.argsort(times, kind='stable')
+
+        return times[order], neurons[order]
+
+    def close(self):
+        self.spike_times, self.spike_neurons = self.spikes()
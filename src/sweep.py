@@ -0,0 +1,203 @@
+import itertools
+import os
+import time
+import typing
+import numpy as np
+import euler_sol
+import implicit_euler
+import rk_sol
+import rush_larsen
+import fused_rhs
+import result_cache
+
+# fixed step solvers available to the sweeps, all with the signature
+# solution(time_interval, n_steps, initial_y, constants, stride=...)
+METHODS = {
+    'euler': euler_sol.euler_solution,
+    'implicit_euler': implicit_euler.implicit_euler_solution,
+    'rk': rk_sol.rk_solution,
+    'fused_rk': fused_rhs.fused_rk_solution,
+    'rush_larsen': rush_larsen.rush_larsen_solution,
+    'rush_larsen2': rush_larsen.rush_larsen2_solution,
+}
+
+# rough cost of one step of each method, in evaluations of the right-hand side
+METHOD_COST = {
+    'euler': 1,
+    'implicit_euler': 3,
+    'rk': 4,
+    'fused_rk': 1,
+    'rush_larsen': 1,
+    'rush_larsen2': 2,
+}
+
+
+class Job(typing.NamedTuple):
+    """One run of a sweep: a method of METHODS with n_steps steps over time_interval"""
+    method: str
+    n_steps: int
+    constants: dict
+    initial_y: np.array
+    time_interval: tuple = (0., 30.)
+
+
+def job_cost(job: Job) -> float:
+    """Estimated cost of a job: steps times right-hand side evaluations per step times neurons"""
+    return job.n_steps*METHOD_COST.get(job.method, 1)*(np.size(job.initial_y)//4)
+
+
+def grid(methods: list, n_values: list, constants: dict, initial_y: np.array,
+         time_interval: (float, float) = (0., 30.)) -> list:
+    """Builds the jobs of every combination of method and number of steps
+
+    Args:
+        methods (list): names of the methods (keys of METHODS)
+        n_values (list): numbers of steps
+        constants (dict): the constants of the model
+        initial_y (np.array): the initial value of y
+        time_interval ((float, float)): domain of the function (interval [a,b])
+
+    Returns:
+        list: the jobs, method by method
+    """
+
+    return [Job(method, n, constants, initial_y, tuple(time_interval)) for method, n in itertools.product(methods, n_values)]
+
+
+def _run_job(job: Job, stride: int, cache: str = None) -> np.array:
+    if job.method not in METHODS:
+        raise ValueError(f'unknown method {job.method!r}, expected one of {sorted(METHODS)}')
+
+    solver = METHODS[job.method]
+    if cache is not None:
+        solver = result_cache.cached(solver, result_cache.get_cache(cache))
+
+    return solver(job.time_interval, job.n_steps, job.initial_y, job.constants, stride=stride)
+
+
+def _cached_result(job: Job, stride: int, cache: str) -> np.array:
+    """The solution of a job in the cache, or None"""
+    if job.method not in METHODS:
+        return None
+
+    solver = METHODS[job.method]
+    run_key = result_cache.key(solver, job.time_interval, job.n_steps, job.initial_y, job.constants, stride=stride)
+
+    return result_cache.get_cache(cache).get(run_key)
+
+
+def print_progress(done: int, total: int, job: Job, elapsed: float, error: Exception = None):
+    """Default progress report of run_sweep: one line per finished job"""
+    status = f'failed: {error!r}' if error is not None else 'done'
+    print(f'[{done}/{total}] {job.method} n = {job.n_steps} {status} ({elapsed:.1f} s)')
+
+
+def run_sweep(jobs: list, n_workers: int = None, stride: int = 1, on_result=None, progress=print_progress,
+              max_retries: int = 1, cache: str = None) -> (dict, dict):
+    """Runs the jobs of a sweep on a pool of worker processes, starting by the most expensive ones
+    so that a long run does not start last and hold up the whole sweep.
+
+    A job that raises an error is reported as failed. A worker process that dies breaks the whole
+    pool, but the results already received are kept: the unfinished jobs are then run again, each
+    one in a pool of its own (n_workers at a time), so that only the job that crashes its worker
+    is lost. Since a broken shared pool does not tell which job crashed it, only the crashes of a
+    job run on its own count, and such a job is run at most 1 + max_retries times on its own.
+
+    With a cache directory (see result_cache), the jobs already computed are read from it without
+    starting any worker, and the workers store the new solutions in it.
+
+    Args:
+        jobs (list): the jobs (see grid and Job)
+        n_workers (int): number of worker processes (the number of CPUs when None)
+        stride (int): stores one point every stride steps of each solution
+        on_result (callable): called as on_result(index, job, solution) in the main process as soon
+            as each job finishes, e.g. to save it to disk; an error it raises does not stop the
+            sweep, it is reported and kept in the errors (the solution is still returned)
+        progress (callable): called as progress(done, total, job, elapsed, error) after each job, or None
+        max_retries (int): times a job that crashed its own worker is run again
+        cache (str): optional directory of a result_cache.ResultCache shared by the workers
+
+    Returns:
+        (dict, dict): the solutions and the errors of the jobs, keyed by their index in jobs
+    """
+    # imported here, since the process pools cost more to import than a small run
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    from concurrent.futures.process import BrokenProcessPool
+
+    n_workers = n_workers or os.cpu_count()
+    results, failures = {}, {}
+    crashes = [0]*len(jobs)
+    start = time.time()
+
+    def by_cost(indices):
+        return sorted(indices, key=lambda i: job_cost(jobs[i]), reverse=True)
+
+    def report(i, error=None):
+        if progress is not None:
+            progress(len(results.keys() | failures.keys()), len(jobs), jobs[i], time.time() - start, error)
+
+    def deliver(i, solution):
+        results[i] = solution
+        error = None
+        if on_result is not None:
+            try:
+                on_result(i, jobs[i], solution)
+            except Exception as callback_error:
+                error = failures[i] = callback_error
+        report(i, error)
+
+    def run(batches, isolated):
+        """Runs each batch of jobs on one shared pool, or on one pool per job when isolated, and
+        returns the jobs whose worker crashed"""
+        crashed = []
+
+        for batch in batches:
+            pools = [ProcessPoolExecutor(max_workers=1) for _ in batch] if isolated \
+                else [ProcessPoolExecutor(max_workers=min(n_workers, len(batch)))]*len(batch)
+            try:
+                futures = {pool.submit(_run_job, jobs[i], stride, cache): i for pool, i in zip(pools, batch)}
+
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        solution = future.result()
+                    except BrokenProcessPool as error:
+                        # the jobs of a broken shared pool are run again on their own, without charge
+                        if isolated:
+                            crashes[i] += 1
+                        if crashes[i] > max_retries:
+                            failures[i] = error
+                            report(i, error)
+                        else:
+                            crashed.append(i)
+                        continue
+                    except Exception as error:
+                        failures[i] = error
+                        report(i, error)
+                        continue
+
+                    deliver(i, solution)
+            finally:
+                for pool in set(pools):
+                    pool.shutdown()
+
+        return crashed
+
+    remaining = list(range(len(jobs)))
+    if cache is not None:
+        remaining = []
+        for i, job in enumerate(jobs):
+            solution = _cached_result(job, stride, cache)
+            if solution is None:
+                remaining.append(i)
+                continue
+
+            deliver(i, solution)
+
+    pending = run([by_cost(remaining)], isolated=False) if remaining else []
+
+    while pending:
+        pending = by_cost(pending)
+        pending = run([pending[j:j + n_workers] for j in range(0, len(pending), n_workers)], isolated=True)
+
+    return results, failures
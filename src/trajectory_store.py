@@ -0,0 +1,212 @@
+import json
+import os
+import numpy as np
+
+COLUMNS = ('t', 'V', 'm', 'h', 'n')
+METADATA_FILE = 'metadata.json'
+
+
+def _to_json(value):
+    """Converts numpy arrays and scalars in the metadata to plain lists and floats"""
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return value
+
+
+def _column_file(path: str, column: str) -> str:
+    return os.path.join(path, f'{column}.f64')
+
+
+class TrajectoryWriter:
+    """Writes a trajectory store: a directory with one raw float64 file per column (t, V, m, h, n)
+    and a small metadata.json header (method, n, constants, y_0 and the shape of the rows). Rows can
+    be appended while a solver is still running; the header is rewritten on every append, so a
+    reader always sees the rows written so far.
+
+    Args:
+        path (str): directory of the store (created if needed, its columns are truncated)
+        n_neurons (int): number N of neurons of a batched solution, or None for a single neuron
+        **metadata: information saved in the header, e.g. method, n_steps, constants, initial_y
+    """
+
+    def __init__(self, path: str, n_neurons: int = None, **metadata):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.n_neurons = n_neurons
+        self.n_rows = 0
+        self.metadata = _to_json(metadata)
+        self._files = {column: open(_column_file(path, column), 'wb') for column in COLUMNS}
+        self._write_metadata()
+
+    def _write_metadata(self):
+        header = {'columns': list(COLUMNS), 'n_rows': self.n_rows, 'n_neurons': self.n_neurons,
+                  'dtype': '<f8', **self.metadata}
+        temporary = os.path.join(self.path, METADATA_FILE + '.tmp')
+        with open(temporary, 'w') as file:
+            json.dump(header, file)
+        os.replace(temporary, os.path.join(self.path, METADATA_FILE))
+
+    def append(self, rows: np.array):
+        """Appends rows [t_k, V_k, m_k, h_k, n_k] (shape (k, 5), or (k, N, 5) for a population)
+
+        Args:
+            rows (np.array): the time stamped rows of a solution
+        """
+        rows = np.asarray(rows, dtype='<f8')
+        if rows.ndim == 1 or (self.n_neurons is not None and rows.ndim == 2):
+            rows = rows[np.newaxis]
+
+        # the time stamps are the same for every neuron, so only the first one is stored
+        self._files['t'].write(np.ascontiguousarray(rows[:, 0] if rows.ndim == 2 else rows[:, 0, 0]).tobytes())
+        for i, column in enumerate(COLUMNS[1:], start=1):
+            self._files[column].write(np.ascontiguousarray(rows[..., i]).tobytes())
+
+        for file in self._files.values():
+            file.flush()
+
+        self.n_rows += len(rows)
+        self._write_metadata()
+
+    def close(self):
+        for file in self._files.values():
+            file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+def save_trajectory(path: str, solution: np.array, stats=None, **metadata):
+    """Saves a whole solution of the solvers as a trajectory store (see TrajectoryWriter)
+
+    Args:
+        path (str): directory of the store
+        solution (np.array): the rows [t_k, V_k, m_k, h_k, n_k], with shape (k, 5) or (k, N, 5)
+        stats (instrumentation.SolverStats): optional stats of the run, whose serialize phase
+            gets the time of the writing
+        **metadata: information saved in the header, e.g. method, n_steps, constants, initial_y
+    """
+
+    if stats is not None:
+        with stats.phase('serialize'):
+            return save_trajectory(path, solution, **metadata)
+
+    n_neurons = solution.shape[1] if np.ndim(solution) == 3 else None
+    with TrajectoryWriter(path, n_neurons, **metadata) as writer:
+        writer.append(solution)
+
+
+def load_metadata(path: str) -> dict:
+    """Reads the header of a trajectory store
+
+    Returns:
+        dict: columns, n_rows, n_neurons and the metadata saved with the trajectory
+    """
+
+    with open(os.path.join(path, METADATA_FILE)) as file:
+        return json.load(file)
+
+
+def load_column(path: str, column: str, metadata: dict = None) -> np.array:
+    """Maps one column of a trajectory store into memory, without reading or copying it
+
+    Args:
+        path (str): directory of the store
+        column (str): one of 't', 'V', 'm', 'h', 'n'
+        metadata (dict): the header of the store, if already read
+
+    Returns:
+        np.array: read-only memory map of the column, with shape (n_rows,) or (n_rows, N)
+    """
+
+    if column not in COLUMNS:
+        raise ValueError(f'unknown column {column!r}, expected one of {COLUMNS}')
+
+    metadata = metadata or load_metadata(path)
+    n_rows, n_neurons = metadata['n_rows'], metadata['n_neurons']
+    shape = (n_rows,) if column == 't' or n_neurons is None else (n_rows, n_neurons)
+
+    if n_rows == 0:
+        return np.empty(shape)
+
+    return np.memmap(_column_file(path, column), dtype='<f8', mode='r', shape=shape)
+
+
+def load_slice(path: str, t_start: float = -np.inf, t_stop: float = np.inf, columns: tuple = COLUMNS) -> dict:
+    """Maps the rows with t_start <= t <= t_stop of the chosen columns, without copying them
+
+    Args:
+        path (str): directory of the store
+        t_start (float): first instant of the slice
+        t_stop (float): last instant of the slice
+        columns (tuple): the columns to map
+
+    Returns:
+        dict: a read-only view of each column in the time slice
+    """
+
+    metadata = load_metadata(path)
+    t = load_column(path, 't', metadata)
+    first, last = np.searchsorted(t, t_start, side='left'), np.searchsorted(t, t_stop, side='right')
+
+    return {column: load_column(path, column, metadata)[first:last] for column in columns}
+
+
+def last_row(path: str) -> np.array:
+    """Reads only the last row [t, V, m, h, n] of a trajectory store
+
+    Returns:
+        np.array: the last row, with shape (5,) or (N, 5)
+    """
+
+    metadata = load_metadata(path)
+    columns = [load_column(path, column, metadata)[-1] for column in COLUMNS]
+
+    return np.stack(np.broadcast_arrays(*columns), axis=-1)
+
+
+def load_trajectory(path: str) -> np.array:
+    """Reads a whole trajectory store back into the array returned by the solvers
+
+    Returns:
+        np.array: the rows [t_k, V_k, m_k, h_k, n_k], with shape (k, 5) or (k, N, 5)
+    """
+
+    metadata = load_metadata(path)
+    columns = [load_column(path, column, metadata) for column in COLUMNS]
+    if metadata['n_neurons'] is not None:
+        columns[0] = np.broadcast_to(columns[0][:, np.newaxis], columns[1].shape)
+
+    return np.stack(columns, axis=-1)
+
+
+def load_dataframe(path: str):
+    """Reads a single neuron trajectory store as the DataFrame of the CSV files written by
+    main.py, with the columns '0', '1', '2', '3', '4' for t, V, m, h, n
+
+    Returns:
+        pd.DataFrame: the trajectory
+    """
+    import pandas as pd
+
+    return pd.DataFrame(load_trajectory(path), columns=[str(i) for i in range(len(COLUMNS))])
+
+
+def export_csv(path: str, csv_path: str):
+    """Writes a single neuron trajectory store as a CSV file like the ones of main.py
+
+    Args:
+        path (str): directory of the store
+        csv_path (str): the CSV file to be written
+    """
+
+    load_dataframe(path).to_csv(csv_path)
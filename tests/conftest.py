@@ -0,0 +1,26 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+# the modules of src are imported by their bare names, like the scripts do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+
+@pytest.fixture
+def constants():
+    return {
+        'current': 0.,
+        'capacitance': 1.,
+        'g_Na': 120.,
+        'g_K': 36.,
+        'g_L': 0.3,
+        'E_Na': 115.,
+        'E_K': -12.0,
+        'E_L': 10.613
+    }
+
+
+@pytest.fixture
+def y_0():
+    return np.array([0., 0.05, 0.6, 0.06])
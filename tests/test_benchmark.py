@@ -0,0 +1,51 @@
+import numpy as np
+import benchmark
+
+
+def test_compare_flags_regressions_beyond_the_tolerance():
+    baseline = {'steps': {'rk': 1000., 'euler': 1000.}, 'memory': {'1000': 100.},
+                'accuracy': {'rk/500': {'error': 1e-3, 'time': 0.1}}}
+    results = {'steps': {'rk': 700., 'euler': 900.}, 'memory': {'1000': 150.},
+               'accuracy': {'rk/500': {'error': 1e-3, 'time': 0.05}}}
+
+    regressions = benchmark.compare(results, baseline, tolerance=0.2)
+
+    assert regressions == [('steps', 'rk', 1000., 700.), ('memory', '1000', 100., 150.)]
+
+
+def test_compare_flags_values_that_are_not_finite():
+    baseline = {'steps': {'rk': 1000.}, 'accuracy': {'euler/500': {'error': 0.4, 'time': 0.02}}}
+    results = {'steps': {'rk': np.inf}, 'accuracy': {'euler/500': {'error': np.nan, 'time': 0.02}}}
+
+    regressions = benchmark.compare(results, baseline)
+
+    assert [(section, name) for section, name, _, _ in regressions] == [('steps', 'rk'), ('accuracy', 'euler/500 error')]
+
+
+def test_baseline_round_trip_and_committed_baseline(tmp_path):
+    committed = benchmark.load_baseline(benchmark.BASELINE)
+    assert set(committed) == set(benchmark.HIGHER_IS_BETTER)
+
+    path = str(tmp_path/'baseline.json')
+    benchmark.save_baseline(committed, path)
+    assert benchmark.load_baseline(path) == committed
+    assert benchmark.compare(committed, committed) == []
+
+
+def test_failed_and_missing_runs_are_regressions(monkeypatch):
+    def diverging(*args, **kwargs):
+        raise RuntimeError("Newton's method did not converge")
+
+    monkeypatch.setitem(benchmark.sweep.METHODS, 'diverging', diverging)
+    results = {'accuracy': benchmark.benchmark_accuracy([100], ['diverging'])}
+    failed = results['accuracy']['diverging/100']
+    assert failed['failed'] and failed['error'] == np.inf and np.isnan(failed['time'])
+
+    baseline = {'steps': {'rk': 1000.}, 'accuracy': {'diverging/100': {'error': 0.1, 'time': 0.02},
+                                                     'rk/100': {'error': 0.1, 'time': 0.02}}}
+    regressions = benchmark.compare(results, baseline)
+
+    assert [(section, name) for section, name, _, _ in regressions] == [
+        ('steps', 'rk'), ('accuracy', 'diverging/100 error'), ('accuracy', 'diverging/100 time'), ('accuracy', 'rk/100')]
+    # a run that already failed in the baseline is not a new regression
+    assert benchmark.compare(results, results) == []
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+import eq_parameters
+import state_variables
+import stimulus
+
+cable = pytest.importorskip('cable')
+
+REST = np.array([0., 0.0529, 0.5961, 0.3177])
+
+
+def test_step_solves_the_tridiagonal_system(constants):
+    rng = np.random.default_rng(1)
+    y_k = REST + rng.normal(0., [5., 0.01, 0.01, 0.01], (6, 4))
+    constants = dict(constants, current=30.)
+    step = cable.CableStep(6, 0.3)
+    delta_t = 0.05
+
+    next_y = step(0., y_k, delta_t, constants)
+
+    # the gates are advanced exactly with V frozen at V_k
+    alpha_m, beta_m, alpha_h, beta_h, alpha_n, beta_n = eq_parameters.rates(y_k[:, 0])
+    np.testing.assert_allclose(next_y[:, 3], state_variables.gate_exponential_step(alpha_n, beta_n, y_k[:, 3], delta_t))
+
+    m, h, n = next_y[:, 1], next_y[:, 2], next_y[:, 3]
+    g_Na, g_K = constants['g_Na']*m**3*h, constants['g_K']*n**4
+    g = g_Na + g_K + constants['g_L']
+    V = next_y[:, 0]
+    axial = np.diff(np.concatenate(([V[0]], V, [V[-1]])), 2)
+    injected = 30.*np.eye(6)[0]
+
+    residual = ((constants['capacitance']/delta_t + g)*V - step.coupling*axial
+                - constants['capacitance']/delta_t*y_k[:, 0]
+                - (g_Na*constants['E_Na'] + g_K*constants['E_K'] + constants['g_L']*constants['E_L']) - injected)
+    np.testing.assert_allclose(residual, 0., atol=1e-9)
+
+
+def test_uniform_cable_without_current_stays_uniform(constants, y_0):
+    solution = cable.cable_solution((0., 10.), 500, y_0, constants, 5, 1.)
+
+    assert solution.shape == (501, 5, 5)
+    np.testing.assert_allclose(solution[..., 1:], np.broadcast_to(solution[:, :1, 1:], solution[..., 1:].shape), atol=1e-10)
+
+
+def test_action_potential_propagates(constants):
+    constants = dict(constants, current=stimulus.pulse_train(1000., 0.5, 10.))
+    solution = cable.cable_solution((0., 10.), 1000, REST, constants, 50, 2.)
+
+    arrivals = cable.arrival_times(solution)
+    assert np.all(np.isfinite(arrivals)) and np.all(np.diff(arrivals) > 0.)
+
+    # a steady conduction velocity away from the ends, of the order of the 20 m/s of the squid axon
+    velocities = (2./50)/np.diff(arrivals[10:30])
+    assert np.ptp(velocities)/np.mean(velocities) < 0.05
+    assert 0.5 < np.mean(velocities) < 3.
+
+
+def test_a_cable_needs_two_compartments():
+    with pytest.raises(ValueError):
+        cable.CableStep(1, 1.)
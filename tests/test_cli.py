@@ -0,0 +1,47 @@
+import json
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+import cli
+import trajectory_store
+
+
+def test_load_config(tmp_path):
+    path = tmp_path / 'run.json'
+    path.write_text(json.dumps({'methods': 'euler', 'n_values': [100, 200], 'constants': {'current': 5.}}))
+
+    config = cli.load_config(str(path), n_values=[300], stride=None)
+
+    assert config['methods'] == ['euler'] and config['n_values'] == [300] and config['stride'] == 1
+    assert config['constants']['current'] == 5. and config['constants']['g_K'] == 36.
+    # the defaults are not changed by a configuration
+    assert cli.DEFAULT_CONFIG['constants']['current'] == 0.
+
+
+@pytest.mark.parametrize('updates', [{'unknown': 1}, {'methods': ['nope']}, {'format': 'xml'}])
+def test_invalid_config(updates):
+    with pytest.raises(ValueError):
+        cli.load_config(**updates)
+
+
+def test_main_saves_each_run(tmp_path, capsys):
+    output = str(tmp_path / '{method}_{n}')
+    cli.main(['--method', 'rk', 'dopri', '--n', '200', '--t-max', '2', '--current', '3', '--output', output])
+
+    printed = capsys.readouterr().out
+    assert printed.startswith('rk n = 200: y(2) = ') and 'dopri n = ' in printed
+
+    solution = trajectory_store.load_trajectory(str(tmp_path / 'rk_200'))
+    assert solution.shape == (201, 5) and solution[-1, 0] == 2.
+    metadata = trajectory_store.load_metadata(str(tmp_path / 'rk_200'))
+    assert metadata['constants']['current'] == 3.
+
+
+def test_import_does_not_load_pandas_or_scipy():
+    source = os.path.join(os.path.dirname(__file__), os.pardir, 'src')
+    code = 'import sys, cli; print(sorted({"pandas", "scipy"} & set(sys.modules)))'
+    output = subprocess.run([sys.executable, '-c', code], cwd=source, capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == '[]'
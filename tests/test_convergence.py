@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+import convergence
+
+
+@pytest.mark.parametrize('method, order', [('euler', 1.), ('rk', 4.), ('fused_rk', 4.), ('rush_larsen2', 2.)])
+def test_observed_order(constants, y_0, method, order):
+    study = convergence.order_study(method, (0., 5.), 1000, 3, y_0, constants)
+
+    np.testing.assert_allclose(study['orders'][-1], order, atol=0.2)
+    assert np.all(study['errors'][-1] <= study['errors'][0])
+
+
+def test_richardson_cancels_the_leading_term():
+    # y_n = y + c*h^p with h = 1/n
+    exact, c, p = 2., 3., 2.
+    coarse, middle, fine = (exact + c*(1./n)**p for n in (10, 20, 40))
+
+    np.testing.assert_allclose(convergence.observed_order(coarse, middle, fine), p)
+    np.testing.assert_allclose(convergence.richardson(middle, fine, p), exact)
+
+
+def test_order_study_needs_three_grids(constants, y_0):
+    with pytest.raises(ValueError):
+        convergence.order_study('euler', (0., 5.), 100, 2, y_0, constants)
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import decimation
+import rk_sol
+import trajectory_store
+
+
+@pytest.fixture(scope='module')
+def solution():
+    constants = {'current': 10., 'capacitance': 1., 'g_Na': 120., 'g_K': 36., 'g_L': 0.3,
+                 'E_Na': 115., 'E_K': -12.0, 'E_L': 10.613}
+    return rk_sol.rk_solution((0., 50.), 20000, np.array([0., 0.05, 0.6, 0.06]), constants)
+
+
+def test_minmax_keeps_every_peak_and_trough(solution):
+    t, V = solution[:, 0], solution[:, 1]
+    indices = decimation.minmax_indices(t, V, 100)
+
+    assert len(indices) <= 200 and np.all(np.diff(indices) >= 0)
+    assert V[indices].max() == V.max() and V[indices].min() == V.min()
+    # every local maximum above 50 mV (a spike) is kept
+    peaks = np.flatnonzero((V[1:-1] > V[:-2]) & (V[1:-1] >= V[2:]) & (V[1:-1] > 50.)) + 1
+    assert len(peaks) >= 3 and set(peaks) <= set(indices)
+
+
+def test_minmax_skips_nans():
+    t = np.arange(12.)
+    y = np.array([0., np.nan, 5., 1., np.nan, np.nan, np.nan, np.nan, 2., -3., np.nan, 4.])
+    indices = decimation.minmax_indices(t, np.column_stack((y, -y)), 3)
+
+    np.testing.assert_array_equal(indices[:, 0], [0, 2, 4, 4, 9, 11])
+    np.testing.assert_array_equal(indices[:, 1], [0, 2, 4, 4, 9, 11])
+    assert np.all(indices < len(t))
+
+
+def test_lttb_keeps_the_ends_and_the_spikes(solution):
+    t, V = solution[:, 0], solution[:, 1]
+    indices = decimation.lttb_indices(t, V, 400)
+
+    assert len(indices) == 400 and indices[0] == 0 and indices[-1] == len(t) - 1
+    assert np.all(np.diff(indices) > 0)
+    assert V[indices].max() > 0.95*V.max()
+
+
+def test_decimate_solution_of_a_population(solution):
+    population = np.stack((solution, solution), axis=1)
+    decimated = decimation.decimate_solution(population, width=50, components=('V', 'n'))
+
+    t, V = decimated['V']
+    assert t.shape == V.shape and V.shape[1] == 2
+    np.testing.assert_array_equal(V[:, 0], V[:, 1])
+    # a short trace is returned whole
+    t, V = decimation.decimate(solution[:10, 0], solution[:10, 1], width=50)
+    np.testing.assert_array_equal(V, solution[:10, 1])
+
+
+def test_decimate_file(tmp_path, solution):
+    path = str(tmp_path / 'run')
+    trajectory_store.save_trajectory(path, solution)
+    trajectory_store.export_csv(path, f'{path}.csv')
+
+    from_store = decimation.decimate_file(path, 100, t_start=10., t_stop=40.)
+    from_csv = decimation.decimate_file(f'{path}.csv', 100, t_start=10., t_stop=40.)
+
+    for component in decimation.COMPONENTS:
+        np.testing.assert_allclose(from_store[component][1], from_csv[component][1])
+    assert from_store['V'][0][0] >= 10. and from_store['V'][0][-1] <= 40.
@@ -0,0 +1,54 @@
+import numpy as np
+import instrumentation
+import rk_sol
+
+
+def reference(constants, y_0, t):
+    """RK4 with a step of 1e-3 ms, far more accurate than the tolerances checked"""
+    n_steps = int(round(t/1e-3))
+    return rk_sol.rk_solution((0., t), n_steps, y_0, constants, stride=n_steps)[-1, 1:]
+
+
+def test_dopri_matches_the_rk4_reference(constants, y_0):
+    constants = dict(constants, current=10.)
+    expected = reference(constants, y_0, 15.)
+
+    for rtol, tolerance in ((1e-6, 1e-2), (1e-9, 1e-5)):
+        solution = rk_sol.dopri_solution((0., 15.), y_0, constants, rtol=rtol, atol=rtol*1e-2)
+        assert solution[-1, 0] == 15.
+        np.testing.assert_allclose(solution[-1, 1:], expected, atol=tolerance)
+
+
+def test_tighter_tolerances_take_more_steps(constants, y_0):
+    constants = dict(constants, current=10.)
+    coarse = rk_sol.dopri_solution((0., 15.), y_0, constants, rtol=1e-4)
+    fine = rk_sol.dopri_solution((0., 15.), y_0, constants, rtol=1e-8)
+
+    assert len(fine) > 2*len(coarse)
+    assert np.all(np.diff(fine[:, 0]) > 0.)
+
+
+def test_dense_output_interpolates_between_the_steps(constants, y_0):
+    constants = dict(constants, current=10.)
+    solution, dense = rk_sol.dopri_solution((0., 15.), y_0, constants, rtol=1e-9, atol=1e-11, dense_output=True)
+
+    np.testing.assert_allclose(dense(solution[:, 0]), solution[:, 1:], atol=1e-10)
+    np.testing.assert_allclose(dense(7.3), reference(constants, y_0, 7.3), atol=1e-4)
+
+
+def test_dopri_integrates_a_population(constants, y_0):
+    currents = np.array([0., 10.])
+    population = rk_sol.dopri_solution((0., 10.), np.tile(y_0, (2, 1)), dict(constants, current=currents), rtol=1e-8)
+
+    for i, current in enumerate(currents):
+        np.testing.assert_allclose(population[-1, i, 1:], reference(dict(constants, current=current), y_0, 10.),
+                                   atol=1e-3)
+
+
+def test_stats_count_the_accepted_and_rejected_steps(constants, y_0):
+    stats = instrumentation.SolverStats()
+    solution = rk_sol.dopri_solution((0., 15.), y_0, dict(constants, current=10.), rtol=1e-6, stats=stats)
+
+    assert stats.n_accepted == len(solution) - 1
+    assert stats.n_steps == stats.n_accepted + stats.n_rejected
+    assert stats.n_rhs >= 6*stats.n_steps
@@ -0,0 +1,65 @@
+import numpy as np
+import events
+import rk_sol
+import stimulus
+import streaming
+
+REST = np.array([0., 0.0529, 0.5961, 0.3177])
+
+
+def test_threshold_crossings_match_the_trajectory(constants):
+    constants = dict(constants, current=10.)
+    found, t_stop, y_stop = events.detect_events('rk', (0., 50.), 5000, REST, constants, [events.threshold_event()])
+
+    solution = rk_sol.rk_solution((0., 50.), 5000, REST, constants)
+    counter = streaming.run_stream([solution], [streaming.SpikeCounter()])[0]
+
+    np.testing.assert_allclose(found['threshold']['t'], counter.spike_times, rtol=1e-12)
+    np.testing.assert_allclose(found['threshold']['y'][:, 0], 50., atol=1e-9)
+    assert t_stop == 50.
+    np.testing.assert_allclose(y_stop, solution[-1, 1:], rtol=1e-12)
+
+
+def test_peaks_are_refined_inside_the_step(constants):
+    constants = dict(constants, current=10.)
+    found, _, _ = events.detect_events('rk', (0., 20.), 400, REST, constants, [events.PeakEvent(constants)])
+    coarse = rk_sol.rk_solution((0., 20.), 400, REST, constants)
+    fine = rk_sol.rk_solution((0., 20.), 8000, REST, constants)
+
+    assert len(found['peak']['t']) == 2
+    for t, V in zip(found['peak']['t'], found['peak']['y'][:, 0]):
+        window, coarse_window = np.abs(fine[:, 0] - t) < 1., np.abs(coarse[:, 0] - t) < 1.
+        i = np.argmax(fine[window, 1])
+        assert abs(fine[window, 0][i] - t) < 0.02
+        # closer to the peak than the largest sample of the steps
+        assert abs(fine[window, 1][i] - V) < abs(fine[window, 1][i] - coarse[coarse_window, 1].max())
+
+
+def test_max_events_stops_every_neuron(constants):
+    initial_y = np.tile(REST, (3, 1))
+    constants = dict(constants, current=np.array([8., 15., 30.]))
+    event = events.threshold_event(max_events=2)
+
+    found, t_stop, _ = events.detect_events('rk', (0., 200.), 20000, initial_y, constants, [event])
+
+    assert t_stop < 200.
+    assert np.all(np.bincount(found['threshold']['neuron'], minlength=3) == 2)
+    assert np.all(np.diff(found['threshold']['t']) >= 0.)
+    assert found['threshold']['t'][-1] <= t_stop
+
+
+def test_no_events(constants):
+    found, _, _ = events.detect_events('euler', (0., 5.), 500, REST, constants, [events.threshold_event(name='spike')])
+
+    assert found['spike']['t'].shape == (0,) and found['spike']['y'].shape == (0, 4)
+
+
+def test_stimulus_is_applied_like_in_the_integrator(constants):
+    # the edges of the pulses fall inside steps, where the current of the step is its left limit
+    constants = dict(constants, current=stimulus.pulse_train(15., 0.73, 4.1, start=1.03, n_pulses=3))
+    found, t_stop, y_stop = events.detect_events('rk', (0., 15.), 1500, REST, constants, [events.threshold_event()])
+    solution = rk_sol.rk_solution((0., 15.), 1500, REST, constants)
+
+    assert t_stop == 15.
+    np.testing.assert_array_equal(y_stop, solution[-1, 1:])
+    assert len(found['threshold']['t']) >= 1
@@ -0,0 +1,35 @@
+import numpy as np
+import fi_curve
+
+
+def test_fi_curve(constants):
+    result = fi_curve.fi_scan(np.arange(0., 16., 1.), constants, t_max=200.)
+
+    periodic = result['classification'] == 'periodic'
+    assert fi_curve.rheobase(result) == 7.
+    assert np.all(result['classification'][:2] == 'rest')
+    assert np.all(np.diff(result['rate'][periodic]) > 0.) and np.all(result['rate'][periodic] > 40.)
+    # the decided members leave the batch early
+    assert np.all(result['t_stop'][periodic | (result['classification'] == 'rest')] < 200.)
+    assert np.all(np.isnan(result['latency'][result['n_spikes'] == 0]))
+
+
+def test_rheobase_of_each_setting_of_the_second_parameter(constants):
+    result = fi_curve.fi_scan(np.arange(0., 16., 1.), constants, 'g_K', np.array([30., 36., 42.]), t_max=200.)
+
+    values, rheobases = fi_curve.rheobase(result)
+
+    np.testing.assert_array_equal(values, [30., 36., 42.])
+    np.testing.assert_array_equal(rheobases, [3., 7., 12.])
+
+
+def test_rheobase_without_periodic_firing():
+    result = {'current': np.array([0., 1., 0., 1.]), 'g_K': np.array([30., 30., 40., 40.]),
+              'rate': np.zeros(4), 'latency': np.full(4, np.nan), 'n_spikes': np.zeros(4, dtype=int),
+              'classification': np.array(['rest', 'periodic', 'rest', 'transient']), 't_stop': np.ones(4)}
+
+    values, rheobases = fi_curve.rheobase(result)
+    np.testing.assert_array_equal(rheobases, [1., np.nan])
+
+    single = {name: value[:1] for name, value in result.items() if name != 'g_K'}
+    assert np.isnan(fi_curve.rheobase(single))
@@ -0,0 +1,72 @@
+import tracemalloc
+import numpy as np
+import pytest
+import cauchy_function
+import fused_rhs
+import instrumentation
+import rk_sol
+
+
+def population(y_0, n_neurons=50):
+    y = np.tile(y_0, (n_neurons, 1))
+    y[:, 0] = np.linspace(-20.3, 110.3, n_neurons)
+    return y
+
+
+def test_single_neuron_matches_cauchy_function(constants, y_0):
+    parameters = fused_rhs.pack_constants(constants)
+    for V in (-20., 0., 60.):
+        y = np.array([V, *y_0[1:]])
+        np.testing.assert_allclose(fused_rhs.fused_cauchy_function(0., y, parameters),
+                                   cauchy_function.cauchy_function(0., y, constants), rtol=1e-10, atol=1e-12)
+
+
+def test_population_matches_cauchy_function(constants, y_0):
+    y = population(y_0)
+    constants = dict(constants, g_Na=np.linspace(100., 140., len(y)), current=np.linspace(0., 10., len(y)))
+    parameters = fused_rhs.pack_constants(constants)
+
+    out = np.empty_like(y)
+    result = fused_rhs.fused_cauchy_function(0., y, parameters, out, fused_rhs.allocate_scratch(y.shape))
+
+    assert result is out
+    assert np.all(np.isfinite(out))
+    np.testing.assert_allclose(out, cauchy_function.cauchy_function(0., y, constants), rtol=1e-10, atol=1e-12)
+
+
+def test_removable_singularities(constants, y_0):
+    parameters = fused_rhs.pack_constants(constants)
+    y = np.array([[10., *y_0[1:]], [25., *y_0[1:]]])
+    # the limits of alpha_n and alpha_m, approached from a voltage next to them
+    nearby = cauchy_function.cauchy_function(0., y + [1e-7, 0., 0., 0.], constants)
+
+    np.testing.assert_allclose(fused_rhs.fused_cauchy_function(0., y, parameters), nearby, rtol=1e-6)
+    for i in range(2):
+        np.testing.assert_allclose(fused_rhs.fused_cauchy_function(0., y[i], parameters), nearby[i], rtol=1e-6)
+
+
+def test_population_kernel_allocates_no_array(constants, y_0):
+    y = population(y_0, n_neurons=10000)
+    parameters = fused_rhs.pack_constants(constants)
+    out, scratch = np.empty_like(y), fused_rhs.allocate_scratch(y.shape)
+    fused_rhs.fused_cauchy_function(0., y, parameters, out, scratch)
+
+    tracemalloc.start()
+    for _ in range(5):
+        fused_rhs.fused_cauchy_function(0., y, parameters, out, scratch)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # a single temporary of V would take 80 kB
+    assert peak < 8*len(y)//10
+
+
+@pytest.mark.parametrize('batched', [False, True])
+def test_fused_rk_matches_rk(constants, y_0, batched):
+    initial_y = np.tile(y_0, (3, 1)) if batched else y_0
+    stats = instrumentation.SolverStats()
+
+    fused = fused_rhs.fused_rk_solution((0., 20.), 2000, initial_y, constants, stats=stats)
+
+    np.testing.assert_allclose(fused, rk_sol.rk_solution((0., 20.), 2000, initial_y, constants), rtol=1e-9, atol=1e-9)
+    assert stats.n_rhs == 4*2000 and stats.n_steps == 2000
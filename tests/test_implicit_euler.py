@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import cauchy_function
+import eq_parameters
+import eq_parameters_derivatives
+import implicit_euler
+import integrator
+import rk_sol
+
+
+def test_rate_derivatives_match_finite_differences():
+    # avoids the removable singularities of alpha_m and alpha_n at V = 25 and V = 10
+    V = np.array([-40., -12.3, 0., 7.7, 33.3, 60., 110.])
+    eps = 1e-6
+
+    analytic = np.array(eq_parameters_derivatives.rate_derivatives(V))
+    numeric = (np.array(eq_parameters.rates(V + eps)) - np.array(eq_parameters.rates(V - eps)))/(2*eps)
+
+    np.testing.assert_allclose(analytic, numeric, rtol=1e-6, atol=1e-9)
+
+
+def test_jacobian_matches_finite_differences(constants):
+    rng = np.random.default_rng(1)
+    y = np.column_stack((rng.uniform(-20., 100., 6), rng.uniform(0.05, 0.95, (6, 3))))
+    eps = 1e-6
+
+    J = cauchy_function.jacobian(0., y, constants)
+    assert J.shape == (6, 4, 4)
+
+    for column in range(4):
+        dy = np.zeros(4)
+        dy[column] = eps
+        numeric = (cauchy_function.cauchy_function(0., y + dy, constants)
+                   - cauchy_function.cauchy_function(0., y - dy, constants))/(2*eps)
+        np.testing.assert_allclose(J[..., column], numeric, rtol=1e-6, atol=1e-6)
+
+
+def test_implicit_euler_converges_with_order_one(constants, y_0):
+    reference = rk_sol.rk_solution((0., 5.), 20000, y_0, constants, stride=20000)[-1, 1:]
+
+    errors = [np.max(np.abs(implicit_euler.implicit_euler_solution((0., 5.), n, y_0, constants, stride=n)[-1, 1:]
+                            - reference)) for n in (1000, 2000, 4000)]
+    orders = np.log2(np.array(errors[:-1])/np.array(errors[1:]))
+
+    np.testing.assert_allclose(orders, 1., atol=0.1)
+
+
+def test_each_step_solves_the_implicit_equation(constants, y_0):
+    step = implicit_euler.ImplicitEulerStep(tol=1e-12)
+    delta_t = 0.05
+    z = step(0., y_0, delta_t, constants)
+
+    residual = z - y_0 - cauchy_function.cauchy_function(delta_t, z, constants)*delta_t
+    assert np.max(np.abs(residual)) < 1e-10
+    assert step.n_steps == 1 and 1 <= step.n_iterations == step.largest_iterations <= 10
+    assert step.iterations is None
+
+
+def test_implicit_euler_is_stable_with_large_steps(constants, y_0):
+    # delta_t = 0.05, ten times the step of the usual runs
+    solution, iterations = implicit_euler.implicit_euler_solution((0., 30.), 600, y_0, constants,
+                                                                   return_iterations=True)
+
+    assert np.all(np.isfinite(solution))
+    assert len(iterations) == 600
+
+
+def test_streamed_step_keeps_running_counts(constants, y_0):
+    step = implicit_euler.ImplicitEulerStep(record_iterations=True)
+    solution = integrator.fixed_step_solution(step, (0., 5.), 100, y_0, constants)
+    _, iterations = implicit_euler.implicit_euler_solution((0., 5.), 100, y_0, constants, return_iterations=True)
+
+    np.testing.assert_array_equal(step.iterations, iterations)
+    assert step.n_steps == 100 and step.n_iterations == iterations.sum()
+    assert step.largest_iterations == iterations.max()
+
+
+def test_failed_newton_iterations_raise(constants, y_0):
+    step = implicit_euler.ImplicitEulerStep(max_iterations=1, tol=1e-300)
+    with pytest.raises(RuntimeError):
+        step(0., y_0, 1., constants)
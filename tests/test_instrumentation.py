@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import eq_parameters
+import euler_sol
+import implicit_euler
+import instrumentation
+import rk_sol
+
+
+def counting(rates):
+    calls = []
+
+    def counted(voltage):
+        calls.append(voltage)
+        return rates(voltage)
+
+    return counted, calls
+
+
+@pytest.mark.parametrize('solver, per_step', [(euler_sol.euler_solution, 1), (rk_sol.rk_solution, 4)])
+def test_explicit_solvers_count_their_evaluations(constants, y_0, solver, per_step):
+    stats = instrumentation.SolverStats()
+    solver((0., 5.), 100, y_0, constants, stats=stats)
+
+    assert stats.n_rhs == per_step*100
+    assert stats.n_steps == stats.n_accepted == 100
+    assert stats.times['integrate'] > 0.
+
+
+def test_implicit_euler_counts_every_rate_evaluation(constants, y_0):
+    rates, calls = counting(eq_parameters.rates)
+    stats = instrumentation.SolverStats()
+
+    implicit_euler.implicit_euler_solution((0., 5.), 100, y_0, constants, rates=rates, stats=stats)
+
+    # the Newton's iterations and the Jacobians both evaluate the rates
+    assert stats.n_rhs == len(calls) == stats.n_newton_iterations + stats.n_jacobians
+    assert stats.n_jacobians >= 1
+
+
+def test_hooks_get_the_end_of_a_failed_run(constants, y_0):
+    events = []
+    stats = instrumentation.SolverStats([lambda event, stats, **data: events.append(event)])
+
+    with pytest.raises(RuntimeError):
+        implicit_euler.implicit_euler_solution((0., 30.), 3, y_0, constants, max_iterations=1, tol=1e-300, stats=stats)
+
+    assert events[0] == 'start' and events[-1] == 'end'
+    assert stats.n_jacobians >= 1 and stats.n_rhs > 0
+
+
+def test_phase_timer_and_dictionary():
+    stats = instrumentation.SolverStats()
+    with stats.phase('serialize'):
+        np.ones(1000).sum()
+
+    assert stats.times['serialize'] > 0.
+    assert stats.as_dict()['times'] == stats.times
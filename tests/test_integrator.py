@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import instrumentation
+import integrator
+import rk_sol
+
+
+def test_solution_is_written_into_out(constants, y_0):
+    out = np.empty((501, 5))
+    solution = rk_sol.rk_solution((0., 10.), 500, y_0, constants, out=out)
+
+    assert solution is out
+    np.testing.assert_array_equal(out[:, 0], np.linspace(0., 10., 501))
+    np.testing.assert_array_equal(out[0, 1:], y_0)
+
+
+def test_out_of_the_wrong_shape_is_rejected(constants, y_0):
+    with pytest.raises(ValueError):
+        rk_sol.rk_solution((0., 10.), 500, y_0, constants, out=np.empty((500, 5)))
+
+
+def test_stride_keeps_every_stride_th_row_and_the_last_state(constants, y_0):
+    full = rk_sol.rk_solution((0., 10.), 1000, y_0, constants)
+    strided = rk_sol.rk_solution((0., 10.), 1000, y_0, constants, stride=10)
+
+    np.testing.assert_array_equal(strided, full[::10])
+    assert strided[-1, 0] == 10.
+
+
+def test_stride_that_does_not_divide_the_steps_is_rejected(constants, y_0):
+    # the last state, at t = 10, would be silently dropped
+    with pytest.raises(ValueError):
+        rk_sol.rk_solution((0., 10.), 1000, y_0, constants, stride=3)
+
+
+def test_stats_do_not_change_the_solution_and_count_the_steps(constants, y_0):
+    events = []
+    stats = instrumentation.SolverStats(hooks=[lambda event, stats, **data: events.append(event)])
+
+    plain = rk_sol.rk_solution((0., 10.), 200, y_0, constants)
+    instrumented = rk_sol.rk_solution((0., 10.), 200, y_0, constants, stats=stats)
+
+    np.testing.assert_array_equal(plain, instrumented)
+    assert stats.n_steps == stats.n_accepted == 200
+    assert stats.n_rhs == 4*200
+    assert events.count('step') == 200 and events[0] == 'start' and events[-1] == 'end'
+    assert stats.times['integrate'] > 0.
+
+
+def test_allocate_solution_repeats_the_time_for_every_neuron():
+    domain = np.linspace(0., 1., 11)
+    solution = integrator.allocate_solution(domain, np.zeros((3, 4)), stride=5)
+
+    assert solution.shape == (3, 3, 5)
+    np.testing.assert_array_equal(solution[:, :, 0], np.repeat([[0.], [0.5], [1.]], 3, axis=1))
@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+import numpy as np
+import cauchy_function
+import langevin
+import state_variables
+import steady_state
+
+
+def test_same_results_with_any_number_of_workers(constants):
+    arguments = (40, (0., 2.), 200, constants)
+    serial = langevin.ensemble(*arguments, seed=7, block_size=10, n_workers=1)
+    parallel = langevin.ensemble(*arguments, seed=7, block_size=10, n_workers=2)
+
+    for name in ('mean', 'variance', 'spike_histogram'):
+        np.testing.assert_array_equal(serial[name], parallel[name])
+    assert serial['n_trials'] == 40 and serial['seed'] == 7
+    assert np.all(serial['variance'][2:] > 0.)
+
+
+def test_merge_of_the_blocks_is_the_pooled_statistics():
+    rng = np.random.default_rng(0)
+    samples = rng.normal(size=(30, 5, 4))
+    blocks = [(len(block), block.mean(axis=0), ((block - block.mean(axis=0))**2).sum(axis=0), np.ones(3, dtype=int))
+              for block in (samples[:10], samples[10:25], samples[25:])]
+
+    count, mean, squares, histogram = langevin._merge(langevin._merge(blocks[0], blocks[1]), blocks[2])
+
+    assert count == 30
+    np.testing.assert_allclose(mean, samples.mean(axis=0))
+    np.testing.assert_allclose(squares/(count - 1), samples.var(axis=0, ddof=1))
+    np.testing.assert_array_equal(histogram, 3)
+
+
+def test_each_gate_has_its_own_drift(constants, monkeypatch):
+    # a large membrane has almost no noise, so a step follows the deterministic Euler step
+    calls = []
+    for name in ('der_m', 'der_h', 'der_n'):
+        function = getattr(state_variables, name)
+        monkeypatch.setattr(state_variables, name,
+                            lambda *args, name=name, function=function: calls.append(name) or function(*args))
+
+    step = langevin.LangevinStep(np.random.default_rng(0), area=1e12)
+    y = np.array([[5., 0.1, 0.5, 0.4]])
+    next_y = step(0., y, 0.01, constants)
+
+    assert calls == ['der_m', 'der_h', 'der_n']
+    np.testing.assert_allclose(next_y, y + 0.01*cauchy_function.cauchy_function(0., y, constants), atol=1e-6)
+
+
+def test_large_membrane_stays_at_rest(constants):
+    rest, _ = steady_state.steady_state(constants)
+    result = langevin.ensemble(20, (0., 5.), 500, constants, area=1e9, seed=1, n_workers=1)
+
+    np.testing.assert_allclose(result['mean'], np.broadcast_to(rest, result['mean'].shape), atol=1e-4)
+    assert np.all(result['variance'] < 1e-6)
+    assert result['spike_histogram'].sum() == 0
+
+
+def test_import_does_not_load_the_process_pools():
+    source = os.path.join(os.path.dirname(__file__), os.pardir, 'src')
+    code = 'import sys, langevin; print("concurrent.futures" in sys.modules)'
+    output = subprocess.run([sys.executable, '-c', code], cwd=source, capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == 'False'
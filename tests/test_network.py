@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import rush_larsen
+
+network = pytest.importorskip('network')
+sparse = pytest.importorskip('scipy.sparse')
+
+REST = np.array([0., 0.0529, 0.5961, 0.3177])
+
+
+def test_uncoupled_neurons_are_independent(constants):
+    currents = np.array([0., 8., 15.])
+    constants = dict(constants, current=currents)
+    uncoupled = network.Network(sparse.csr_matrix((3, 3)), network.E_EXCITATORY)
+
+    solution = network.network_solution((0., 20.), 2000, REST, constants, uncoupled)
+
+    np.testing.assert_allclose(solution, rush_larsen.rush_larsen_solution((0., 20.), 2000, np.tile(REST, (3, 1)), constants),
+                               rtol=1e-12, atol=1e-12)
+
+
+def test_excitatory_synapse_makes_the_target_fire(constants):
+    # neuron 0 is driven, and excites neuron 1
+    constants = dict(constants, current=np.array([10., 0.]))
+    weights = sparse.csr_matrix(([2.], ([1], [0])), shape=(2, 2))
+
+    _, times, neurons = network.network_solution((0., 30.), 3000, REST, constants,
+                                                 network.Network(weights, network.E_EXCITATORY), return_spikes=True)
+    _, alone, _ = network.network_solution((0., 30.), 3000, REST, constants,
+                                           network.Network(sparse.csr_matrix((2, 2)), network.E_EXCITATORY),
+                                           return_spikes=True)
+
+    assert 1 in neurons.tolist() and 1 not in alone.tolist()
+    assert times[neurons == 1][0] > times[neurons == 0][0]
+
+
+def test_spikes_are_sorted_by_time(constants):
+    # the later neurons fire first, within the same steps
+    constants = dict(constants, current=np.linspace(10., 12., 8))
+    uncoupled = network.Network(sparse.csr_matrix((8, 8)), network.E_EXCITATORY)
+
+    _, times, neurons = network.network_solution((0., 20.), 50, REST, constants, uncoupled, return_spikes=True)
+
+    assert len(times) > 8
+    assert np.all(np.diff(times) >= 0.)
+    assert set(neurons.tolist()) == set(range(8))
+
+
+def test_gap_junctions_are_counted_apart_from_the_synapses():
+    net = network.random_network(50, 200, n_gap_junctions=30, seed=3)
+
+    assert net.n_synapses + 2*net.n_gap_junctions == net.coupling.nnz
+    assert 0 < net.n_synapses <= 200 and 0 < net.n_gap_junctions <= 30
+    # the gap junctions couple both neurons with the same conductance
+    gap = net.coupling[:, 50:]
+    assert (gap != gap.T).nnz == 0
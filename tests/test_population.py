@@ -0,0 +1,37 @@
+import numpy as np
+import cauchy_function
+import euler_sol
+import rk_sol
+
+
+def test_batched_rhs_matches_single_neurons(constants, y_0):
+    rng = np.random.default_rng(0)
+    y = np.tile(y_0, (5, 1)) + rng.uniform(-0.01, 0.01, (5, 4))
+    y[:, 0] = rng.uniform(-20., 100., 5)
+    currents = np.linspace(0., 20., 5)
+
+    batch = cauchy_function.cauchy_function(0., y, dict(constants, current=currents))
+    single = [cauchy_function.cauchy_function(0., y[i], dict(constants, current=currents[i])) for i in range(5)]
+
+    np.testing.assert_allclose(batch, np.array(single), rtol=1e-14)
+
+
+def test_batch_constants_broadcasts_scalars_and_arrays(constants):
+    batch = cauchy_function.batch_constants(dict(constants, current=[1., 2., 3.]), 3)
+
+    assert all(value.shape == (3,) for value in batch.values())
+    np.testing.assert_array_equal(batch['current'], [1., 2., 3.])
+    np.testing.assert_array_equal(batch['g_Na'], [120.]*3)
+
+
+def test_population_solution_matches_single_runs(constants, y_0):
+    currents = np.array([0., 5., 10.])
+    initial_y = np.tile(y_0, (3, 1))
+
+    for solver in (euler_sol.euler_solution, rk_sol.rk_solution):
+        population = solver((0., 10.), 500, initial_y, dict(constants, current=currents))
+        assert population.shape == (501, 3, 5)
+
+        for i, current in enumerate(currents):
+            single = solver((0., 10.), 500, y_0, dict(constants, current=current))
+            np.testing.assert_allclose(population[:, i], single, rtol=1e-12, atol=1e-12)
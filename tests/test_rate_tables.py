@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import eq_parameters
+import eq_parameters_derivatives
+import rate_tables
+import rk_sol
+
+
+@pytest.mark.parametrize('method', ['linear', 'cubic'])
+def test_table_matches_the_formulas_on_the_grid(method):
+    table = rate_tables.rate_table(method=method)
+    V = np.linspace(-90., 140., 1001)
+    V = V[np.abs(V - 25.) > 1e-3]
+    V = V[np.abs(V - 10.) > 1e-3]
+
+    np.testing.assert_allclose(table.rates(V), eq_parameters.rates(V), rtol=1e-5, atol=1e-9)
+    np.testing.assert_allclose(table.rate_derivatives(V), eq_parameters_derivatives.rate_derivatives(V),
+                               rtol=1e-3, atol=1e-6)
+
+
+def test_removable_singularities_are_finite():
+    table = rate_tables.rate_table()
+    for V in (10., 25.):
+        assert np.all(np.isfinite(table.rates(V)))
+        assert np.all(np.isfinite(table.rates(np.array([V]))))
+
+
+@pytest.mark.parametrize('V', [-150., 200., 400.])
+def test_voltages_outside_the_grid_use_the_formulas(V):
+    table = rate_tables.rate_table()
+
+    np.testing.assert_allclose(table.rates(V), eq_parameters.rates(V), rtol=1e-12)
+    np.testing.assert_allclose(table.rate_derivatives(V), eq_parameters_derivatives.rate_derivatives(V), rtol=1e-12)
+
+    voltages = np.array([0., V, 50.])
+    np.testing.assert_allclose(np.array(table.rates(voltages))[:, 1], eq_parameters.rates(V), rtol=1e-12)
+
+
+def test_scalar_and_array_lookups_agree():
+    table = rate_tables.rate_table(method='cubic')
+    V = np.array([-100., -3.217, 12.5, 149.99, 150.])
+
+    np.testing.assert_allclose(table.rates(V), np.array([table.rates(v) for v in V]).T, rtol=1e-12)
+
+
+def test_solution_with_the_table_backend(constants, y_0):
+    exact = rk_sol.rk_solution((0., 10.), 1000, y_0, constants)
+    tabulated = rk_sol.rk_solution((0., 10.), 1000, y_0, constants, rates=rate_tables.rate_table().rates)
+
+    np.testing.assert_allclose(tabulated, exact, rtol=1e-4, atol=1e-4)
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+import eq_parameters
+import instrumentation
+import rate_tables
+import result_cache
+import rk_sol
+
+REST = np.array([0., 0.0529, 0.5961, 0.3177])
+
+
+def test_hit_and_miss(tmp_path, constants):
+    cache = result_cache.ResultCache(str(tmp_path))
+    solver = result_cache.cached(rk_sol.rk_solution, cache)
+
+    first = solver((0., 1.), 100, REST, constants)
+    second = solver((0., 1.), 100, REST, constants)
+    third = solver((0., 1.), n_steps=100, initial_y=REST, constants=constants, stride=1)
+    other = solver((0., 1.), 100, REST, dict(constants, current=1.))
+
+    assert (cache.misses, cache.hits) == (2, 2)
+    np.testing.assert_array_equal(first, rk_sol.rk_solution((0., 1.), 100, REST, constants))
+    assert second is third and not np.array_equal(first, other)
+
+    # a miss and a hit give arrays that are equally read-only
+    for solution in (first, second, other):
+        assert not solution.flags.writeable
+        with pytest.raises(ValueError):
+            solution[0, 1] = 1.
+
+
+def test_disk_tier_is_shared(tmp_path, constants):
+    run_key = result_cache.key(rk_sol.rk_solution, (0., 1.), 100, REST, constants)
+    result_cache.ResultCache(str(tmp_path)).put(run_key, np.ones((3, 5)))
+
+    cache = result_cache.ResultCache(str(tmp_path), memory_items=0)
+    np.testing.assert_array_equal(cache.get(run_key), np.ones((3, 5)))
+    assert cache.get('missing') is None and (cache.hits, cache.misses) == (1, 1)
+
+
+def test_memory_tier_is_bounded_by_bytes(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path), memory_items=10, memory_bytes=2000)
+    for i in range(4):
+        cache.put(str(i), np.full(100, float(i)))
+
+    # 800 bytes per solution: only the last two stay in memory
+    assert list(cache._memory) == ['2', '3'] and cache._memory_size == 1600
+    cache.put('large', np.zeros(1000))
+    assert 'large' not in cache._memory
+    np.testing.assert_array_equal(cache.get('large'), 0.)
+
+
+def test_disk_tier_evicts_the_least_recently_used(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path), max_bytes=3000, memory_items=0)
+    for i in range(4):
+        cache.put(str(i), np.full(100, float(i)))
+
+    assert cache.size() <= 3000 and cache.get('0') is None and cache.get('3') is not None
+
+
+def test_code_version_follows_the_imported_modules(monkeypatch):
+    modules = result_cache._package_modules({'rk_sol'})
+    assert {'rk_sol', 'integrator', 'stimulus', 'cauchy_function', 'eq_parameters'} <= set(modules)
+
+    # a change in a module imported by the solver changes the version, even out of CODE_MODULES
+    monkeypatch.setattr(result_cache, 'CODE_MODULES', ())
+    versions = []
+    for digest in ('old', 'new'):
+        monkeypatch.setattr(result_cache, '_file_digest',
+                            lambda path, modified, digest=digest: digest if path.endswith('stimulus.py') else '')
+        versions.append(result_cache.code_version(rk_sol.rk_solution))
+    assert versions[0] != versions[1]
+
+
+def test_bound_rate_backends_get_their_own_keys(tmp_path, constants):
+    cache = result_cache.ResultCache(str(tmp_path))
+    solver = result_cache.cached(rk_sol.rk_solution, cache)
+    cubic = solver((0., 1.), 100, REST, constants, rates=rate_tables.rate_table(method='cubic').rates)
+    linear = solver((0., 1.), 100, REST, constants, rates=rate_tables.rate_table(method='linear').rates)
+
+    assert cache.misses == 2
+    np.testing.assert_array_equal(linear, rk_sol.rk_solution((0., 1.), 100, REST, constants,
+                                                             rates=rate_tables.rate_table(method='linear').rates))
+    assert not np.array_equal(cubic, linear)
+
+
+def test_runs_with_out_or_stats_are_not_cached(tmp_path, constants):
+    cache = result_cache.ResultCache(str(tmp_path))
+    solver = result_cache.cached(rk_sol.rk_solution, cache)
+    solver((0., 1.), 100, REST, constants)
+
+    # out and stats passed by position are filled, not read from the cache
+    out = np.zeros((101, 5))
+    solution = solver((0., 1.), 100, REST, constants, 1, out)
+    stats = instrumentation.SolverStats()
+    solver((0., 1.), 100, REST, constants, 1, None, eq_parameters.rates, stats)
+
+    assert solution is out and np.array_equal(out, solver((0., 1.), 100, REST, constants))
+    assert stats.n_steps == 100 and (cache.misses, cache.hits) == (1, 1)
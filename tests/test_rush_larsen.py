@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+import euler_sol
+import rk_sol
+import rush_larsen
+
+
+@pytest.fixture
+def reference(constants, y_0):
+    return rk_sol.rk_solution((0., 5.), 10000, y_0, constants, stride=10000)[-1, 1:]
+
+
+def final_error(solver, n_steps, constants, y_0, reference):
+    return np.max(np.abs(solver((0., 5.), n_steps, y_0, constants, stride=n_steps)[-1, 1:] - reference))
+
+
+@pytest.mark.parametrize('solver, order', [(rush_larsen.rush_larsen_solution, 1.),
+                                           (rush_larsen.rush_larsen2_solution, 2.)])
+def test_rush_larsen_orders(solver, order, constants, y_0, reference):
+    errors = np.array([final_error(solver, n, constants, y_0, reference) for n in (500, 1000, 2000)])
+    orders = np.log2(errors[:-1]/errors[1:])
+
+    np.testing.assert_allclose(orders, order, atol=0.15)
+
+
+def test_rush_larsen_is_stable_where_euler_blows_up(constants, y_0):
+    with np.errstate(all='ignore'):
+        euler = euler_sol.euler_solution((0., 30.), 200, y_0, constants)
+    exponential = rush_larsen.rush_larsen_solution((0., 30.), 200, y_0, constants)
+
+    assert not np.all(np.isfinite(euler))
+    assert np.all(np.isfinite(exponential))
+    # the gates stay probabilities
+    assert np.all((exponential[:, 2:] >= 0.) & (exponential[:, 2:] <= 1.))
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+import cauchy_function
+import rk_sol
+import sensitivity
+import stimulus
+
+REST = np.array([0., 0.0529, 0.5961, 0.3177])
+
+
+def test_capacitance_column_uses_the_current_at_t(constants):
+    constants = dict(constants, current=stimulus.pulse_train(10., 1., 5., start=1.))
+    y = np.array([5., 0.1, 0.5, 0.4])
+
+    for t in (0., 1.5):
+        derivatives = sensitivity.parameter_derivatives(t, y, constants, ('capacitance',))
+        epsilon = 1e-6
+        shifted = cauchy_function.cauchy_function(t, y, dict(constants, capacitance=1. + epsilon))
+        expected = (shifted - cauchy_function.cauchy_function(t, y, constants))/epsilon
+        np.testing.assert_allclose(derivatives[:, 0], expected, rtol=1e-5, atol=1e-8)
+
+
+@pytest.mark.parametrize('parameter', ['g_K', 'E_L', 'capacitance'])
+def test_sensitivities_match_finite_differences(constants, parameter):
+    constants = dict(constants, current=stimulus.pulse_train(10., 1., 5., start=1.))
+    arguments = ((0., 5.), 500, REST)
+
+    _, sensitivities = sensitivity.sensitivity_solution(*arguments, constants, (parameter,))
+
+    epsilon = 1e-5*abs(constants[parameter])
+    plus, _ = sensitivity.sensitivity_solution(*arguments, dict(constants, **{parameter: constants[parameter] + epsilon}), (parameter,))
+    minus, _ = sensitivity.sensitivity_solution(*arguments, dict(constants, **{parameter: constants[parameter] - epsilon}), (parameter,))
+    expected = (plus[:, 1] - minus[:, 1])/(2.*epsilon)
+
+    np.testing.assert_allclose(sensitivities[:, 0], expected, rtol=1e-4, atol=1e-5*np.abs(expected).max())
+
+
+def test_fit_recovers_the_conductances(constants):
+    pytest.importorskip('scipy')
+    solution, _ = sensitivity.sensitivity_solution((0., 5.), 500, [[0., 0.05, 0.6, 0.06]], constants, ('g_K',))
+    t, traces = solution[::10, 0, 0], solution[::10, 0, 1]
+
+    fitted = sensitivity.fit(t, traces, [0., 0.05, 0.6, 0.06], dict(constants, g_K=30., g_L=0.4), ('g_K', 'g_L'))
+
+    assert fitted['g_K'] == pytest.approx(36., rel=1e-4)
+    assert fitted['g_L'] == pytest.approx(0.3, rel=1e-3)
+
+
+def test_state_matches_rk_solution_under_a_stimulus(constants):
+    # the edges of the pulses fall inside steps
+    constants = dict(constants, current=stimulus.pulse_train(15., 0.73, 4.1, start=1.03, n_pulses=3))
+
+    solution, _ = sensitivity.sensitivity_solution((0., 15.), 1500, REST, constants, ('g_K',))
+
+    np.testing.assert_allclose(solution, rk_sol.rk_solution((0., 15.), 1500, REST, constants), rtol=1e-12, atol=1e-12)
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+import rk_sol
+
+splines = pytest.importorskip('splines')
+
+
+@pytest.fixture
+def solution(constants, y_0):
+    return rk_sol.rk_solution((0., 10.), 200, y_0, constants)
+
+
+def test_spline_interpolates_the_solution(solution, constants, y_0):
+    spline = splines.StateSpline(solution)
+
+    np.testing.assert_allclose(spline(solution[:, 0]), solution[:, 1:], atol=1e-12)
+    # between the knots it follows a finer solution
+    fine = rk_sol.rk_solution((0., 10.), 2000, y_0, constants)
+    np.testing.assert_allclose(spline(fine[:, 0]), fine[:, 1:], atol=0.5)
+
+
+def test_unsorted_rows_give_the_same_spline(solution):
+    shuffled = solution[np.random.default_rng(0).permutation(len(solution))]
+    t = np.linspace(0., 10., 77)
+
+    np.testing.assert_array_equal(splines.StateSpline(shuffled)(t), splines.StateSpline(solution)(t))
+
+
+def test_resampling_in_batches(solution):
+    spline = splines.StateSpline(solution)
+
+    rows = np.concatenate(list(spline.resample_uniform(1001, batch_size=64)))
+    assert rows.shape == (1001, 5)
+    np.testing.assert_allclose(rows[[0, -1], 0], [0., 10.])
+    np.testing.assert_array_equal(rows[:, 1:], spline(rows[:, 0]))
+
+    t = np.linspace(2., 3., 10)
+    np.testing.assert_array_equal(np.concatenate(list(spline.resample(t, batch_size=3))), np.column_stack((t, spline(t))))
+
+
+def test_save_load_and_export(solution, tmp_path):
+    spline = splines.StateSpline(solution)
+    spline.save(str(tmp_path/'spline.npz'))
+    loaded = splines.StateSpline.load(str(tmp_path/'spline.npz'))
+
+    t = np.linspace(0., 10., 333)
+    np.testing.assert_array_equal(loaded(t), spline(t))
+
+    spline.export_coefficients(str(tmp_path/'V.txt'), 'V', format='text', precision=10)
+    table = np.loadtxt(str(tmp_path/'V.txt'), skiprows=1)
+    assert table.shape == (len(solution) - 1, 4)
+    # a_i is the value of V in the knot t_i
+    np.testing.assert_allclose(table[:, 0], solution[:-1, 1], atol=1e-9)
+
+    with pytest.raises(ValueError):
+        spline.export_coefficients(str(tmp_path/'V.csv'), 'V', format='csv')
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+import cauchy_function
+import steady_state
+
+
+def test_equilibrium_is_a_root_of_the_right_hand_side(constants):
+    y, eigenvalues = steady_state.steady_state(constants)
+
+    np.testing.assert_allclose(cauchy_function.cauchy_function(0., y, constants), 0., atol=1e-10)
+    np.testing.assert_allclose(y, [0., 0.0529, 0.5961, 0.3177], atol=5e-3)
+    assert steady_state.is_stable(eigenvalues)
+
+
+def test_eigenvalues_of_the_jacobian(constants):
+    y, eigenvalues = steady_state.steady_state(constants)
+
+    expected = np.linalg.eigvals(cauchy_function.jacobian(0., y, constants))
+    np.testing.assert_allclose(np.sort_complex(eigenvalues), np.sort_complex(expected))
+
+    # the resting state loses its stability in the Hopf bifurcation near 9.8 uA/cm^2
+    _, eigenvalues = steady_state.steady_state(dict(constants, current=12.))
+    assert not steady_state.is_stable(eigenvalues)
+
+
+def test_memoized_and_read_only(constants):
+    first = steady_state.steady_state(dict(constants))
+    second = steady_state.steady_state(dict(constants))
+
+    assert first[0] is second[0]
+    with pytest.raises(ValueError):
+        first[0][0] = 1.
+
+
+def test_population(constants):
+    currents = np.array([0., 5., 12.])
+    y, eigenvalues = steady_state.steady_state(dict(constants, current=currents))
+
+    assert y.shape == (3, 4) and eigenvalues.shape == (3, 4)
+    for i, current in enumerate(currents):
+        single, _ = steady_state.steady_state(dict(constants, current=current))
+        np.testing.assert_allclose(y[i], single, rtol=1e-10)
+    np.testing.assert_array_equal(steady_state.is_stable(eigenvalues), [True, True, False])
@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+import integrator
+import result_cache
+import rk_sol
+import stimulus
+
+
+def pulses():
+    # pulses of 1 ms every 5 ms, from 1 ms: edges at 1, 2, 6, 7, 11 and 12 ms
+    return stimulus.pulse_train(20., 1., 5., start=1., n_pulses=3)
+
+
+def test_stimulus_protocols():
+    train = pulses()
+    np.testing.assert_array_equal(train(np.array([0., 1., 1.5, 2., 6.5, 12.5])), [0., 20., 20., 0., 20., 0.])
+    assert train.left_limit(2.) == 20. and train(2.) == 0.
+    np.testing.assert_array_equal(train.discontinuities_in((0., 7.)), [1., 2., 6.])
+
+    ramp = stimulus.ramp(2., 4., 5., 15.)
+    np.testing.assert_allclose(ramp(np.array([0., 2., 3., 4., 10.])), [0., 5., 10., 15., 15.])
+
+    waveform = stimulus.sampled_waveform([0., 1., 2.], [1., 3., 2.])
+    np.testing.assert_allclose(waveform(np.array([-1., 0.5, 1.5, 3.])), [0., 2., 2.5, 0.])
+
+    with pytest.raises(ValueError):
+        stimulus.pulse_train(1., 5., 5.)
+
+
+def test_step_currents_are_floats_where_the_current_is_constant():
+    domain = np.linspace(0., 3., 7)
+    currents = stimulus.step_currents(pulses(), domain)
+
+    # the steps [0, 0.5] and [0.5, 1] end before the pulse and [1, 1.5], [1.5, 2] are inside it
+    assert currents[:4] == [0., 0., 20., 20.] and currents[5] == 0.
+    assert all(type(current) is float for current in currents)
+
+    unaligned = stimulus.step_currents(pulses(), np.linspace(0., 3., 5))
+    # the steps [0.75, 1.5] and [1.5, 2.25] contain the edges at 1 and 2 ms
+    assert isinstance(unaligned[1], stimulus.StepCurrent)
+    assert unaligned[1].values == (0., 20., 20.) and unaligned[1](0.9) == 0.
+    assert [isinstance(current, stimulus.StepCurrent) for current in unaligned] == [False, True, True, False]
+
+
+def test_step_current_takes_the_left_limit_at_the_end():
+    current = stimulus.step_current(stimulus.ramp(1., 3., 0., 10.), 2.5, 3.)
+
+    assert isinstance(current, stimulus.StepCurrent)
+    np.testing.assert_allclose(current.values, [7.5, 8.75, 10.])
+    assert stimulus.step_current(pulses(), 1.5, 2.) == 20.
+
+
+def test_steps_get_their_own_current_and_the_constants_are_not_modified(constants, y_0):
+    train = pulses()
+    constants = dict(constants, current=train)
+    before = result_cache.key(rk_sol.rk_solution, (0., 15.), 1500, y_0, constants)
+    state = {name: np.copy(value) for name, value in vars(train).items()}
+    seen = []
+
+    def step(t_k, y_k, delta_t, step_constants):
+        seen.append(step_constants['current'])
+        return rk_sol.rk_step(t_k, y_k, delta_t, step_constants)
+
+    solution = integrator.fixed_step_solution(step, (0., 15.), 1500, y_0, constants)
+
+    np.testing.assert_array_equal(solution, rk_sol.rk_solution((0., 15.), 1500, y_0, constants))
+    assert all(type(current) is float for current in seen)
+    assert seen[99] == 0. and seen[100] == 20. and seen[199] == 20. and seen[200] == 0.
+    assert constants['current'] is train
+    for name, value in vars(train).items():
+        np.testing.assert_array_equal(value, state[name])
+    assert result_cache.key(rk_sol.rk_solution, (0., 15.), 1500, y_0, constants) == before
+
+
+def test_steps_of_a_segment_share_their_constants(constants):
+    domain = np.linspace(0., 15., 1501)
+    steps = list(stimulus.step_constants(dict(constants, current=pulses()), domain, block_size=64))
+
+    # one copy for each of the 7 segments of the pulse train, also across the blocks
+    assert len(steps) == 1500 and len({id(step) for step in steps}) == 7
+    assert steps[0] is steps[99] and steps[100] is steps[199] and steps[99] is not steps[100]
+    assert [step['current'] for step in steps] == stimulus.step_currents(pulses(), domain)
+
+
+def test_aligned_grid_keeps_the_order_of_rk(constants, y_0):
+    constants = dict(constants, current=pulses())
+    assert stimulus.aligned_n_steps((0., 15.), 1001, pulses()) % 15 == 0
+
+    reference = rk_sol.dopri_solution((0., 15.), y_0, constants, rtol=1e-10, atol=1e-12)[-1, 1:]
+    errors = [np.max(np.abs(rk_sol.rk_solution((0., 15.), n, y_0, constants, stride=n)[-1, 1:] - reference))
+              for n in (750, 1500)]
+
+    assert errors[0]/errors[1] > 8.
+
+
+def test_dopri_stops_on_the_edges(constants, y_0):
+    constants = dict(constants, current=pulses())
+    solution = rk_sol.dopri_solution((0., 15.), y_0, constants)
+
+    assert np.all(np.isin([1., 2., 6., 7., 11., 12.], solution[:, 0]))
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+import rk_sol
+import stimulus
+import streaming
+
+
+def collect(chunks):
+    return np.concatenate([chunk.copy() for chunk in chunks])
+
+
+@pytest.mark.parametrize('chunk_size', [7, 4096])
+def test_stream_matches_the_fixed_step_solver(constants, y_0, chunk_size):
+    expected = rk_sol.rk_solution((0., 10.), 1000, y_0, constants, stride=5)
+    streamed = collect(streaming.stream_solution('rk', (0., 10.), 1000, y_0, constants, chunk_size, stride=5))
+
+    np.testing.assert_allclose(streamed, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_stream_binds_a_stimulus(constants, y_0):
+    # the pulses start and stop on the grid, where the current of the step end differs from I(t)
+    constants = dict(constants, current=stimulus.pulse_train(20., 1., 5., start=1., n_pulses=3))
+    expected = rk_sol.rk_solution((0., 15.), 1500, y_0, constants)
+    streamed = collect(streaming.stream_solution('rk', (0., 15.), 1500, y_0, constants, chunk_size=64))
+
+    np.testing.assert_allclose(streamed, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_unbounded_stream(constants, y_0):
+    chunks = streaming.stream('euler', y_0, constants, 0.01, chunk_size=10)
+    first = [next(chunks).copy() for _ in range(3)]
+
+    assert all(len(chunk) == 10 for chunk in first)
+    np.testing.assert_allclose(first[2][-1, 0], 0.29)
+
+
+def test_spike_counter_keeps_the_neurons(constants, y_0):
+    # from rest, only the neurons with a current fire, each at its own times
+    y_0 = np.array([0., 0.0529, 0.5961, 0.3177])
+    currents = np.array([0., 10., 0., 20.])
+    constants = dict(constants, current=currents)
+    initial_y = np.tile(y_0, (4, 1))
+    counter = streaming.run_stream(streaming.stream_solution('rk', (0., 50.), 5000, initial_y, constants, chunk_size=100),
+                                   [streaming.SpikeCounter()])[0]
+
+    assert counter.count[0] == counter.count[2] == 0 and counter.count[1] > 0 and counter.count[3] > counter.count[1]
+    assert np.all(np.diff(counter.spike_times) >= 0.)
+    assert set(counter.spike_neurons.tolist()) == {1, 3}
+    for neuron in (1, 3):
+        times = counter.spike_times[counter.spike_neurons == neuron]
+        assert len(times) == counter.count[neuron]
+
+        solution = rk_sol.rk_solution((0., 50.), 5000, y_0, dict(constants, current=currents[neuron]))
+        single = streaming.run_stream([solution], [streaming.SpikeCounter()])[0]
+        np.testing.assert_allclose(times, single.spike_times, rtol=1e-9)
+        assert np.all(single.spike_neurons == 0)
+
+
+def test_implicit_euler_streams_in_constant_memory():
+    step = streaming.resolve_step('implicit_euler')
+
+    assert step.iterations is None and step.n_steps == 0
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import signal
+import numpy as np
+import pytest
+import sweep
+
+fork_only = pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                               reason='the workers only see the test methods when they are forked')
+
+
+def crash(time_interval, n_steps, initial_y, constants, stride=1):
+    """A method that records its attempt and kills its worker"""
+    with open(constants['attempts'], 'a') as file:
+        file.write('x')
+    os.kill(os.getpid(), signal.SIGKILL)
+
+
+def flaky(time_interval, n_steps, initial_y, constants, stride=1):
+    """A method that kills its worker in its first two attempts"""
+    with open(constants['attempts'], 'a') as file:
+        file.write('x')
+    with open(constants['attempts']) as file:
+        if len(file.read()) <= 2:
+            os.kill(os.getpid(), signal.SIGKILL)
+    return np.zeros((n_steps//stride + 1, 5))
+
+
+@pytest.fixture
+def jobs(constants, y_0):
+    return sweep.grid(['euler', 'rk'], [300, 600], constants, y_0, (0., 5.))
+
+
+def test_results_do_not_depend_on_the_workers(jobs):
+    serial, serial_failures = sweep.run_sweep(jobs, n_workers=1, progress=None)
+    parallel, parallel_failures = sweep.run_sweep(jobs, n_workers=3, progress=None)
+
+    assert serial_failures == parallel_failures == {}
+    assert serial.keys() == parallel.keys() == set(range(len(jobs)))
+    for i, job in enumerate(jobs):
+        np.testing.assert_array_equal(serial[i], parallel[i])
+        np.testing.assert_array_equal(serial[i], sweep.METHODS[job.method](job.time_interval, job.n_steps,
+                                                                           job.initial_y, job.constants))
+
+
+def test_failed_callback_does_not_stop_the_sweep(jobs):
+    received = []
+
+    def on_result(i, job, solution):
+        received.append(i)
+        if i == 0:
+            raise OSError('disk full')
+
+    results, failures = sweep.run_sweep(jobs, n_workers=2, on_result=on_result, progress=None)
+
+    assert sorted(received) == list(range(len(jobs)))
+    assert results.keys() == set(range(len(jobs)))
+    assert list(failures) == [0] and isinstance(failures[0], OSError)
+
+
+@fork_only
+@pytest.mark.parametrize('max_retries', [0, 1, 2])
+def test_a_crashing_job_is_isolated(monkeypatch, tmp_path, jobs, max_retries):
+    monkeypatch.setitem(sweep.METHODS, 'crash', crash)
+    attempts = tmp_path/'attempts'
+    crashing = sweep.Job('crash', 10, {'attempts': str(attempts)}, jobs[0].initial_y)
+
+    results, failures = sweep.run_sweep(jobs + [crashing], n_workers=2, max_retries=max_retries, progress=None)
+
+    assert results.keys() == set(range(len(jobs)))
+    assert list(failures) == [len(jobs)]
+    # one run in the shared pool, which is not charged, and 1 + max_retries on its own
+    assert len(attempts.read_text()) == 2 + max_retries
+
+
+@fork_only
+def test_a_broken_shared_pool_does_not_use_up_the_retries(monkeypatch, tmp_path, jobs):
+    monkeypatch.setitem(sweep.METHODS, 'flaky', flaky)
+    attempts = tmp_path/'attempts'
+    job = sweep.Job('flaky', 10, {'attempts': str(attempts)}, jobs[0].initial_y)
+
+    # crashes the shared pool and then its own worker once, and succeeds in its one retry
+    results, failures = sweep.run_sweep(jobs + [job], n_workers=2, max_retries=1, progress=None)
+
+    assert failures == {} and results.keys() == set(range(len(jobs) + 1))
+    assert len(attempts.read_text()) == 3
@@ -0,0 +1,44 @@
+import numpy as np
+import rk_sol
+import trajectory_store
+
+
+def test_save_and_load_round_trip(tmp_path, constants, y_0):
+    solution = rk_sol.rk_solution((0., 5.), 500, y_0, constants)
+    path = str(tmp_path/'run')
+
+    trajectory_store.save_trajectory(path, solution, method='rk', n_steps=500, constants=constants, initial_y=y_0)
+
+    np.testing.assert_array_equal(trajectory_store.load_trajectory(path), solution)
+    metadata = trajectory_store.load_metadata(path)
+    assert metadata['n_rows'] == 501 and metadata['n_neurons'] is None
+    assert metadata['method'] == 'rk' and metadata['initial_y'] == y_0.tolist()
+
+
+def test_appended_rows_are_visible_while_writing(tmp_path, constants, y_0):
+    solution = rk_sol.rk_solution((0., 5.), 500, np.tile(y_0, (3, 1)), constants)
+    path = str(tmp_path/'population')
+
+    with trajectory_store.TrajectoryWriter(path, n_neurons=3) as writer:
+        writer.append(solution[:200])
+        np.testing.assert_array_equal(trajectory_store.load_trajectory(path), solution[:200])
+        writer.append(solution[200])
+        writer.append(solution[201:])
+
+    np.testing.assert_array_equal(trajectory_store.load_trajectory(path), solution)
+    np.testing.assert_array_equal(trajectory_store.last_row(path), solution[-1])
+
+
+def test_slice_and_empty_store(tmp_path, constants, y_0):
+    solution = rk_sol.rk_solution((0., 5.), 500, y_0, constants)
+    path = str(tmp_path/'run')
+    trajectory_store.save_trajectory(path, solution)
+
+    columns = trajectory_store.load_slice(path, 1., 2., ('t', 'V'))
+    inside = (solution[:, 0] >= 1.) & (solution[:, 0] <= 2.)
+    np.testing.assert_array_equal(columns['t'], solution[inside, 0])
+    np.testing.assert_array_equal(columns['V'], solution[inside, 1])
+
+    empty = str(tmp_path/'empty')
+    trajectory_store.TrajectoryWriter(empty).close()
+    assert trajectory_store.load_trajectory(empty).shape == (0, 5)